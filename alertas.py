@@ -2,12 +2,16 @@
 
 import httpx
 import os
-import requests
 import json
+import time
+import queue
+import threading
 import traceback  # Para logar falhas internas
+from concurrent.futures import ThreadPoolExecutor
 
-# --- Constantes da API SMTP2GO ---
-SMTP2GO_API_URL = "https://api.smtp2go.com/v3/email/send"
+# --- URLs das APIs (sobrescrevíveis por ambiente, ex.: servidores de teste locais) ---
+SMTP2GO_API_URL = os.environ.get('SMTP2GO_API_URL', "https://api.smtp2go.com/v3/email/send")
+COMTELE_API_URL = os.environ.get('COMTELE_API_URL', "https://sms.comtele.com.br/api/v2/send")
 
 # --- Variáveis de Ambiente (E-MAIL) - LENDO DO OS.ENVIRON ---
 SMTP2GO_API_KEY = os.environ.get('SMTP2GO_API_KEY')
@@ -18,6 +22,42 @@ DESTINATARIOS_EMAIL_STR = os.environ.get('DESTINATARIOS_EMAIL')
 COMTELE_API_KEY = os.environ.get('COMTELE_API_KEY')
 SMS_DESTINATARIOS_STR = os.environ.get('SMS_DESTINATARIOS')
 
+# --- Despacho em segundo plano ---
+TIMEOUT_HTTP_S = float(os.environ.get('ALERTA_TIMEOUT_S', 10.0))
+MAX_TENTATIVAS_ENVIO = int(os.environ.get('ALERTA_MAX_TENTATIVAS', 3))
+BACKOFF_INICIAL_S = float(os.environ.get('ALERTA_BACKOFF_S', 1.0))  # Dobra a cada nova tentativa
+# Transições recebidas dentro desta janela viram um único e-mail/SMS (0 = só as que já estão na fila)
+JANELA_AGRUPAMENTO_ALERTAS_S = float(os.environ.get('ALERTA_JANELA_AGRUPAMENTO_S', 0.0))
+
+_FILA_ALERTAS = queue.Queue()
+_LOCK_DESPACHO = threading.Lock()
+_THREAD_DESPACHO = None
+_EXECUTOR_ENVIO = ThreadPoolExecutor(max_workers=2, thread_name_prefix="envio-alerta")  # E-mail e SMS em paralelo
+_CLIENTE_HTTP = None
+
+
+def _cliente_http():
+    """ Cliente httpx compartilhado (pool de conexões keep-alive reaproveitado entre envios). """
+    global _CLIENTE_HTTP
+    with _LOCK_DESPACHO:
+        if _CLIENTE_HTTP is None:
+            _CLIENTE_HTTP = httpx.Client(timeout=TIMEOUT_HTTP_S,
+                                         limits=httpx.Limits(max_connections=10, max_keepalive_connections=4))
+        return _CLIENTE_HTTP
+
+
+def _com_retentativas(descricao, funcao, *args):
+    """ Chama 'funcao' (que retorna True/False) até MAX_TENTATIVAS_ENVIO vezes, com backoff exponencial. """
+    for tentativa in range(1, MAX_TENTATIVAS_ENVIO + 1):
+        if funcao(*args):
+            return True
+        if tentativa < MAX_TENTATIVAS_ENVIO:
+            espera = BACKOFF_INICIAL_S * 2 ** (tentativa - 1)
+            print(f"AVISO: {descricao} falhou (tentativa {tentativa}/{MAX_TENTATIVAS_ENVIO}). Nova tentativa em {espera:.1f}s.")
+            time.sleep(espera)
+    print(f"ERRO: {descricao} não enviado após {MAX_TENTATIVAS_ENVIO} tentativas.")
+    return False
+
 
 # --- Função Helper de E-mail (SMTP2GO) ---
 def _enviar_email_smtp2go(api_key, sender_email, recipients_list, subject, html_body):
@@ -48,8 +88,7 @@ def _enviar_email_smtp2go(api_key, sender_email, recipients_list, subject, html_
     headers = {"Content-Type": "application/json"}
 
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(SMTP2GO_API_URL, headers=headers, json=payload)
+        response = _cliente_http().post(SMTP2GO_API_URL, headers=headers, json=payload)
 
         # Tratamento de erro SMTP2GO: Não levanta exceção, apenas loga.
         if response.status_code == 200 and response.json().get('data', {}).get('failures', 1) == 0:
@@ -66,8 +105,6 @@ def _enviar_email_smtp2go(api_key, sender_email, recipients_list, subject, html_
 # --- Função Helper de SMS (COMTELE - SEM raise Exception) ---
 def _enviar_sms_comtele(api_key, recipients_list, message):
     """ Envia SMS usando a API da Comtele e imprime a resposta detalhada. """
-    COMTELE_API_URL = "https://sms.comtele.com.br/api/v2/send"
-
     if not api_key: return False
 
     numeros_com_virgula = ",".join(recipients_list)
@@ -79,12 +116,12 @@ def _enviar_sms_comtele(api_key, recipients_list, message):
     print(f"--- Tentando enviar SMS (Comtele) para: {numeros_com_virgula} ---")
 
     try:
-        response = requests.post(COMTELE_API_URL, headers=headers, json=payload, timeout=10.0)
+        response = _cliente_http().post(COMTELE_API_URL, headers=headers, json=payload)
 
         try:
             # Verifica se a API retornou sucesso
             success = response.json().get('Success', False)
-        except requests.exceptions.JSONDecodeError:
+        except ValueError:
             success = False
 
         if response.status_code == 200 and success:
@@ -101,13 +138,9 @@ def _enviar_sms_comtele(api_key, recipients_list, message):
         return False
 
 
-# --- FUNÇÃO PRINCIPAL UNIFICADA (CHAMADA PELO INDEX.PY) ---
-def enviar_alerta(id_ponto, nome_ponto, novo_status, status_anterior):
-    """
-    Função principal de alerta. Tenta enviar E-mail e SMS de forma INDEPENDENTE.
-    Não levanta exceção.
-    """
-
+# --- Conteúdo das mensagens ---
+def _conteudo_alerta(nome_ponto, novo_status, status_anterior):
+    """ (assunto, corpo html, sms) da transição, ou None se ela não gera alerta. """
     # Mapeamento do conteúdo de acordo com as regras (PARALIZAÇÃO ou NORMALIDADE)
     if novo_status == "PARALIZAÇÃO" and status_anterior == "ALERTA":
         assunto_email = f"ALERTA CRÍTICO: PARALIZAÇÃO - {nome_ponto}"
@@ -121,18 +154,58 @@ def enviar_alerta(id_ponto, nome_ponto, novo_status, status_anterior):
 
     else:
         # Se não for uma das transições críticas definidas, ignora
+        return None
+    return assunto_email, html_body_part, sms_mensagem
+
+
+def _conteudo_resumo(transicoes):
+    """
+    Junta várias transições num único (assunto, corpo html, sms). As PARALIZAÇÕES vêm
+    primeiro e definem o assunto (e a cor do e-mail).
+    """
+    paralizacoes = [nome for _, nome, novo, _ in transicoes if novo == "PARALIZAÇÃO"]
+    normalizacoes = [nome for _, nome, novo, _ in transicoes if novo == "LIVRE"]
+    partes_assunto = []
+    if paralizacoes:
+        partes_assunto.append(f"ALERTA CRÍTICO: PARALIZAÇÃO - {', '.join(paralizacoes)}")
+    if normalizacoes:
+        partes_assunto.append(f"{'NORMALIZAÇÃO' if paralizacoes else 'AVISO: NORMALIZAÇÃO'} - {', '.join(normalizacoes)}")
+    conteudos = sorted((_conteudo_alerta(nome, novo, anterior) for _, nome, novo, anterior in transicoes),
+                       key=lambda conteudo: not conteudo[0].startswith("ALERTA"))
+    html_body = "<br>".join(html for _, html, _ in conteudos)
+    sms_mensagem = " ".join(sms for _, _, sms in conteudos)
+    return " | ".join(partes_assunto), html_body, sms_mensagem
+
+
+# --- FUNÇÃO PRINCIPAL UNIFICADA ---
+def enviar_alertas(transicoes):
+    """
+    Envia UM e-mail e UM SMS com todas as 'transicoes' [(id_ponto, nome_ponto, novo_status,
+    status_anterior), ...] que geram alerta. E-mail e SMS são INDEPENDENTES e em paralelo,
+    cada um com retentativas. Bloqueia até o fim dos envios: o callback do Dash deve usar
+    'enfileirar_alertas'. Não levanta exceção.
+    """
+    transicoes = [t for t in transicoes if _conteudo_alerta(t[1], t[2], t[3]) is not None]
+    if not transicoes:
         return False  # Retorna False para indicar que nada foi enviado
+    if len(transicoes) == 1:
+        assunto_email, html_body_part, sms_mensagem = _conteudo_alerta(*transicoes[0][1:])
+    else:
+        assunto_email, html_body_part, sms_mensagem = _conteudo_resumo(transicoes)
+        print(f"Resumo de alertas: {len(transicoes)} transições em uma única mensagem.")
+    descricao = ", ".join(nome for _, nome, _, _ in transicoes)
 
-    # Flags de sucesso
-    sucesso_email = False
-    sucesso_sms = False
+    # Envios em andamento (cada um roda em paralelo no _EXECUTOR_ENVIO)
+    envio_email = None
+    envio_sms = None
 
     # 1. Envio de E-mail (Isolado)
     if SMTP2GO_API_KEY and SMTP2GO_SENDER_EMAIL and DESTINATARIOS_EMAIL_STR:
         destinatarios_email = [email.strip() for email in DESTINATARIOS_EMAIL_STR.split(',')]
         if destinatarios_email:
-            sucesso_email = _enviar_email_smtp2go(SMTP2GO_API_KEY, SMTP2GO_SENDER_EMAIL, destinatarios_email,
-                                                  assunto_email, html_body_part)
+            envio_email = _EXECUTOR_ENVIO.submit(
+                _com_retentativas, f"E-mail ({descricao})", _enviar_email_smtp2go,
+                SMTP2GO_API_KEY, SMTP2GO_SENDER_EMAIL, destinatarios_email, assunto_email, html_body_part)
     else:
         print(f"AVISO: Envio de E-mail não configurado.")
 
@@ -141,9 +214,70 @@ def enviar_alerta(id_ponto, nome_ponto, novo_status, status_anterior):
         # Pega a string de números, remove espaços, mas envia a string formatada
         destinatarios_sms = [num.strip() for num in SMS_DESTINATARIOS_STR.split(',')]
         if destinatarios_sms:
-            sucesso_sms = _enviar_sms_comtele(COMTELE_API_KEY, destinatarios_sms, sms_mensagem)
+            envio_sms = _EXECUTOR_ENVIO.submit(
+                _com_retentativas, f"SMS ({descricao})", _enviar_sms_comtele,
+                COMTELE_API_KEY, destinatarios_sms, sms_mensagem)
     else:
         print(f"AVISO: Envio de SMS não configurado.")
 
+    # Flags de sucesso
+    sucesso_email = envio_email.result() if envio_email is not None else False
+    sucesso_sms = envio_sms.result() if envio_sms is not None else False
+
     # Retorna o status combinado (True se pelo menos um método funcionou, False caso contrário)
-    return sucesso_email or sucesso_sms
\ No newline at end of file
+    return sucesso_email or sucesso_sms
+
+
+def enviar_alerta(id_ponto, nome_ponto, novo_status, status_anterior):
+    """ Envia o alerta de uma única transição (síncrono). Não levanta exceção. """
+    return enviar_alertas([(id_ponto, nome_ponto, novo_status, status_anterior)])
+
+
+# --- FILA DE DESPACHO (CHAMADA PELO INDEX.PY) ---
+def _loop_despacho_alertas():
+    while True:
+        transicoes = list(_FILA_ALERTAS.get())
+        lotes_recebidos = 1
+        # Agrupa o que chegar durante a janela (ou, com janela 0, o que já estiver na fila)
+        limite = time.monotonic() + JANELA_AGRUPAMENTO_ALERTAS_S
+        while True:
+            try:
+                transicoes.extend(_FILA_ALERTAS.get(timeout=max(0.0, limite - time.monotonic())))
+                lotes_recebidos += 1
+            except queue.Empty:
+                break
+        try:
+            enviar_alertas(transicoes)
+        except Exception:
+            print(f"ERRO INTERNO no despacho de alertas {transicoes}:")
+            traceback.print_exc()
+        finally:
+            for _ in range(lotes_recebidos):
+                _FILA_ALERTAS.task_done()
+
+
+def enfileirar_alertas(transicoes):
+    """
+    Agenda o envio de todas as 'transicoes' de uma avaliação [(id_ponto, nome_ponto,
+    novo_status, status_anterior), ...] e retorna imediatamente. Uma thread de despacho
+    processa a fila em ordem, juntando num só e-mail/SMS as transições recebidas dentro
+    de JANELA_AGRUPAMENTO_ALERTAS_S.
+    """
+    global _THREAD_DESPACHO
+    if not transicoes:
+        return
+    with _LOCK_DESPACHO:
+        if _THREAD_DESPACHO is None:
+            _THREAD_DESPACHO = threading.Thread(target=_loop_despacho_alertas, name="despacho-alertas", daemon=True)
+            _THREAD_DESPACHO.start()
+    _FILA_ALERTAS.put(list(transicoes))
+
+
+def enfileirar_alerta(id_ponto, nome_ponto, novo_status, status_anterior):
+    """ Agenda o alerta de uma única transição (ver 'enfileirar_alertas'). """
+    enfileirar_alertas([(id_ponto, nome_ponto, novo_status, status_anterior)])
+
+
+def aguardar_envios():
+    """ Bloqueia até a fila esvaziar (útil em testes e no encerramento do processo). """
+    _FILA_ALERTAS.join()
@@ -0,0 +1,199 @@
+# armazenamento.py (Armazenamento durável em SQLite, somente acréscimo)
+
+import sqlite3
+import json
+import secrets
+import threading
+import datetime
+import numpy as np
+
+
+class ArmazenamentoSQLite:
+    """
+    Guarda em disco as leituras de cada ponto, o estado dos simuladores e as
+    transições de status de alerta, para que um reinício/deploy não apague o
+    histórico nem "esqueça" os alertas.
+
+    - 'leituras' e 'transicoes_status' só recebem acréscimos (em lote, numa transação);
+    - a recuperação lê no máximo 'limite' leituras por ponto pela chave primária
+      (id_ponto, timestamp_ns), então o tempo de boot não cresce com o total de linhas;
+    - 'podar' descarta o que ficou fora da janela de retenção.
+
+    Vários processos (workers do gunicorn) podem abrir o mesmo arquivo: o WAL permite
+    leituras simultâneas e as gravações usam BEGIN IMMEDIATE (um escritor por vez, os
+    demais aguardam até 'timeout_s'). A tabela 'meta' guarda a versão dos dados, que
+    cada gravação de lote incrementa, e a identidade do banco (sorteada na criação).
+    """
+
+    def __init__(self, caminho, nomes_colunas, timeout_s=10.0):
+        self.caminho = caminho
+        self.nomes_colunas = list(nomes_colunas)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, timeout=timeout_s, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        colunas_sql = ", ".join(f"{nome} REAL" for nome in self.nomes_colunas)
+        with self._transacao() as cursor:
+            cursor.execute(f"""CREATE TABLE IF NOT EXISTS leituras (
+                id_ponto TEXT NOT NULL, timestamp_ns INTEGER NOT NULL, {colunas_sql},
+                PRIMARY KEY (id_ponto, timestamp_ns)) WITHOUT ROWID""")
+            cursor.execute("""CREATE TABLE IF NOT EXISTS simuladores (
+                id_ponto TEXT PRIMARY KEY, script_chuva TEXT NOT NULL, estado TEXT NOT NULL)""")
+            cursor.execute("""CREATE TABLE IF NOT EXISTS transicoes_status (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, id_ponto TEXT NOT NULL,
+                status TEXT NOT NULL, registrado_em TEXT NOT NULL, timestamp_dados_ns INTEGER)""")
+            cursor.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+            # Sorteada na criação do banco: muda se o arquivo for apagado ou recriado
+            cursor.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES ('identidade', ?)", (secrets.randbits(62),))
+            self.identidade = cursor.execute("SELECT valor FROM meta WHERE chave = 'identidade'").fetchone()[0]
+        self._sql_insercao = (f"INSERT OR REPLACE INTO leituras (id_ponto, timestamp_ns, {', '.join(self.nomes_colunas)}) "
+                              f"VALUES ({', '.join('?' * (len(self.nomes_colunas) + 2))})")
+
+    def _transacao(self):
+        return _Transacao(self._conexao, self._lock)
+
+    def _leitura(self):
+        """ Transação só de leitura: todas as consultas dentro dela enxergam a mesma versão do banco. """
+        return _Transacao(self._conexao, self._lock, "BEGIN")
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    # --- Gravação ---
+
+    def registrar_simulador(self, id_ponto, script_chuva, estado):
+        """ Grava (ou substitui) o script de chuva e o estado inicial de um simulador. """
+        with self._transacao() as cursor:
+            cursor.execute("INSERT OR REPLACE INTO simuladores (id_ponto, script_chuva, estado) VALUES (?, ?, ?)",
+                           (id_ponto, json.dumps(list(script_chuva)), json.dumps(estado)))
+
+    def gravar_lote(self, leituras_por_ponto, estados=None):
+        """
+        Acrescenta as leituras novas e atualiza o estado dos simuladores numa única transação.
+        'leituras_por_ponto': {id_ponto: (timestamps_ns, {nome_coluna: array})}.
+        'estados': {id_ponto: dict do estado do simulador} (opcional).
+        Retorna a nova versão dos dados.
+        """
+        linhas = []
+        for id_ponto, (timestamps_ns, colunas) in leituras_por_ponto.items():
+            valores = [np.asarray(colunas[nome], dtype=np.float64).tolist() for nome in self.nomes_colunas]
+            ids = [id_ponto] * len(timestamps_ns)
+            linhas.extend(zip(ids, np.asarray(timestamps_ns, dtype=np.int64).tolist(), *valores))
+        with self._transacao() as cursor:
+            if linhas:
+                cursor.executemany(self._sql_insercao, linhas)
+            for id_ponto, estado in (estados or {}).items():
+                cursor.execute("UPDATE simuladores SET estado = ? WHERE id_ponto = ?", (json.dumps(estado), id_ponto))
+            cursor.execute("INSERT INTO meta (chave, valor) VALUES ('versao', 1) "
+                           "ON CONFLICT(chave) DO UPDATE SET valor = valor + 1")
+            return cursor.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+
+    def trocar_status(self, id_ponto, status_esperado, status_novo, timestamp_dados_ns=None):
+        """
+        Grava a transição status_esperado -> status_novo só se o último status gravado ainda
+        for 'status_esperado' e os dados que a geraram não forem mais antigos que os da
+        última transição. Com vários processos, apenas um vence cada transição.
+        Retorna (trocou, status_atual).
+        """
+        with self._transacao() as cursor:
+            linha = cursor.execute("SELECT status, timestamp_dados_ns FROM transicoes_status "
+                                   "WHERE id_ponto = ? ORDER BY id DESC LIMIT 1", (id_ponto,)).fetchone()
+            status_atual, timestamp_atual_ns = linha if linha else ("INDEFINIDO", None)
+            if status_atual != status_esperado:
+                return False, status_atual
+            if timestamp_dados_ns is not None and timestamp_atual_ns is not None and timestamp_dados_ns < timestamp_atual_ns:
+                return False, status_atual
+            registrado_em = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            cursor.execute("INSERT INTO transicoes_status (id_ponto, status, registrado_em, timestamp_dados_ns) "
+                           "VALUES (?, ?, ?, ?)", (id_ponto, status_novo, registrado_em, timestamp_dados_ns))
+            return True, status_novo
+
+    def podar(self, timestamp_minimo_ns_por_ponto):
+        """ Remove as leituras anteriores ao limite de cada ponto (janela de retenção). """
+        with self._transacao() as cursor:
+            cursor.executemany("DELETE FROM leituras WHERE id_ponto = ? AND timestamp_ns < ?",
+                               [(id_ponto, int(limite)) for id_ponto, limite in timestamp_minimo_ns_por_ponto.items()])
+
+    # --- Leitura (recuperação no boot) ---
+
+    def carregar_leituras(self, id_ponto, limite, desde_ns=None):
+        """
+        Últimas 'limite' leituras do ponto (apenas as posteriores a 'desde_ns', se informado),
+        em ordem cronológica: (timestamps_ns, {nome: array}).
+        """
+        with self._lock:
+            return self._consultar_leituras(self._conexao, id_ponto, limite, desde_ns)
+
+    def carregar_desde(self, cursores_ns, limite):
+        """
+        Leituras de vários pontos e a versão dos dados numa única transação de leitura, de
+        modo que as linhas correspondam exatamente à versão retornada (um lote gravado no
+        meio da consulta não entra pela metade). 'cursores_ns': {id_ponto: último timestamp
+        já conhecido, ou None}. Retorna (versao, {id_ponto: (timestamps_ns, {nome: array})}).
+        """
+        with self._leitura() as cursor:
+            linha = cursor.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+            leituras = {id_ponto: self._consultar_leituras(cursor, id_ponto, limite, desde_ns)
+                        for id_ponto, desde_ns in cursores_ns.items()}
+        return (linha[0] if linha else 0), leituras
+
+    def _consultar_leituras(self, cursor, id_ponto, limite, desde_ns):
+        desde_ns = -2 ** 63 if desde_ns is None else int(desde_ns)
+        linhas = cursor.execute(
+            f"SELECT timestamp_ns, {', '.join(self.nomes_colunas)} FROM leituras "
+            "WHERE id_ponto = ? AND timestamp_ns > ? ORDER BY timestamp_ns DESC LIMIT ?",
+            (id_ponto, desde_ns, int(limite))).fetchall()
+        if not linhas:
+            return np.empty(0, dtype=np.int64), {nome: np.empty(0) for nome in self.nomes_colunas}
+        timestamps_ns = np.fromiter((linha[0] for linha in reversed(linhas)), dtype=np.int64, count=len(linhas))
+        valores = np.array([linha[1:] for linha in reversed(linhas)], dtype=np.float64)
+        return timestamps_ns, {nome: valores[:, j] for j, nome in enumerate(self.nomes_colunas)}
+
+    def carregar_simuladores(self):
+        """ {id_ponto: (script_chuva, estado)} de todos os simuladores gravados. """
+        with self._lock:
+            linhas = self._conexao.execute("SELECT id_ponto, script_chuva, estado FROM simuladores").fetchall()
+        return {id_ponto: (json.loads(script), json.loads(estado)) for id_ponto, script, estado in linhas}
+
+    def carregar_status_alertas(self):
+        """ Último status registrado de cada ponto. """
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT id_ponto, status FROM transicoes_status WHERE id IN "
+                "(SELECT MAX(id) FROM transicoes_status GROUP BY id_ponto)").fetchall()
+        return dict(linhas)
+
+    def versao_dados(self):
+        """ Versão gravada pelo último 'gravar_lote' (0 se ainda não houve gravação). """
+        with self._lock:
+            linha = self._conexao.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+        return linha[0] if linha else 0
+
+
+class _Transacao:
+    """
+    Context manager: BEGIN IMMEDIATE/COMMIT (ROLLBACK em caso de erro) sob o lock da conexão.
+    Com 'inicio' = "BEGIN" a transação é de leitura e não bloqueia o escritor (WAL).
+    """
+
+    def __init__(self, conexao, lock, inicio="BEGIN IMMEDIATE"):
+        self.conexao = conexao
+        self.lock = lock
+        self.inicio = inicio
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conexao.execute(self.inicio)
+        except Exception:
+            self.lock.release()
+            raise
+        return self.conexao.cursor()
+
+    def __exit__(self, tipo_erro, erro, tb):
+        try:
+            self.conexao.execute("ROLLBACK" if tipo_erro else "COMMIT")
+        finally:
+            self.lock.release()
+        return False
@@ -0,0 +1,65 @@
+// assets/eventos.js (Assinatura do canal SSE /eventos)
+//
+// Cada evento 'leituras' ou 'status' grava {versao, evento} em 'store-push-eventos',
+// o que dispara o callback de atualização do index.py sem esperar o polling (os eventos só
+// avisam: os dados e os alertas vêm do callback). Os dois eventos de uma mesma versão chegam
+// juntos e contam como um só. Leituras novas gravam o store no máximo uma vez a cada
+// INTERVALO_POLLING_MS (a versão mais recente sai ao fim da janela), para que o canal não
+// dispare o callback mais vezes que o polling que ele substitui; uma mudança de status (que
+// pode gerar alerta) sai na hora.
+// Com o canal aberto o dcc.Interval fica lento (só rede de segurança); se a conexão cai
+// (ou o servidor recusa com 503), volta ao intervalo original até o EventSource reconectar.
+
+(function () {
+    if (!window.EventSource) { return; }  // Sem suporte: fica só o polling do dcc.Interval
+
+    var INTERVALO_POLLING_MS = 2000;  // Mesmo valor do dcc.Interval do layout
+    var INTERVALO_COM_EVENTOS_MS = 30000;
+    var intervaloAtual = INTERVALO_POLLING_MS;
+
+    function definirProps(id, props) {
+        var clientside = window.dash_clientside;
+        if (!clientside || !clientside.set_props) { return false; }  // Renderer ainda não carregou
+        clientside.set_props(id, props);
+        return true;
+    }
+
+    function ajustarIntervalo(ms) {
+        if (intervaloAtual !== ms && definirProps('intervalo-atualizacao', {interval: ms})) {
+            intervaloAtual = ms;
+        }
+    }
+
+    var ultimaVersao = null;  // Última versão gravada no store
+    var pendente = null;  // Versão mais recente ainda não gravada
+    var ultimoEnvio = 0;
+    var temporizador = null;
+
+    function enviar() {
+        temporizador = null;
+        if (pendente === null || pendente.versao === ultimaVersao) { return; }
+        if (definirProps('store-push-eventos', {data: pendente})) {
+            ultimaVersao = pendente.versao;
+            ultimoEnvio = Date.now();
+            pendente = null;
+            ajustarIntervalo(INTERVALO_COM_EVENTOS_MS);
+        }
+    }
+
+    function aoReceber(evento) {
+        var dados = JSON.parse(evento.data);
+        if (dados.versao === ultimaVersao) { return; }  // 'leituras' e 'status' da versão já enviada
+        pendente = {versao: dados.versao, evento: evento.type};
+        if (evento.type === 'status') {
+            if (temporizador !== null) { clearTimeout(temporizador); }
+            enviar();
+        } else if (temporizador === null) {
+            temporizador = setTimeout(enviar, Math.max(0, ultimoEnvio + INTERVALO_POLLING_MS - Date.now()));
+        }
+    }
+
+    var fonte = new EventSource('/eventos');
+    fonte.addEventListener('leituras', aoReceber);
+    fonte.addEventListener('status', aoReceber);
+    fonte.onerror = function () { ajustarIntervalo(INTERVALO_POLLING_MS); };
+})();
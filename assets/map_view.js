@@ -0,0 +1,105 @@
+// assets/map_view.js (Pinos e gauges do mapa desenhados no navegador)
+//
+// O servidor só publica o resumo compacto de cada ponto ('store-resumo-mapa':
+// chuva 72h e status); daqui saem os pinos, a altura/cor dos gauges e os badges.
+// 'store-pontos-mapa' traz o que não muda: nome, posição, lado do card e limites.
+
+(function () {
+    // Componentes no formato JSON que o Dash renderiza
+    function componente(namespace, tipo, props) {
+        return {namespace: namespace, type: tipo, props: props};
+    }
+    function html(tipo, props) { return componente('dash_html_components', tipo, props); }
+    function dbc(tipo, props) { return componente('dash_bootstrap_components', tipo, props); }
+    function dl(tipo, props) { return componente('dash_leaflet', tipo, props); }
+
+    function semValor(valor) { return valor === null || valor === undefined || isNaN(valor); }
+    function formatar(valor, casas) { return semValor(valor) ? '--' : valor.toFixed(casas); }
+
+    // Mesmas faixas de map_view.CHUVA_LIMITE_* (vêm do servidor em 'limites_chuva')
+    function classeCorChuva(valor, limites) {
+        if (semValor(valor)) { return 'bg-secondary'; }
+        if (valor <= limites[0]) { return 'bg-success'; }
+        if (valor <= limites[1]) { return 'bg-warning'; }
+        if (valor <= limites[2]) { return 'bg-orange'; }
+        return 'bg-danger';
+    }
+
+    // Altura do gauge de umidade por nível de risco do fluxograma
+    var ALTURA_GAUGE_UMIDADE = {'LIVRE': 25, 'ATENÇÃO': 50, 'ALERTA': 75, 'PARALIZAÇÃO': 100};
+
+    function blocoKm(idPonto, ponto, resumoPonto, pontos) {
+        var chuva72h = 0.0;
+        var statusChuva = ['SEM DADOS', 'secondary'];
+        var statusUmidade = ['SEM DADOS', 'secondary', 'bg-secondary'];
+        if (resumoPonto) {
+            chuva72h = resumoPonto.chuva_72h;
+            statusChuva = resumoPonto.status_chuva;
+            statusUmidade = resumoPonto.status_umidade;
+        }
+        var chuvaPercent = semValor(chuva72h) ? 0 : Math.max(0, Math.min(100, (chuva72h / pontos.chuva_max_visual) * 100));
+        var umidadePercent = ALTURA_GAUGE_UMIDADE[statusUmidade[0]] || 0;
+
+        var gaugeChuva = html('Div', {className: 'gauge-vertical-container', children: [
+            html('Div', {className: 'gauge-bar ' + classeCorChuva(chuva72h, pontos.limites_chuva),
+                         style: {height: chuvaPercent + '%'}}),
+            html('Div', {className: 'gauge-label', style: {fontSize: '2.5em', lineHeight: '1.1'}, children: [
+                html('Span', {children: formatar(chuva72h, 0)}), html('Br', {}),
+                html('Span', {children: 'mm', style: {fontSize: '0.8em'}})
+            ]})
+        ]});
+        var gaugeUmidade = html('Div', {className: 'gauge-vertical-container', children: [
+            html('Div', {className: 'gauge-bar ' + statusUmidade[2], style: {height: umidadePercent + '%'}})
+        ]});
+        var badgeChuva = dbc('Badge', {children: statusChuva[0], color: statusChuva[1],
+                                       className: 'w-100 mt-1 small badge-black-text'});
+        var badgeUmidade = dbc('Badge', {children: statusUmidade[0], color: statusUmidade[1],
+                                         className: 'w-100 mt-1 small badge-black-text'});
+
+        var conteudo = html('Div', {className: 'km-summary-block', children: [
+            html('H6', {children: ponto.nome, className: 'text-center mb-1'}),
+            dbc('Row', {className: 'g-0', children: [
+                dbc('Col', {width: 6, children: [html('Div', {children: 'Chuva (72h)', className: 'small text-center'}),
+                                                 gaugeChuva, badgeChuva]}),
+                dbc('Col', {width: 6, children: [html('Div', {children: 'Umidade', className: 'small text-center'}),
+                                                 gaugeUmidade, badgeUmidade]})
+            ]})
+        ]});
+        return html('A', {children: conteudo, href: '/ponto/' + idPonto,
+                          style: {textDecoration: 'none', color: 'inherit'}});
+    }
+
+    function blocosDoLado(resumo, pontos, lado, rotulo) {
+        if (!resumo || !pontos) { return window.dash_clientside.no_update; }
+        var blocos = pontos[lado].filter(function (idPonto) { return pontos.pontos[idPonto]; })
+            .map(function (idPonto) { return blocoKm(idPonto, pontos.pontos[idPonto], resumo[idPonto], pontos); });
+        if (!blocos.length) {
+            return dbc('Alert', {children: 'Dados indisponíveis (' + rotulo + ').', color: 'warning',
+                                 className: 'm-2 small'});
+        }
+        return blocos;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        mapa: {
+            pinos: function (resumo, pontos) {
+                if (!resumo || !pontos) { return window.dash_clientside.no_update; }
+                return Object.keys(pontos.pontos).filter(function (idPonto) { return resumo[idPonto]; })
+                    .map(function (idPonto) {
+                        var ponto = pontos.pontos[idPonto];
+                        return dl('Marker', {position: ponto.lat_lon, children: [
+                            dl('Tooltip', {children: ponto.nome}),
+                            dl('Popup', {children: [
+                                html('H5', {children: ponto.nome}),
+                                html('P', {children: 'Chuva (72h): ' + formatar(resumo[idPonto].chuva_72h, 1) + ' mm'}),
+                                dbc('Button', {children: 'Ver Dashboard', href: '/ponto/' + idPonto, size: 'sm',
+                                               color: 'primary'})
+                            ]})
+                        ]});
+                    });
+            },
+            resumo_esquerda: function (resumo, pontos) { return blocosDoLado(resumo, pontos, 'esquerda', 'L'); },
+            resumo_direita: function (resumo, pontos) { return blocosDoLado(resumo, pontos, 'direita', 'R'); }
+        }
+    });
+})();
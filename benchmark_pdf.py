@@ -0,0 +1,110 @@
+# benchmark_pdf.py (Tempo de montagem do relatório PDF para 1, 7 e 14 dias de dados)
+#
+# Uso: python benchmark_pdf.py [--repeticoes N]
+# Os dados são sintéticos (uma estação, leitura a cada 10 min), então não precisa do motor
+# de simulação nem do banco. Compara a tabela antiga (iterrows + pdf.cell por célula) com a
+# tabela vetorizada, a tabela horária e o relatório completo (gráficos + tabela; os gráficos
+# saem do renderizador configurado em gerador_pdf.RENDERIZADOR_GRAFICOS).
+
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import gerador_pdf
+
+PERIODOS_DIAS = [1, 7, 14]
+LEITURAS_POR_DIA = 24 * 6
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)  # Aviso do fpdf2 sobre a fonte "Arial"
+
+
+def dados_sinteticos(dias, semente=0):
+    gerador = np.random.default_rng(semente)
+    n = dias * LEITURAS_POR_DIA
+    timestamps = pd.date_range(end=pd.Timestamp('2025-01-15', tz='UTC'), periods=n, freq='10min')
+    chuva = np.where(gerador.random(n) < 0.2, gerador.gamma(1.5, 1.0, n), 0.0).round(1)
+    base = 35 + np.cumsum(chuva) * 0.02
+    return pd.DataFrame({'id_ponto': 'Ponto-A-KM67', 'timestamp': timestamps, 'chuva_mm': chuva,
+                         'umidade_1m_perc': base + gerador.normal(0, 0.3, n),
+                         'umidade_2m_perc': base - 1 + gerador.normal(0, 0.3, n),
+                         'umidade_3m_perc': base - 2 + gerador.normal(0, 0.3, n)})
+
+
+def figuras(df):
+    fig_chuva = go.Figure([go.Bar(x=df['timestamp'], y=df['chuva_mm']),
+                           go.Scatter(x=df['timestamp'], y=df['chuva_mm'].rolling(432, min_periods=1).sum(),
+                                      yaxis='y2')])
+    fig_umidade = go.Figure([go.Scatter(x=df['timestamp'], y=df[coluna], name=nome) for coluna, nome in
+                             [('umidade_1m_perc', '1m'), ('umidade_2m_perc', '2m'), ('umidade_3m_perc', '3m')]])
+    return fig_chuva, fig_umidade
+
+
+def tabela_linha_a_linha(df_periodo):
+    """ Tabela como era feita antes (referência): iterrows e cinco pdf.cell por linha. """
+    pdf = gerador_pdf.PDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "", 8)
+    df_tabela = df_periodo.copy()
+    df_tabela['timestamp'] = df_tabela['timestamp'].dt.strftime('%d/%m %H:00')
+    df_tabela['chuva_mm'] = df_tabela['chuva_mm'].round(1).astype(str)
+    for coluna in ['umidade_1m_perc', 'umidade_2m_perc', 'umidade_3m_perc']:
+        df_tabela[coluna] = df_tabela[coluna].round(1).astype(str) + '%'
+    col_width = pdf.w / 5.5
+    for index, row in df_tabela.iterrows():
+        if pdf.get_y() > (pdf.h - 30):
+            pdf.add_page()
+            pdf.set_font("Arial", "", 8)
+            for titulo, largura in zip(gerador_pdf.CABECALHO_TABELA, [1.5, 1, 1, 1, 1]):
+                pdf.cell(col_width * largura, 5, titulo, 1)
+            pdf.ln()
+        pdf.cell(col_width * 1.5, 5, str(row.get('timestamp', '')), 1)
+        for coluna in ['chuva_mm', 'umidade_1m_perc', 'umidade_2m_perc', 'umidade_3m_perc']:
+            pdf.cell(col_width, 5, str(row.get(coluna, '')), 1)
+        pdf.ln()
+    return pdf.output()
+
+
+def tabela_vetorizada(df_periodo, agregacao_horaria=False):
+    pdf = gerador_pdf.PDF()
+    pdf.add_page()
+    gerador_pdf.desenhar_tabela(pdf, gerador_pdf.formatar_tabela(df_periodo, agregacao_horaria))
+    return pdf.output()
+
+
+def cronometrar(funcao, repeticoes):
+    """ (melhor tempo em s, tamanho do resultado em KB) """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), len(resultado) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da montagem do relatório PDF.")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    casos = [
+        ("tabela antiga (iterrows)", lambda df, figs: tabela_linha_a_linha(df)),
+        ("tabela vetorizada", lambda df, figs: tabela_vetorizada(df)),
+        ("tabela horária", lambda df, figs: tabela_vetorizada(df, agregacao_horaria=True)),
+        ("relatório completo", lambda df, figs: gerador_pdf.criar_relatorio_em_memoria(df, *figs, "LIVRE", "success")),
+    ]
+    print(f"{'caso':<26}" + "".join(f"{f'{dias} dia(s)':>22}" for dias in PERIODOS_DIAS))
+    dados = {dias: dados_sinteticos(dias) for dias in PERIODOS_DIAS}
+    figs = {dias: figuras(df) for dias, df in dados.items()}
+    for nome, caso in casos:
+        colunas = []
+        for dias in PERIODOS_DIAS:
+            segundos, kb = cronometrar(lambda: caso(dados[dias], figs[dias]), args.repeticoes)
+            colunas.append(f"{segundos * 1000:9.1f} ms {kb:6.0f} KB")
+        print(f"{nome:<26}" + "".join(f"{coluna:>22}" for coluna in colunas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# cache_figuras.py (Cache LRU das figuras Plotly, compartilhado entre sessões)
+
+import os
+import threading
+from collections import OrderedDict
+
+MAX_FIGURAS_CACHE = int(os.environ.get('MAX_FIGURAS_CACHE', 64))
+
+
+class CacheFiguras:
+    """
+    Cache LRU limitado de figuras já serializadas (dict do Plotly), com chave do tipo
+    (página, id_ponto, horas selecionadas, versão dos dados). Sessões que pedem a mesma
+    chave reutilizam o resultado; se várias chegarem juntas numa chave nova, só a
+    primeira constrói e as demais aguardam por ela.
+    """
+
+    def __init__(self, max_itens=MAX_FIGURAS_CACHE):
+        self.max_itens = max_itens
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._em_construcao = {}  # chave -> threading.Event
+        self._lock = threading.Lock()
+
+    def obter(self, chave, construtor):
+        """ Retorna o valor da chave, chamando 'construtor()' apenas se ele não estiver no cache. """
+        while True:
+            with self._lock:
+                if chave in self._itens:
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return self._itens[chave]
+                evento = self._em_construcao.get(chave)
+                if evento is None:
+                    evento = self._em_construcao[chave] = threading.Event()
+                    self.falhas += 1
+                    break
+            evento.wait()  # Outra sessão está construindo a mesma chave
+        try:
+            valor = construtor()
+            with self._lock:
+                self._itens[chave] = valor
+                while len(self._itens) > self.max_itens:
+                    self._itens.popitem(last=False)
+            return valor
+        finally:
+            with self._lock:
+                del self._em_construcao[chave]
+            evento.set()
+
+    def estatisticas(self):
+        """ {'acertos', 'falhas', 'itens', 'taxa_acerto'} para monitoração. """
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {'acertos': self.acertos, 'falhas': self.falhas, 'itens': len(self._itens),
+                    'taxa_acerto': self.acertos / total if total else 0.0}
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+
+CACHE_FIGURAS = CacheFiguras()
@@ -4,14 +4,26 @@ import pandas as pd
 import numpy as np
 import httpx
 import os
-import random
 import datetime
+import threading
+import time
+import uuid
+from collections import deque, OrderedDict
 from math import floor
+import armazenamento
+import zentra
+
+try:
+    import fcntl  # Eleição do processo escritor (Linux/macOS)
+except ImportError:  # Windows: sem fcntl, o processo se considera o único escritor
+    fcntl = None
 
 
 # (Mantido da sua versão)
-def _gerar_script_de_chuva_ciclico(total_chuva_mm, horas_chuva, horas_seca, pontos_por_hora, num_eventos_chuva):
-    # ... (Função mantida idêntica) ...
+def _gerar_script_de_chuva_ciclico(total_chuva_mm, horas_chuva, horas_seca, pontos_por_hora, num_eventos_chuva,
+                                   rng=None):
+    # 'rng' (np.random.Generator) torna o script reprodutível por ponto; sem ele usa o np.random global
+    rng = rng if rng is not None else np.random
     total_pontos_chuva = horas_chuva * pontos_por_hora
     total_pontos_seca = horas_seca * pontos_por_hora
     script_chuva = np.zeros(total_pontos_chuva)
@@ -21,8 +33,8 @@ def _gerar_script_de_chuva_ciclico(total_chuva_mm, horas_chuva, horas_seca, pont
         eventos_reais = len(populacao_indices)
 
     if eventos_reais > 0:
-        indices_de_chuva = np.random.choice(populacao_indices, eventos_reais, replace=False)
-        valores_chuva = np.random.rand(eventos_reais)
+        indices_de_chuva = rng.choice(populacao_indices, eventos_reais, replace=False)
+        valores_chuva = rng.random(eventos_reais)
         if np.sum(valores_chuva) > 0:
             valores_chuva /= np.sum(valores_chuva)
         valores_chuva *= total_chuva_mm
@@ -31,7 +43,8 @@ def _gerar_script_de_chuva_ciclico(total_chuva_mm, horas_chuva, horas_seca, pont
         if len(valid_indices) > 0:
             script_chuva[valid_indices] = valid_valores
     script_seca = np.zeros(total_pontos_seca)
-    script_final = np.concatenate((script_chuva, script_seca))
+    # Já arredondado em 2 casas (mesmo valor que o simulador grava a cada passo)
+    script_final = np.round(np.concatenate((script_chuva, script_seca)), 2)
     print(
         f"  -> Script de chuva gerado: {len(script_final)} pontos ({horas_chuva}h chuva + {horas_seca}h seca), somando {np.sum(script_final):.1f}mm.")
     return list(script_final)
@@ -74,9 +87,218 @@ DADOS_HISTORICOS_GLOBAIS = {}
 # --- ARMAZENAMENTO DE ESTADO SÍNCRONO (EM MEMÓRIA) ---
 STATUS_ATUAL_ALERTAS = {}
 
+# --- Estado do motor de simulação ---
+_LOCK_SIMULACAO = threading.RLock()
+_MOTOR_THREAD = None
+_SNAPSHOT_ATUAL = None
+# Últimos snapshots por versão: sessões que ainda exibem uma versão anterior continuam sendo atendidas
+_SNAPSHOTS_RECENTES = OrderedDict()
+MAX_SNAPSHOTS_RECENTES = 8
+# Avisa quem aguarda (ex.: canal de eventos) que um snapshot novo foi publicado
+_CONDICAO_SNAPSHOT = threading.Condition()
+
 FREQUENCIA_SIMULACAO = datetime.timedelta(minutes=10)
 MAX_HISTORY_POINTS = 14 * 24 * 6
-PASSOS_POR_ATUALIZACAO = 6
+
+# --- Motor de simulação (relógio de parede) ---
+# Um passo de FREQUENCIA_SIMULACAO a cada (FREQUENCIA_SIMULACAO / FATOR) segundos reais.
+# O padrão (1800x) mantém o ritmo antigo de 1 hora simulada a cada 2s de uma aba aberta.
+FATOR_ACELERACAO_SIMULACAO = float(os.environ.get('FATOR_ACELERACAO_SIMULACAO', 1800.0))
+INTERVALO_MINIMO_MOTOR_S = 1.0  # Agrupa os passos devidos em ciclos de no mínimo 1s
+MAX_PASSOS_POR_CICLO = MAX_HISTORY_POINTS  # Atrasos maiores que isso são descartados
+SIMULACAO_SEMENTE = int(os.environ['SIMULACAO_SEMENTE']) if os.environ.get('SIMULACAO_SEMENTE') else None
+JANELA_CHUVA_72H = datetime.timedelta(hours=72)
+# Backfill: ao iniciar, gera MAX_HISTORY_POINTS de histórico (14 dias) pelo SimuladorLote
+SIMULACAO_BACKFILL = os.environ.get('SIMULACAO_BACKFILL', '1').strip().lower() not in ('0', 'false', 'nao', 'não')
+ORCAMENTO_BACKFILL_S = float(os.environ.get('ORCAMENTO_BACKFILL_S', 3.0))  # Tempo máximo esperado do boot
+# Persistência em SQLite (leituras, estado dos simuladores e status de alerta sobrevivem a reinícios)
+ARMAZENAMENTO_PERSISTENTE = os.environ.get('ARMAZENAMENTO_PERSISTENTE', '1').strip().lower() not in ('0', 'false', 'nao', 'não')
+CAMINHO_BANCO_DADOS = os.environ.get('CAMINHO_BANCO_DADOS',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados_tamoios.sqlite3'))
+PODA_A_CADA_N_LOTES = 360  # Remove do disco o que saiu da janela de retenção a cada N gravações
+_ARMAZENAMENTO = None
+_IDENTIDADE_PROCESSO = uuid.uuid4().hex  # Origem dos dados quando não há banco (só existem neste processo)
+_LOTES_DESDE_PODA = 0
+# Com vários workers, só o processo que detém o lock do arquivo '.lider' simula e grava;
+# os demais ('leitores') acompanham o banco a cada INTERVALO_MINIMO_MOTOR_S.
+_ARQUIVO_LIDER = None
+# Fonte real (ZENTRA Cloud): com USA_API_REAL=1, o processo escritor coleta as leituras em vez de simular
+USA_API_REAL = os.environ.get('USA_API_REAL', '0').strip().lower() in ('1', 'true', 'sim')
+INTERVALO_COLETA_ZENTRA_S = float(os.environ.get('INTERVALO_COLETA_ZENTRA_S', 60.0))
+_CLIENTE_ZENTRA = None
+_LOCK_COLETA = threading.Lock()  # Uma rodada de coleta por vez (os cursores avançam em sequência)
+# Stale-while-revalidate: get_data() responde na hora com o último snapshot e só pede uma coleta
+# em segundo plano (no máximo uma a cada INTERVALO_MINIMO_REVALIDACAO_S).
+INTERVALO_MINIMO_REVALIDACAO_S = float(os.environ.get('INTERVALO_MINIMO_REVALIDACAO_S', 15.0))
+_EVENTO_REVALIDACAO = threading.Event()
+_ULTIMA_COLETA_EM = None  # time.monotonic() do início da última rodada de coleta
+# Um ponto só passa a "SEM DADOS" quando a última leitura recebida fica mais velha que isto
+LIMITE_DADOS_OBSOLETOS_S = float(os.environ.get('LIMITE_DADOS_OBSOLETOS_S', 2 * 3600.0))
+
+
+# --- Colunas do histórico em memória: nome final -> (dtype, chave na leitura do simulador) ---
+# Todas em float64: os limiares (ex.: delta de umidade) comparam exatamente os valores gravados.
+COLUNAS_HISTORICO = {
+    'chuva_mm': (np.float64, 'pluviometria_mm'),
+    'precipitacao_acumulada_mm': (np.float64, 'precipitacao_acumulada_mm'),
+    'umidade_1m_perc': (np.float64, 'umidade_1m_perc'),
+    'umidade_2m_perc': (np.float64, 'umidade_2m_perc'),
+    'umidade_3m_perc': (np.float64, 'umidade_3m_perc'),
+    'base_1m': (np.float64, 'base_1m'),
+    'base_2m': (np.float64, 'base_2m'),
+    'base_3m': (np.float64, 'base_3m'),
+}
+COLUNAS_FINAIS = ['id_ponto', 'timestamp'] + list(COLUNAS_HISTORICO.keys())
+EPOCH_UTC = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _arredondar_2(valor):
+    """ Arredonda em 2 casas com a mesma regra do NumPy (usada também no SimuladorLote). """
+    return float(np.round(valor, 2))
+
+
+def _para_epoch_ns(timestamp_utc):
+    """ Converte um datetime UTC em nanossegundos desde a época (int64 exato). """
+    return ((timestamp_utc - EPOCH_UTC) // datetime.timedelta(microseconds=1)) * 1000
+
+
+# ==============================================================================
+# --- CLASSE HistoricoCircular ---
+# ==============================================================================
+class HistoricoCircular:
+    """
+    Histórico de um ponto em buffer circular de capacidade fixa (colunas NumPy).
+    Cada leitura é gravada em duas posições (i e i + capacidade), de modo que as
+    leituras válidas sempre formam uma fatia contígua: o DataFrame entregue usa
+    visões (views) dos arrays, sem copiar as colunas numéricas.
+    """
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self.timestamps_ns = np.zeros(2 * capacidade, dtype=np.int64)
+        self.colunas = {nome: np.full(2 * capacidade, np.nan, dtype=dtype)
+                        for nome, (dtype, _) in COLUNAS_HISTORICO.items()}
+        self.inicio = 0
+        self.tamanho = 0
+        self.atualizado_em = None  # Epoch (s) da leitura mais nova, limitado ao relógio atual
+
+    def __len__(self):
+        return self.tamanho
+
+    def _marcar_atualizacao(self, ultimo_timestamp_ns):
+        # Leituras reais: a idade é a da própria leitura. Simuladas (o relógio simulado não
+        # acompanha o real): conta a partir de quando chegaram ao buffer.
+        agora = time.time()
+        self.atualizado_em = min(agora, ultimo_timestamp_ns / 1e9) if USA_API_REAL else agora
+
+    def adicionar(self, timestamp_utc, leitura):
+        """ Acrescenta uma leitura (dict do simulador); descarta a mais antiga se estiver cheio. """
+        if self.tamanho < self.capacidade:
+            posicao = self.inicio + self.tamanho
+            self.tamanho += 1
+        else:
+            posicao = self.inicio
+            self.inicio = (self.inicio + 1) % self.capacidade
+        espelho = posicao + self.capacidade if posicao < self.capacidade else posicao - self.capacidade
+        ts_ns = _para_epoch_ns(timestamp_utc)
+        self.timestamps_ns[posicao] = ts_ns
+        self.timestamps_ns[espelho] = ts_ns
+        for nome, (_, chave) in COLUNAS_HISTORICO.items():
+            valor = leitura.get(chave, np.nan)
+            coluna = self.colunas[nome]
+            coluna[posicao] = valor
+            coluna[espelho] = valor
+        self._marcar_atualizacao(ts_ns)
+
+    def adicionar_lote(self, timestamps_ns, colunas):
+        """
+        Acrescenta várias leituras de uma vez.
+        'timestamps_ns' é um array int64 e 'colunas' um dict nome_final -> array (mesmo tamanho).
+        """
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        n = len(timestamps_ns)
+        if n == 0:
+            return
+        if n > self.capacidade:
+            timestamps_ns = timestamps_ns[-self.capacidade:]
+            colunas = {nome: np.asarray(valores)[-self.capacidade:] for nome, valores in colunas.items()}
+            n = self.capacidade
+        posicoes = (self.inicio + self.tamanho + np.arange(n)) % self.capacidade
+        for destino in (posicoes, posicoes + self.capacidade):
+            self.timestamps_ns[destino] = timestamps_ns
+            for nome, coluna in self.colunas.items():
+                coluna[destino] = colunas.get(nome, np.nan)
+        excedente = max(0, self.tamanho + n - self.capacidade)
+        self.inicio = (self.inicio + excedente) % self.capacidade
+        self.tamanho = min(self.capacidade, self.tamanho + n)
+        self._marcar_atualizacao(int(timestamps_ns[-1]))
+
+    def _fatia(self):
+        return slice(self.inicio, self.inicio + self.tamanho)
+
+    def timestamps_validos_ns(self):
+        """ Visão (int64, ns) dos timestamps válidos, do mais antigo ao mais recente. """
+        return self.timestamps_ns[self._fatia()]
+
+    def ultimo_timestamp_ns(self):
+        if self.tamanho == 0:
+            return None
+        return int(self.timestamps_ns[self.inicio + self.tamanho - 1])
+
+    def ultimas_leituras(self, n):
+        """ As 'n' leituras mais recentes: (timestamps_ns, {nome: array}) como visões dos buffers. """
+        n = min(n, self.tamanho)
+        fatia = slice(self.inicio + self.tamanho - n, self.inicio + self.tamanho)
+        return self.timestamps_ns[fatia], {nome: coluna[fatia] for nome, coluna in self.colunas.items()}
+
+    def para_dataframe(self, id_ponto):
+        """ DataFrame do histórico (mais antigo -> mais recente) com as colunas numéricas como visões. """
+        fatia = self._fatia()
+        timestamps = pd.DatetimeIndex(self.timestamps_ns[fatia].view('datetime64[ns]')).tz_localize('UTC')
+        dados = {'id_ponto': np.full(self.tamanho, id_ponto, dtype=object), 'timestamp': timestamps}
+        for nome, coluna in self.colunas.items():
+            dados[nome] = coluna[fatia]
+        return pd.DataFrame(dados, columns=COLUNAS_FINAIS, copy=False)
+
+
+class SnapshotDados:
+    """
+    Retrato imutável dos dados publicado pelo motor a cada ciclo.
+    'df' é o DataFrame de todos os pontos; 'por_ponto' guarda as fatias de cada ponto.
+    """
+
+    def __init__(self, versao, df, por_ponto, timestamps_ns, atualizado_em=None):
+        self.versao = versao
+        self.df = df
+        self.por_ponto = por_ponto
+        self.timestamps_ns = timestamps_ns
+        self.atualizado_em = atualizado_em or {}  # {id_ponto: epoch (s) da leitura mais nova}
+        self.gerado_em = time.time()
+
+    def idade_ponto_s(self, id_ponto, agora=None):
+        """ Segundos desde a leitura mais nova do ponto (infinito se o ponto não tem dados). """
+        atualizado_em = self.atualizado_em.get(id_ponto)
+        if atualizado_em is None:
+            return float('inf')
+        return max(0.0, (agora if agora is not None else time.time()) - atualizado_em)
+
+    def idades_s(self):
+        """ {id_ponto: idade em segundos} de todos os pontos do snapshot. """
+        agora = time.time()
+        return {id_ponto: self.idade_ponto_s(id_ponto, agora) for id_ponto in self.por_ponto}
+
+    def pontos_obsoletos(self, limite_s=None):
+        """ Pontos cuja leitura mais nova passou de 'limite_s' (padrão: LIMITE_DADOS_OBSOLETOS_S). """
+        limite_s = LIMITE_DADOS_OBSOLETOS_S if limite_s is None else limite_s
+        agora = time.time()
+        return {id_ponto for id_ponto in self.por_ponto if self.idade_ponto_s(id_ponto, agora) > limite_s}
+
+    def df_ponto(self, id_ponto):
+        """ DataFrame de um ponto (vazio, com as colunas padrão, se o ponto não tiver dados). """
+        df_ponto = self.por_ponto.get(id_ponto)
+        if df_ponto is None:
+            return pd.DataFrame(columns=COLUNAS_FINAIS)
+        return df_ponto
 
 
 # ==============================================================================
@@ -84,8 +306,10 @@ PASSOS_POR_ATUALIZACAO = 6
 # ==============================================================================
 class SensorSimulator:
     # ... (A classe permanece idêntica à versão anterior) ...
-    def __init__(self, constantes):
+    def __init__(self, constantes, semente=None):
         self.c = constantes
+        # Gerador próprio (ruído da umidade e script de chuva): mesma semente -> mesmas leituras
+        self.rng = np.random.default_rng(semente)
         self.umidade_1m = 0.0
         self.umidade_2m = 0.0
         self.umidade_3m = 0.0
@@ -99,22 +323,29 @@ class SensorSimulator:
         self.simulation_cycle_index = 0
         self.fase_chuva = 'subindo'
         self.pico_chuva_ciclo = 0.0
+        # Janela móvel de 72h mantida incrementalmente: (timestamp, chuva em centésimos de mm).
+        # A soma em inteiros evita o acúmulo de erro de ponto flutuante ao somar/subtrair.
+        self.janela_72h = deque()
+        self.chuva_72h_centesimos = 0
+        self.precipitacao_acumulada = 0.0
+        self.ultimo_timestamp = None
 
-    def _simular_chuva(self, history_data, current_timestamp_utc):
-        total_chuva_72h = 0.0
-        limite_72h = (current_timestamp_utc - datetime.timedelta(hours=72)).replace(tzinfo=datetime.timezone.utc)
-        for dado in reversed(history_data):
-            try:
-                if not isinstance(dado, dict): continue
-                dado_timestamp_str = dado.get('timestamp')
-                if not dado_timestamp_str: continue
-                dado_timestamp = datetime.datetime.fromisoformat(dado_timestamp_str.replace('Z', '+00:00'))
-                if dado_timestamp < limite_72h: break
-                chuva_dado = dado.get('pluviometria_mm', 0.0)
-                if dado_timestamp >= limite_72h:
-                    total_chuva_72h += chuva_dado
-            except Exception:
-                continue
+    def _expirar_janela_72h(self, current_timestamp_utc):
+        """ Remove da janela móvel as leituras anteriores a (agora - 72h) e retorna o total em mm. """
+        limite_72h = current_timestamp_utc - JANELA_CHUVA_72H
+        janela = self.janela_72h
+        while janela and janela[0][0] < limite_72h:
+            _, chuva_centesimos = janela.popleft()
+            self.chuva_72h_centesimos -= chuva_centesimos
+        return self.chuva_72h_centesimos / 100.0
+
+    def _registrar_chuva(self, timestamp_utc, chuva_mm):
+        chuva_centesimos = int(round(chuva_mm * 100))
+        self.janela_72h.append((timestamp_utc, chuva_centesimos))
+        self.chuva_72h_centesimos += chuva_centesimos
+
+    def _simular_chuva(self, current_timestamp_utc):
+        total_chuva_72h = self._expirar_janela_72h(current_timestamp_utc)
         limite_chuva_72h_config = self.c.get('LIMITE_CHUVA_72H', CONSTANTES_PADRAO.get('LIMITE_CHUVA_72H', 200.0))
         if total_chuva_72h >= limite_chuva_72h_config:
             print(
@@ -129,21 +360,8 @@ class SensorSimulator:
         chuva_mm = self.rain_script[script_index]
         return round(chuva_mm, 2)
 
-    def _simular_umidade(self, history_data, current_timestamp_utc, chuva_mm_neste_passo):
-        total_chuva_72h = 0.0
-        limite_72h = (current_timestamp_utc - datetime.timedelta(hours=72)).replace(tzinfo=datetime.timezone.utc)
-        for dado in reversed(history_data):
-            try:
-                if not isinstance(dado, dict): continue
-                dado_timestamp_str = dado.get('timestamp')
-                if not dado_timestamp_str: continue
-                dado_timestamp = datetime.datetime.fromisoformat(dado_timestamp_str.replace('Z', '+00:00'))
-                if dado_timestamp < limite_72h: break
-                chuva_dado = dado.get('pluviometria_mm', 0.0)
-                if dado_timestamp >= limite_72h:
-                    total_chuva_72h += chuva_dado
-            except Exception:
-                continue
+    def _simular_umidade(self, current_timestamp_utc, chuva_mm_neste_passo):
+        total_chuva_72h = self._expirar_janela_72h(current_timestamp_utc)
         total_chuva_72h = round(total_chuva_72h, 2)
         total_chuva_72h = max(0.0, min(total_chuva_72h, FALL_START_ALL))
         base_1m = self.c.get('UMIDADE_BASE_1M', CONSTANTES_PADRAO['UMIDADE_BASE_1M'])
@@ -202,9 +420,9 @@ class SensorSimulator:
                 self.pico_chuva_ciclo = 0.0
                 self.fase_chuva = 'subindo'
             elif total_chuva_72h < GATILHO_CHUVA_BASE_MM:
-                umidade_1m_calc = base_1m + random.uniform(-0.3, 0.3)
-                umidade_2m_calc = base_2m + random.uniform(-0.3, 0.3)
-                umidade_3m_calc = base_3m + random.uniform(-0.3, 0.3)
+                umidade_1m_calc = base_1m + self.rng.uniform(-0.3, 0.3)
+                umidade_2m_calc = base_2m + self.rng.uniform(-0.3, 0.3)
+                umidade_3m_calc = base_3m + self.rng.uniform(-0.3, 0.3)
                 self.pico_chuva_ciclo = total_chuva_72h
                 self.fase_chuva = 'subindo'
             else:
@@ -264,127 +482,884 @@ class SensorSimulator:
         else:
             self.umidade_3m = max(0.0, min(umidade_3m_calc, saturacao_3m))
 
-    def gerar_novo_dado(self, timestamp_utc, history_data):
-        chuva_mm_neste_passo = self._simular_chuva(history_data, timestamp_utc);
+    def exportar_estado(self):
+        """ Estado serializável (JSON) para o armazenamento; a janela de 72h é refeita a partir das leituras. """
+        return {
+            'simulation_cycle_index': self.simulation_cycle_index,
+            'umidade': [self.umidade_1m, self.umidade_2m, self.umidade_3m],
+            'bases_dinamicas': [self.base_1m_dinamica, self.base_2m_dinamica, self.base_3m_dinamica],
+            'bases_definidas': [self.base_1m_definida, self.base_2m_definida, self.base_3m_definida],
+            'fase_chuva': self.fase_chuva,
+            'pico_chuva_ciclo': self.pico_chuva_ciclo,
+            'precipitacao_acumulada': self.precipitacao_acumulada,
+            'ultimo_timestamp_ns': _para_epoch_ns(self.ultimo_timestamp) if self.ultimo_timestamp else None,
+            'rng': self.rng.bit_generator.state,
+        }
+
+    def restaurar_estado(self, estado, timestamps_ns, chuva_mm):
+        """
+        Restaura o estado exportado por 'exportar_estado'. 'timestamps_ns'/'chuva_mm' são as
+        leituras gravadas do ponto, usadas para refazer a janela móvel de 72h.
+        """
+        self.simulation_cycle_index = estado['simulation_cycle_index']
+        self.umidade_1m, self.umidade_2m, self.umidade_3m = estado['umidade']
+        self.base_1m_dinamica, self.base_2m_dinamica, self.base_3m_dinamica = estado['bases_dinamicas']
+        self.base_1m_definida, self.base_2m_definida, self.base_3m_definida = estado['bases_definidas']
+        self.fase_chuva = estado['fase_chuva']
+        self.pico_chuva_ciclo = estado['pico_chuva_ciclo']
+        self.precipitacao_acumulada = estado['precipitacao_acumulada']
+        self.rng.bit_generator.state = estado['rng']
+        self.janela_72h = deque()
+        self.chuva_72h_centesimos = 0
+        self.ultimo_timestamp = None
+        if estado['ultimo_timestamp_ns'] is None:
+            return
+        self.ultimo_timestamp = EPOCH_UTC + datetime.timedelta(microseconds=estado['ultimo_timestamp_ns'] // 1000)
+        limite_ns = estado['ultimo_timestamp_ns'] - (JANELA_CHUVA_72H // datetime.timedelta(microseconds=1)) * 1000
+        for ts_ns, chuva in zip(timestamps_ns, chuva_mm):
+            if limite_ns <= ts_ns <= estado['ultimo_timestamp_ns']:
+                ts = EPOCH_UTC + datetime.timedelta(microseconds=int(ts_ns) // 1000)
+                self._registrar_chuva(ts, float(chuva))
+
+    def gerar_novo_dado(self, timestamp_utc):
+        chuva_mm_neste_passo = self._simular_chuva(timestamp_utc);
         self.simulation_cycle_index += 1
         ts_str = timestamp_utc.isoformat().replace('+00:00', 'Z')
-        novo_dado_chuva = {"timestamp": ts_str, "pluviometria_mm": round(chuva_mm_neste_passo, 2)}
-        history_data_para_umidade = history_data + [novo_dado_chuva]
-        self._simular_umidade(history_data_para_umidade, timestamp_utc, chuva_mm_neste_passo)
-        novo_acumulado = 0.0
-        if history_data:
-            try:
-                prev_accum = history_data[-1].get('precipitacao_acumulada_mm', 0.0)
-                novo_acumulado = prev_accum + chuva_mm_neste_passo
-            except (IndexError, AttributeError, KeyError):
-                novo_acumulado = chuva_mm_neste_passo
-        else:
-            novo_acumulado = chuva_mm_neste_passo
-        return {"timestamp": ts_str, "pluviometria_mm": round(chuva_mm_neste_passo, 2),
-                "precipitacao_acumulada_mm": round(novo_acumulado, 2),
-                "umidade_1m_perc": round(self.umidade_1m, 2), "umidade_2m_perc": round(self.umidade_2m, 2),
-                "umidade_3m_perc": round(self.umidade_3m, 2),
-                "base_1m": round(self.base_1m_dinamica, 2),
-                "base_2m": round(self.base_2m_dinamica, 2),
-                "base_3m": round(self.base_3m_dinamica, 2)}
+        # A leitura atual entra na janela antes do cálculo de umidade (mesma regra do histórico anterior)
+        self._registrar_chuva(timestamp_utc, round(chuva_mm_neste_passo, 2))
+        self._simular_umidade(timestamp_utc, chuva_mm_neste_passo)
+        novo_acumulado = self.precipitacao_acumulada + chuva_mm_neste_passo
+        # np.round (e não round) para gerar exatamente os mesmos valores do SimuladorLote
+        self.precipitacao_acumulada = _arredondar_2(novo_acumulado)
+        self.ultimo_timestamp = timestamp_utc
+        return {"timestamp": ts_str, "pluviometria_mm": _arredondar_2(chuva_mm_neste_passo),
+                "precipitacao_acumulada_mm": self.precipitacao_acumulada,
+                "umidade_1m_perc": _arredondar_2(self.umidade_1m), "umidade_2m_perc": _arredondar_2(self.umidade_2m),
+                "umidade_3m_perc": _arredondar_2(self.umidade_3m),
+                "base_1m": _arredondar_2(self.base_1m_dinamica),
+                "base_2m": _arredondar_2(self.base_2m_dinamica),
+                "base_3m": _arredondar_2(self.base_3m_dinamica)}
+
+
+# ==============================================================================
+# --- CLASSE SimuladorLote (N pontos x K passos em NumPy) ---
+# ==============================================================================
+def _interp_lote(x, xa, xb, fa, fb):
+    """ np.interp(x, [xa, xb], [fa, fb]) elemento a elemento, com 'fa'/'fb' por ponto (mesma aritmética). """
+    inclinacao = (fb - fa) / (xb - xa)
+    valor = inclinacao * (x - xa) + fa
+    return np.where(x <= xa, fa, np.where(x >= xb, fb, valor))
+
+
+class SimuladorLote:
+    """
+    Motor vetorizado: mantém o estado de todos os simuladores em arrays e avança
+    N pontos x K passos juntos (fases subindo/descendo, rampas np.interp e
+    reancoragem das bases). Para a mesma semente, gera exatamente as mesmas
+    leituras que SensorSimulator.gerar_novo_dado. Todos os pontos andam em
+    sincronia (mesmo timestamp a cada passo).
+    """
+
+    def __init__(self, simuladores, timestamp_inicial=None):
+        self.simuladores = list(simuladores)
+        n = len(self.simuladores)
+        ultimos = {sim.ultimo_timestamp for sim in self.simuladores}
+        if len(ultimos) > 1:
+            raise ValueError("SimuladorLote exige simuladores sincronizados (mesmo último timestamp).")
+        ultimo = ultimos.pop() if ultimos else None
+        if ultimo is None and timestamp_inicial is None:
+            raise ValueError("Simuladores sem histórico: informe 'timestamp_inicial'.")
+        self.proximo_timestamp = ultimo + FREQUENCIA_SIMULACAO if ultimo is not None else timestamp_inicial
+        self.passo_ns = int(FREQUENCIA_SIMULACAO.total_seconds() * 1e9)
+        self.tamanho_janela = int(JANELA_CHUVA_72H / FREQUENCIA_SIMULACAO)
+
+        def constante(chave, padrao=None):
+            padrao = CONSTANTES_PADRAO.get(chave, padrao)
+            return np.array([sim.c.get(chave, padrao) for sim in self.simuladores], dtype=float)
+
+        self.base = np.stack([constante('UMIDADE_BASE_1M'), constante('UMIDADE_BASE_2M'),
+                              constante('UMIDADE_BASE_3M')], axis=1)
+        self.saturacao = np.stack([constante('UMIDADE_SATURACAO_1M'), constante('UMIDADE_SATURACAO_2M'),
+                                   constante('UMIDADE_SATURACAO_3M')], axis=1)
+        self.limite_72h = constante('LIMITE_CHUVA_72H', 200.0)
+
+        comprimento_max = max([len(sim.rain_script) for sim in self.simuladores] + [1])
+        self.scripts = np.zeros((n, comprimento_max))
+        self.comprimentos = np.zeros(n, dtype=np.int64)
+        for i, sim in enumerate(self.simuladores):
+            self.comprimentos[i] = len(sim.rain_script)
+            self.scripts[i, :len(sim.rain_script)] = np.round(np.asarray(sim.rain_script, dtype=float), 2)
+
+        self.ciclo = np.array([sim.simulation_cycle_index for sim in self.simuladores], dtype=np.int64)
+        self.umidade = np.array([[sim.umidade_1m, sim.umidade_2m, sim.umidade_3m] for sim in self.simuladores],
+                                dtype=float).reshape(n, 3)
+        self.base_dinamica = np.array([[sim.base_1m_dinamica, sim.base_2m_dinamica, sim.base_3m_dinamica]
+                                       for sim in self.simuladores], dtype=float).reshape(n, 3)
+        self.base_definida = np.array([sim.base_1m_definida for sim in self.simuladores], dtype=bool)
+        self.subindo = np.array([sim.fase_chuva == 'subindo' for sim in self.simuladores], dtype=bool)
+        self.pico = np.array([sim.pico_chuva_ciclo for sim in self.simuladores], dtype=float)
+        self.acumulado = np.array([sim.precipitacao_acumulada for sim in self.simuladores], dtype=float)
+
+        # Janela 72h: as últimas 'tamanho_janela' chuvas (centésimos), posição 'cursor_janela' = mais antiga
+        self.janela = np.zeros((n, self.tamanho_janela), dtype=np.int64)
+        self.cursor_janela = 0
+        if ultimo is not None:
+            limite = ultimo - JANELA_CHUVA_72H
+            for i, sim in enumerate(self.simuladores):
+                recentes = [centesimos for ts, centesimos in sim.janela_72h if ts > limite][-self.tamanho_janela:]
+                if recentes:
+                    self.janela[i, self.tamanho_janela - len(recentes):] = recentes
+        self.soma_janela = self.janela.sum(axis=1)
+
+    def _subida(self, total):
+        base, sat = self.base, self.saturacao
+        u1 = np.where(total <= RISE_S1_END,
+                      _interp_lote(total, RISE_S1_START, RISE_S1_END, base[:, 0], sat[:, 0]), sat[:, 0])
+        u2 = np.where(total < RISE_S2_START, base[:, 1],
+                      np.where(total <= RISE_S2_END,
+                               _interp_lote(total, RISE_S2_START, RISE_S2_END, base[:, 1], sat[:, 1]), sat[:, 1]))
+        u3 = np.where(total < RISE_S3_START, base[:, 2],
+                      np.where(total <= RISE_S3_END,
+                               _interp_lote(total, RISE_S3_START, RISE_S3_END, base[:, 2], sat[:, 2]), sat[:, 2]))
+        return np.stack([u1, u2, u3], axis=1)
+
+    def _descida(self, total):
+        base, sat = self.base, self.saturacao
+        colunas = []
+        for k, fim in enumerate((FALL_END_1M, FALL_END_2M, FALL_END_3M)):
+            colunas.append(np.where(total >= fim,
+                                    _interp_lote(total, fim, FALL_START_ALL, base[:, k], sat[:, k]), base[:, k]))
+        return np.stack(colunas, axis=1)
+
+    def _passo(self, timestamp):
+        n = len(self.simuladores)
+
+        # --- Chuva (SensorSimulator._simular_chuva) ---
+        total_anterior = self.soma_janela / 100.0
+        seguranca = total_anterior >= self.limite_72h
+        self.pico[seguranca] = 0.0
+        self.subindo[seguranca] = True
+        com_script = self.comprimentos > 0
+        indices = np.where(com_script, self.ciclo % np.maximum(self.comprimentos, 1), 0)
+        chuva = np.where(seguranca | ~com_script, 0.0, self.scripts[np.arange(n), indices])
+        self.ciclo += 1
+        chuva_centesimos = np.rint(chuva * 100).astype(np.int64)
+
+        # --- Umidade (SensorSimulator._simular_umidade), janela já com a leitura atual ---
+        total = np.clip((self.soma_janela + chuva_centesimos) / 100.0, 0.0, FALL_START_ALL)
+        self.soma_janela += chuva_centesimos - self.janela[:, self.cursor_janela]
+        self.janela[:, self.cursor_janela] = chuva_centesimos
+        self.cursor_janela = (self.cursor_janela + 1) % self.tamanho_janela
+
+        definida = self.base_definida
+        umidade_calc = self.umidade.copy()
+        subida = self._subida(total)
+
+        # Pontos com base já definida: controle de fase pelo pico do ciclo
+        if definida.any():
+            sobe = definida & (total > self.pico - 0.1)
+            desce = definida & ~sobe & (total < self.pico - 0.5)
+            self.pico = np.where(sobe, np.maximum(self.pico, total), self.pico)
+            self.subindo = np.where(sobe, True, np.where(desce, False, self.subindo))
+            abaixo_gatilho = definida & (total < GATILHO_CHUVA_BASE_MM)
+            self.pico = np.where(abaixo_gatilho, total, self.pico)
+            self.subindo = self.subindo | abaixo_gatilho
+            descida = self._descida(total)
+            umidade_calc = np.where(definida[:, None],
+                                    np.where(self.subindo[:, None], subida, descida), umidade_calc)
+
+        # Pontos ainda sem base: seco, ruído em torno da base ou gatilho de definição da base
+        indefinida = ~definida
+        if indefinida.any():
+            zerado = indefinida & (total == 0.0)
+            ruido = indefinida & ~zerado & (total < GATILHO_CHUVA_BASE_MM)
+            gatilho = indefinida & ~zerado & ~ruido
+            umidade_calc[zerado] = 0.0
+            for i in np.flatnonzero(ruido):
+                umidade_calc[i] = self.base[i] + self.simuladores[i].rng.uniform(-0.3, 0.3, 3)
+            self.pico = np.where(zerado, 0.0, np.where(ruido, total, self.pico))
+            self.base_dinamica[gatilho] = self.umidade[gatilho]
+            for i in np.flatnonzero(gatilho):
+                for j, sufixo in enumerate(('1m', '2m', '3m')):
+                    print(f"[{timestamp.strftime('%H:%M')}] ALERTA BASE {sufixo} (Gatilho {GATILHO_CHUVA_BASE_MM}mm): Nova base definida em {self.base_dinamica[i, j]:.1f}% (Chuva: {total[i]:.1f}mm)")
+            self.base_definida = definida | gatilho
+            self.pico = np.where(gatilho, np.maximum(self.pico, total), self.pico)
+            self.subindo = self.subindo | zerado | ruido | gatilho
+            umidade_calc = np.where(gatilho[:, None], subida, umidade_calc)
+
+        # Reancoragem da base quando o valor cai abaixo dela e limites (base/saturação)
+        definida = self.base_definida[:, None]
+        reancorar = definida & (umidade_calc < self.base_dinamica) & (umidade_calc > 1.0)
+        for i, j in zip(*np.nonzero(reancorar)):
+            print(f"[{timestamp.strftime('%H:%M')}] ALERTA BASE {('1m', '2m', '3m')[j]}: Valor ({umidade_calc[i, j]:.1f}%) baixou da base ({self.base_dinamica[i, j]:.1f}%). Nova base definida.")
+        self.base_dinamica = np.where(reancorar, umidade_calc, self.base_dinamica)
+        limitada = np.minimum(umidade_calc, self.saturacao)
+        self.umidade = np.where(definida, np.maximum(self.base_dinamica, limitada), np.maximum(0.0, limitada))
+
+        self.acumulado = np.round(self.acumulado + chuva, 2)
+        return chuva
+
+    def avancar(self, n_passos):
+        """
+        Avança 'n_passos' passos para todos os pontos. Retorna (timestamps_ns [K], colunas),
+        onde 'colunas' mapeia cada nome de COLUNAS_HISTORICO para um array [K, N].
+        """
+        n = len(self.simuladores)
+        timestamps_ns = _para_epoch_ns(self.proximo_timestamp) + self.passo_ns * np.arange(n_passos, dtype=np.int64)
+        colunas = {nome: np.empty((n_passos, n)) for nome in COLUNAS_HISTORICO}
+        for k in range(n_passos):
+            colunas['chuva_mm'][k] = self._passo(self.proximo_timestamp + FREQUENCIA_SIMULACAO * k)
+            colunas['precipitacao_acumulada_mm'][k] = self.acumulado
+            for j, sufixo in enumerate(('1m', '2m', '3m')):
+                colunas[f'umidade_{sufixo}_perc'][k] = self.umidade[:, j]
+                colunas[f'base_{sufixo}'][k] = self.base_dinamica[:, j]
+        for nome in COLUNAS_HISTORICO:
+            if nome != 'precipitacao_acumulada_mm':
+                colunas[nome] = np.round(colunas[nome], 2)
+        self.proximo_timestamp += FREQUENCIA_SIMULACAO * n_passos
+        return timestamps_ns, colunas
+
+    def para_simuladores(self):
+        """ Copia o estado dos arrays de volta para os SensorSimulator (para seguir passo a passo). """
+        ultimo = self.proximo_timestamp - FREQUENCIA_SIMULACAO
+        ordem = [(self.cursor_janela + j) % self.tamanho_janela for j in range(self.tamanho_janela)]
+        timestamps_janela = [ultimo - FREQUENCIA_SIMULACAO * (self.tamanho_janela - 1 - j)
+                             for j in range(self.tamanho_janela)]
+        for i, sim in enumerate(self.simuladores):
+            sim.simulation_cycle_index = int(self.ciclo[i])
+            sim.umidade_1m, sim.umidade_2m, sim.umidade_3m = (float(v) for v in self.umidade[i])
+            sim.base_1m_dinamica, sim.base_2m_dinamica, sim.base_3m_dinamica = (float(v) for v in self.base_dinamica[i])
+            sim.base_1m_definida = sim.base_2m_definida = sim.base_3m_definida = bool(self.base_definida[i])
+            sim.fase_chuva = 'subindo' if self.subindo[i] else 'descendo'
+            sim.pico_chuva_ciclo = float(self.pico[i])
+            sim.precipitacao_acumulada = float(self.acumulado[i])
+            sim.ultimo_timestamp = ultimo
+            sim.janela_72h = deque((ts, int(self.janela[i, j])) for ts, j in zip(timestamps_janela, ordem))
+            sim.chuva_72h_centesimos = int(self.soma_janela[i])
 
 
 # ============================================================================
 # --- GERENCIAMENTO DE MÚLTIPLOS PONTOS ---
 # ============================================================================
-def _inicializar_simuladores():
-    # --- Modificado para incluir a variável de estado global ---
-    global DADOS_HISTORICOS_GLOBAIS, SIMULADORES_GLOBAIS, STATUS_ATUAL_ALERTAS
+def criar_simulador(constantes, semente=None):
+    """ Cria um SensorSimulator com seu script de chuva cíclico (72h chuva + 72h seca). """
+    PONTOS_POR_HORA = int(60 / (FREQUENCIA_SIMULACAO.total_seconds() / 60))
+    simulador = SensorSimulator(constantes, semente=semente)
+    simulador.rain_script = _gerar_script_de_chuva_ciclico(
+        total_chuva_mm=120.0, horas_chuva=72, horas_seca=72,
+        pontos_por_hora=PONTOS_POR_HORA, num_eventos_chuva=100, rng=simulador.rng
+    )
+    simulador.simulation_cycle_index = 0
+    return simulador
+
 
+def _criar_simuladores_zerados():
+    """ Simuladores novos, históricos vazios e status "INDEFINIDO" para todos os pontos. """
+    # --- Limpa o estado ao reiniciar ---
     SIMULADORES_GLOBAIS.clear()
     DADOS_HISTORICOS_GLOBAIS.clear()
-    # --- Limpa o estado ao reiniciar ---
     STATUS_ATUAL_ALERTAS.clear()
 
+    # Uma semente independente por ponto (derivada de SIMULACAO_SEMENTE, se definida)
+    sementes = np.random.SeedSequence(SIMULACAO_SEMENTE).spawn(len(PONTOS_DE_ANALISE))
+    for (id_ponto, config), semente in zip(PONTOS_DE_ANALISE.items(), sementes):
+        print(f"  - Inicializando {id_ponto} ({config['nome']})...")
+        SIMULADORES_GLOBAIS[id_ponto] = criar_simulador(config.get('constantes', CONSTANTES_PADRAO.copy()), semente)
+        DADOS_HISTORICOS_GLOBAIS[id_ponto] = HistoricoCircular(MAX_HISTORY_POINTS)
+
+        # --- Inicializa o estado de alerta ---
+        STATUS_ATUAL_ALERTAS[id_ponto] = "INDEFINIDO"
+
+
+def _inicializar_simuladores():
     print("Inicializando simuladores ('real-time')...")
     agora_utc = datetime.datetime.now(datetime.timezone.utc)
     minutos_truncados = floor(agora_utc.minute / 10) * 10
     timestamp_inicial = agora_utc.replace(minute=minutos_truncados, second=0, microsecond=0)
-    PONTOS_POR_HORA = int(60 / (FREQUENCIA_SIMULACAO.total_seconds() / 60))
-    for id_ponto, config in PONTOS_DE_ANALISE.items():
-        print(f"  - Inicializando {id_ponto} ({config['nome']})...")
-        simulador = SensorSimulator(config.get('constantes', CONSTANTES_PADRAO.copy()))
-        simulador.rain_script = _gerar_script_de_chuva_ciclico(
-            total_chuva_mm=120.0, horas_chuva=72, horas_seca=72,
-            pontos_por_hora=PONTOS_POR_HORA, num_eventos_chuva=100
-        )
-        simulador.simulation_cycle_index = 0
-        SIMULADORES_GLOBAIS[id_ponto] = simulador
-        primeiro_dado = simulador.gerar_novo_dado(timestamp_inicial, [])
-        DADOS_HISTORICOS_GLOBAIS[id_ponto] = [primeiro_dado]
+    _criar_simuladores_zerados()
 
-        # --- Inicializa o estado de alerta ---
-        STATUS_ATUAL_ALERTAS[id_ponto] = "INDEFINIDO"
+    # Pontos já gravados em disco voltam de onde pararam; os demais começam do zero
+    restaurados = _restaurar_do_armazenamento()
+    novos = [id_ponto for id_ponto in SIMULADORES_GLOBAIS if id_ponto not in restaurados]
+    if novos:
+        if restaurados:
+            # Os novos pontos começam no mesmo instante simulado dos restaurados
+            timestamp_inicial = max(SIMULADORES_GLOBAIS[id_ponto].ultimo_timestamp for id_ponto in restaurados)
+        if SIMULACAO_BACKFILL:
+            _preencher_historico(timestamp_inicial, novos)
+        else:
+            for id_ponto in novos:
+                primeiro_dado = SIMULADORES_GLOBAIS[id_ponto].gerar_novo_dado(timestamp_inicial)
+                DADOS_HISTORICOS_GLOBAIS[id_ponto].adicionar(timestamp_inicial, primeiro_dado)
+        if _ARMAZENAMENTO is not None:
+            try:
+                for id_ponto in novos:
+                    simulador = SIMULADORES_GLOBAIS[id_ponto]
+                    _ARMAZENAMENTO.registrar_simulador(id_ponto, simulador.rain_script, simulador.exportar_estado())
+                _ARMAZENAMENTO.gravar_lote({id_ponto: DADOS_HISTORICOS_GLOBAIS[id_ponto].ultimas_leituras(MAX_HISTORY_POINTS)
+                                            for id_ponto in novos})
+            except Exception as e:
+                print(f"AVISO: Falha ao gravar o histórico inicial no armazenamento. Erro: {e}")
 
     print("Simuladores inicializados com scripts de chuva cíclicos (72h chuva + 72h seca).")
 
 
-def get_dados_reais_zentra(): print("CHAMANDO API..."); raise NotImplementedError("API não conectada")
+def _preencher_historico(timestamp_final, ids_pontos=None):
+    """
+    Backfill: gera de uma vez MAX_HISTORY_POINTS leituras por ponto, terminando em
+    'timestamp_final', com o SimuladorLote (vetorizado). Depois devolve o estado aos
+    simuladores, que seguem passo a passo a partir daí.
+    """
+    inicio = time.perf_counter()
+    timestamp_inicial = timestamp_final - FREQUENCIA_SIMULACAO * (MAX_HISTORY_POINTS - 1)
+    ids_pontos = list(ids_pontos if ids_pontos is not None else SIMULADORES_GLOBAIS.keys())
+    lote = SimuladorLote([SIMULADORES_GLOBAIS[id_ponto] for id_ponto in ids_pontos], timestamp_inicial=timestamp_inicial)
+    timestamps_ns, colunas = lote.avancar(MAX_HISTORY_POINTS)
+    lote.para_simuladores()
+    for i, id_ponto in enumerate(ids_pontos):
+        DADOS_HISTORICOS_GLOBAIS[id_ponto].adicionar_lote(
+            timestamps_ns, {nome: valores[:, i] for nome, valores in colunas.items()})
+    duracao = time.perf_counter() - inicio
+    print(f"Backfill: {MAX_HISTORY_POINTS} pontos x {len(ids_pontos)} estações em {duracao:.2f}s.")
+    if duracao > ORCAMENTO_BACKFILL_S:
+        print(f"AVISO: backfill acima do orçamento de inicialização ({duracao:.2f}s > {ORCAMENTO_BACKFILL_S:.2f}s).")
+    return duracao
 
 
-def get_dados_simulados():
-    global DADOS_HISTORICOS_GLOBAIS, SIMULADORES_GLOBAIS
-    if not SIMULADORES_GLOBAIS:
-        _inicializar_simuladores()
-    dfs_de_todos_os_pontos = [];
+def _abrir_armazenamento():
+    """ Abre o banco SQLite (uma vez). Se falhar, o app segue só em memória. """
+    global _ARMAZENAMENTO
+    if _ARMAZENAMENTO is None and ARMAZENAMENTO_PERSISTENTE:
+        try:
+            _ARMAZENAMENTO = armazenamento.ArmazenamentoSQLite(CAMINHO_BANCO_DADOS, COLUNAS_HISTORICO.keys())
+            print(f"Armazenamento persistente: {CAMINHO_BANCO_DADOS}")
+        except Exception as e:
+            print(f"AVISO: Armazenamento persistente indisponível ({e}). Dados apenas em memória.")
+    return _ARMAZENAMENTO
+
+
+def verificar_armazenamento_compartilhado():
+    """
+    (disponível, motivo) do armazenamento pelo qual os workers do gunicorn compartilham o
+    estado (SQLite + eleição do escritor). Usa uma conexão própria, fechada ao sair: pode
+    ser chamada no processo mestre, antes do fork dos workers.
+    """
+    if not ARMAZENAMENTO_PERSISTENTE:
+        return False, "ARMAZENAMENTO_PERSISTENTE desligado"
+    if fcntl is None:
+        return False, "fcntl indisponível para eleger o processo escritor"
+    try:
+        armazenamento.ArmazenamentoSQLite(CAMINHO_BANCO_DADOS, COLUNAS_HISTORICO.keys()).fechar()
+    except Exception as e:
+        return False, f"banco {CAMINHO_BANCO_DADOS} não abre: {e}"
+    return True, ""
+
+
+def _restaurar_do_armazenamento():
+    """
+    Recarrega do disco, em bloco, a janela de retenção (MAX_HISTORY_POINTS por ponto), o estado
+    dos simuladores e o último status de alerta. Retorna os ids dos pontos restaurados.
+    """
+    banco = _abrir_armazenamento()
+    if banco is None:
+        return []
+    inicio = time.perf_counter()
+    restaurados = []
+    try:
+        simuladores_gravados = banco.carregar_simuladores()
+        for id_ponto, simulador in SIMULADORES_GLOBAIS.items():
+            if id_ponto not in simuladores_gravados:
+                continue
+            script_chuva, estado = simuladores_gravados[id_ponto]
+            timestamps_ns, colunas = banco.carregar_leituras(id_ponto, MAX_HISTORY_POINTS)
+            if len(timestamps_ns) == 0 or estado.get('ultimo_timestamp_ns') is None:
+                continue
+            simulador.rain_script = script_chuva
+            simulador.restaurar_estado(estado, timestamps_ns, colunas['chuva_mm'])
+            DADOS_HISTORICOS_GLOBAIS[id_ponto].adicionar_lote(timestamps_ns, colunas)
+            restaurados.append(id_ponto)
+        for id_ponto, status in banco.carregar_status_alertas().items():
+            if id_ponto in STATUS_ATUAL_ALERTAS:
+                STATUS_ATUAL_ALERTAS[id_ponto] = status
+        _podar_armazenamento()
+    except Exception as e:
+        # Nada do que já foi restaurado fica: o backfill parte de simuladores todos zerados
+        # (e sincronizados), como numa primeira inicialização
+        print(f"AVISO: Falha ao restaurar o armazenamento persistente. Erro: {e}")
+        _criar_simuladores_zerados()
+        return []
+    if restaurados:
+        print(f"Restaurados do disco: {len(restaurados)} pontos em {time.perf_counter() - inicio:.2f}s.")
+    return restaurados
+
+
+def _podar_armazenamento():
+    """ Descarta do disco as leituras que já saíram do buffer em memória (só o escritor poda). """
+    limites = {}
+    for id_ponto, historico in DADOS_HISTORICOS_GLOBAIS.items():
+        timestamps_ns = historico.timestamps_validos_ns()
+        if len(timestamps_ns) == MAX_HISTORY_POINTS:
+            limites[id_ponto] = timestamps_ns[0]
+    if limites:
+        _ARMAZENAMENTO.podar(limites)
+
+
+def _persistir_novas_leituras(n_passos):
+    """ Acrescenta ao disco, numa transação, as últimas 'n_passos' leituras e o estado de cada ponto. """
+    global _LOTES_DESDE_PODA
+    if _ARMAZENAMENTO is None or n_passos <= 0:
+        return None
+    try:
+        versao = _ARMAZENAMENTO.gravar_lote(
+            {id_ponto: historico.ultimas_leituras(n_passos) for id_ponto, historico in DADOS_HISTORICOS_GLOBAIS.items()},
+            {id_ponto: simulador.exportar_estado() for id_ponto, simulador in SIMULADORES_GLOBAIS.items()})
+        _LOTES_DESDE_PODA += 1
+        if _LOTES_DESDE_PODA >= PODA_A_CADA_N_LOTES:
+            _LOTES_DESDE_PODA = 0
+            _podar_armazenamento()
+        return versao
+    except Exception as e:
+        print(f"AVISO: Falha ao gravar leituras no armazenamento. Erro: {e}")
+        return None
+
+
+def registrar_status_alerta(id_ponto, status_antigo, status_novo, timestamp_dados_ns=None):
+    """
+    Registra a transição status_antigo -> status_novo em STATUS_ATUAL_ALERTAS e no disco.
+    Com armazenamento, a troca é atômica entre processos: retorna False (e atualiza o
+    dicionário local com o status gravado) se outro worker já registrou a transição ou
+    se 'timestamp_dados_ns' for mais antigo que os dados da última transição. Só quem
+    recebe True deve disparar o alerta. Se o banco falhar, retorna False sem mudar o status
+    local: nenhum worker assume a transição, que é tentada de novo no próximo ciclo.
+    """
+    if _ARMAZENAMENTO is None:
+        STATUS_ATUAL_ALERTAS[id_ponto] = status_novo
+        return True
+    try:
+        trocou, status_atual = _ARMAZENAMENTO.trocar_status(id_ponto, status_antigo, status_novo, timestamp_dados_ns)
+    except Exception as e:
+        print(f"AVISO: Falha ao gravar o status de {id_ponto} ({status_antigo} -> {status_novo}); "
+              f"alerta adiado até o armazenamento responder. Erro: {e}")
+        return False
+    STATUS_ATUAL_ALERTAS[id_ponto] = status_atual
+    return trocou
+
+
+def _atualizar_status_do_armazenamento():
+    """ Traz para o dicionário local os status gravados por qualquer processo. """
+    for id_ponto, status in _ARMAZENAMENTO.carregar_status_alertas().items():
+        if id_ponto in PONTOS_DE_ANALISE:
+            STATUS_ATUAL_ALERTAS[id_ponto] = status
+
+
+def _tentar_lideranca():
+    """
+    Tenta se tornar o processo escritor (lock exclusivo, não bloqueante, no arquivo
+    CAMINHO_BANCO_DADOS + '.lider'). O lock dura enquanto o processo viver; se o
+    escritor morrer, o sistema operacional o libera e um leitor assume.
+    """
+    global _ARQUIVO_LIDER
+    if _ARQUIVO_LIDER is not None:
+        return True
+    if fcntl is None:
+        print("AVISO: fcntl indisponível; este processo assume que é o único worker.")
+        _ARQUIVO_LIDER = True
+        return True
+    arquivo = open(CAMINHO_BANCO_DADOS + '.lider', 'a+')
+    try:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo.close()
+        return False
+    arquivo.seek(0)
+    arquivo.truncate()
+    arquivo.write(str(os.getpid()))
+    arquivo.flush()
+    _ARQUIVO_LIDER = arquivo
+    return True
+
+
+def _sincronizar_do_armazenamento():
+    """
+    Processo leitor: acrescenta aos buffers as leituras gravadas pelo escritor desde a
+    última sincronização e publica um snapshot com a mesma versão do banco.
+    Chamar sob _LOCK_SIMULACAO.
+    """
+    _atualizar_status_do_armazenamento()
+    if _SNAPSHOT_ATUAL is not None and _ARMAZENAMENTO.versao_dados() == _SNAPSHOT_ATUAL.versao:
+        return
+    historicos = {id_ponto: DADOS_HISTORICOS_GLOBAIS.setdefault(id_ponto, HistoricoCircular(MAX_HISTORY_POINTS))
+                  for id_ponto in PONTOS_DE_ANALISE}
+    # Versão e leituras de todos os pontos na mesma transação: o snapshot publicado com a
+    # versão N tem exatamente as linhas da versão N, igual em todos os workers
+    versao, leituras = _ARMAZENAMENTO.carregar_desde(
+        {id_ponto: historico.ultimo_timestamp_ns() for id_ponto, historico in historicos.items()}, MAX_HISTORY_POINTS)
+    for id_ponto, (timestamps_ns, colunas) in leituras.items():
+        historicos[id_ponto].adicionar_lote(timestamps_ns, colunas)
+    _publicar_snapshot(versao)
+
+
+def _dispositivos_zentra():
+    """
+    {id_ponto: número de série do logger}: 'zentra_device_sn' em PONTOS_DE_ANALISE, ou a
+    variável ZENTRA_DISPOSITIVOS no formato "Ponto-A-KM67=z6-00001,Ponto-B-KM72=z6-00002".
+    """
+    dispositivos = {id_ponto: config['zentra_device_sn'] for id_ponto, config in PONTOS_DE_ANALISE.items()
+                    if config.get('zentra_device_sn')}
+    for par in os.environ.get('ZENTRA_DISPOSITIVOS', '').split(','):
+        if '=' in par:
+            id_ponto, numero_serie = (parte.strip() for parte in par.split('=', 1))
+            if id_ponto in PONTOS_DE_ANALISE:
+                dispositivos[id_ponto] = numero_serie
+    return dispositivos
+
+
+def _inicializar_ingestao_real():
+    """
+    Prepara a coleta no ZENTRA: buffers vazios (ou restaurados do disco) e o cursor de cada
+    estação na última leitura conhecida. Sem histórico, a primeira coleta busca até
+    MAX_HISTORY_POINTS passos para trás.
+    """
+    global _CLIENTE_ZENTRA
+    DADOS_HISTORICOS_GLOBAIS.clear()
+    STATUS_ATUAL_ALERTAS.clear()
+    dispositivos = _dispositivos_zentra()
+    print(f"Inicializando coleta ZENTRA para {len(dispositivos)} de {len(PONTOS_DE_ANALISE)} pontos...")
+    for id_ponto in PONTOS_DE_ANALISE:
+        DADOS_HISTORICOS_GLOBAIS[id_ponto] = HistoricoCircular(MAX_HISTORY_POINTS)
+        STATUS_ATUAL_ALERTAS[id_ponto] = "INDEFINIDO"
+        if id_ponto not in dispositivos:
+            print(f"AVISO: {id_ponto} sem número de série ZENTRA; ponto ficará sem dados.")
+    banco = _abrir_armazenamento()
+    if banco is not None:
+        try:
+            for id_ponto, historico in DADOS_HISTORICOS_GLOBAIS.items():
+                historico.adicionar_lote(*banco.carregar_leituras(id_ponto, MAX_HISTORY_POINTS))
+            _atualizar_status_do_armazenamento()
+        except Exception as e:
+            print(f"AVISO: Falha ao restaurar o armazenamento persistente. Erro: {e}")
+    if _CLIENTE_ZENTRA is None:
+        _CLIENTE_ZENTRA = zentra.ClienteZentra(dispositivos)
+    inicio_padrao_ns = _para_epoch_ns(datetime.datetime.now(datetime.timezone.utc) - FREQUENCIA_SIMULACAO * MAX_HISTORY_POINTS)
+    for id_ponto in dispositivos:
+        ultimo_ns = DADOS_HISTORICOS_GLOBAIS[id_ponto].ultimo_timestamp_ns()
+        _CLIENTE_ZENTRA.cursores_ns[id_ponto] = ultimo_ns if ultimo_ns is not None else inicio_padrao_ns
+
+
+def _ingerir_leituras_reais():
+    """
+    Uma rodada de coleta: busca em paralelo as leituras novas de todas as estações e as grava
+    (ver _gravar_leituras_reais). Retorna (total de leituras novas, {id_ponto: erro}).
+    """
+    global _ULTIMA_COLETA_EM
+    with _LOCK_COLETA:
+        _ULTIMA_COLETA_EM = time.monotonic()
+        novas, falhas = _CLIENTE_ZENTRA.coletar()  # Rede fora do _LOCK_SIMULACAO: os callbacks seguem atendidos
+        for id_ponto, erro in falhas.items():
+            print(f"AVISO: Coleta ZENTRA falhou para {id_ponto} ({type(erro).__name__}: {erro}). Tentará de novo.")
+        with _LOCK_SIMULACAO:
+            return _gravar_leituras_reais(novas), falhas
+
+
+def _gravar_leituras_reais(novas):
+    """
+    Acrescenta aos buffers e ao disco as leituras coletadas, completando as colunas derivadas
+    (acumulado e bases estáticas do ponto), e publica o snapshot. Retorna o total gravado.
+    Chamar sob _LOCK_SIMULACAO.
+    """
+    leituras_por_ponto = {}
+    for id_ponto, (timestamps_ns, colunas) in novas.items():
+        historico = DADOS_HISTORICOS_GLOBAIS[id_ponto]
+        ultimo_ns = historico.ultimo_timestamp_ns()
+        if ultimo_ns is not None:
+            recentes = timestamps_ns > ultimo_ns
+            timestamps_ns = timestamps_ns[recentes]
+            colunas = {nome: valores[recentes] for nome, valores in colunas.items()}
+        if len(timestamps_ns) == 0:
+            continue
+        _, ultimas = historico.ultimas_leituras(1)
+        acumulado_anterior = float(ultimas['precipitacao_acumulada_mm'][0]) if len(historico) else 0.0
+        if np.isnan(acumulado_anterior):
+            acumulado_anterior = 0.0
+        colunas['precipitacao_acumulada_mm'] = np.round(
+            acumulado_anterior + np.cumsum(np.nan_to_num(colunas['chuva_mm'])), 2)
+        constantes = PONTOS_DE_ANALISE[id_ponto].get('constantes', CONSTANTES_PADRAO)
+        for sufixo in ('1M', '2M', '3M'):
+            base = constantes.get(f'UMIDADE_BASE_{sufixo}', CONSTANTES_PADRAO[f'UMIDADE_BASE_{sufixo}'])
+            colunas[f'base_{sufixo.lower()}'] = np.full(len(timestamps_ns), base)
+        historico.adicionar_lote(timestamps_ns, colunas)
+        leituras_por_ponto[id_ponto] = (timestamps_ns, colunas)
+    versao = None
+    if leituras_por_ponto and _ARMAZENAMENTO is not None:
+        try:
+            versao = _ARMAZENAMENTO.gravar_lote(leituras_por_ponto)
+        except Exception as e:
+            print(f"AVISO: Falha ao gravar leituras no armazenamento. Erro: {e}")
+    if leituras_por_ponto or _SNAPSHOT_ATUAL is None:
+        _publicar_snapshot(versao)
+    return sum(len(timestamps_ns) for timestamps_ns, _ in leituras_por_ponto.values())
+
+
+def _loop_coleta_zentra():
+    while True:
+        try:
+            total, falhas = _ingerir_leituras_reais()
+            if total:
+                print(f"Coleta ZENTRA: {total} leituras novas ({len(falhas)} estações com falha).")
+        except Exception as e:
+            print(f"ERRO na coleta ZENTRA: {e}")
+        # Dorme até a próxima coleta periódica ou até get_data() pedir uma revalidação
+        _EVENTO_REVALIDACAO.wait(INTERVALO_COLETA_ZENTRA_S)
+        _EVENTO_REVALIDACAO.clear()
+
+
+def _solicitar_revalidacao():
+    """ Acorda a coleta em segundo plano (não bloqueia; ignora pedidos muito próximos). """
+    if _CLIENTE_ZENTRA is None or _LOCK_COLETA.locked():
+        return
+    if _ULTIMA_COLETA_EM is None or time.monotonic() - _ULTIMA_COLETA_EM >= INTERVALO_MINIMO_REVALIDACAO_S:
+        _EVENTO_REVALIDACAO.set()
+
+
+def get_dados_reais_zentra():
+    """
+    Executa uma rodada de coleta no ZENTRA e retorna todas as leituras no mesmo formato de
+    get_dados_simulados. Levanta exceção se nenhuma estação responder.
+    """
+    print("CHAMANDO API...")
+    iniciar_motor_simulacao()
+    if _CLIENTE_ZENTRA is None:
+        # Worker leitor: a coleta é feita pelo processo escritor; aqui basta o snapshot compartilhado
+        return get_snapshot().df.copy(deep=False)
+    _, falhas = _ingerir_leituras_reais()
+    if falhas and len(falhas) == len(_CLIENTE_ZENTRA.dispositivos):
+        raise ConnectionError(f"Nenhuma estação ZENTRA respondeu: {falhas}")
+    return get_snapshot().df.copy(deep=False)
+
+
+def _avancar_simulacao(n_passos):
+    """ Avança todos os simuladores 'n_passos' passos e grava nos buffers. Chamar sob _LOCK_SIMULACAO. """
     total_novos_pontos_gerados = 0
-    ids_simuladores = list(SIMULADORES_GLOBAIS.keys())
-    for id_ponto in ids_simuladores:
+    for id_ponto in list(SIMULADORES_GLOBAIS.keys()):
         simulador = SIMULADORES_GLOBAIS.get(id_ponto)
-        if not simulador:
-            continue
         historico_ponto = DADOS_HISTORICOS_GLOBAIS.get(id_ponto)
-        if not historico_ponto:
-            print(f"AVISO: Histórico vazio para {id_ponto}, tentando reinicializar...");
-            _inicializar_simuladores();
-            historico_ponto = DADOS_HISTORICOS_GLOBAIS.get(id_ponto)
-            if not historico_ponto:
-                print(f"ERRO: Falha ao reinicializar {id_ponto}");
-                continue
-        novos_dados_nesta_rodada = []
-        historico_atualizado = list(historico_ponto)
-        for i in range(PASSOS_POR_ATUALIZACAO):
-            try:
-                ultimo_timestamp_str = historico_atualizado[-1]['timestamp']
-            except (IndexError, KeyError, ValueError) as e:
-                print(f"ERRO no passo {i + 1}: Falha ao ler último timestamp do {id_ponto}: {e}. Pulando o resto.");
+        if not simulador or historico_ponto is None:
+            continue
+        for i in range(n_passos):
+            ultimo_timestamp = simulador.ultimo_timestamp
+            if ultimo_timestamp is None:
+                print(f"ERRO no passo {i + 1}: Simulador do {id_ponto} sem último timestamp. Pulando o resto.");
                 break
-            ultimo_timestamp = datetime.datetime.fromisoformat(ultimo_timestamp_str.replace('Z', '+00:00'))
             proximo_timestamp = ultimo_timestamp + FREQUENCIA_SIMULACAO
-            novo_dado = simulador.gerar_novo_dado(proximo_timestamp, historico_atualizado)
-            novos_dados_nesta_rodada.append(novo_dado)
-            historico_atualizado.append(novo_dado)
+            novo_dado = simulador.gerar_novo_dado(proximo_timestamp)
+            historico_ponto.adicionar(proximo_timestamp, novo_dado)
             total_novos_pontos_gerados += 1
-        DADOS_HISTORICOS_GLOBAIS[id_ponto].extend(novos_dados_nesta_rodada)
-        DADOS_HISTORICOS_GLOBAIS[id_ponto] = DADOS_HISTORICOS_GLOBAIS[id_ponto][-MAX_HISTORY_POINTS:]
-        df_ponto = pd.DataFrame(DADOS_HISTORICOS_GLOBAIS[id_ponto]);
-        df_ponto['id_ponto'] = id_ponto;
-        dfs_de_todos_os_pontos.append(df_ponto)
-    if not dfs_de_todos_os_pontos:
-        colunas_finais = ['id_ponto', 'timestamp', 'chuva_mm', 'precipitacao_acumulada_mm', 'umidade_1m_perc',
-                          'umidade_2m_perc', 'umidade_3m_perc', 'base_1m', 'base_2m', 'base_3m'];
-        return pd.DataFrame(columns=colunas_finais)
-    df_final = pd.concat(dfs_de_todos_os_pontos, ignore_index=True);
-    df_final['timestamp'] = pd.to_datetime(df_final['timestamp']);
-    df_final = df_final.rename(columns={'pluviometria_mm': 'chuva_mm'})
-    colunas_finais = ['id_ponto', 'timestamp', 'chuva_mm', 'precipitacao_acumulada_mm', 'umidade_1m_perc',
-                      'umidade_2m_perc', 'umidade_3m_perc', 'base_1m', 'base_2m', 'base_3m'];
-    df_final = df_final[[col for col in colunas_finais if col in df_final.columns]];
-    return df_final
+    return total_novos_pontos_gerados
 
 
-def get_data():
-    USA_API_REAL = False
-    if USA_API_REAL:
+def _publicar_snapshot(versao=None):
+    """
+    Copia os buffers para um novo SnapshotDados. A versão é a do banco (igual em todos os
+    workers) ou, sem armazenamento, a anterior + 1. Chamar sob _LOCK_SIMULACAO.
+    """
+    global _SNAPSHOT_ATUAL
+    dfs_de_todos_os_pontos = [historico.para_dataframe(id_ponto)
+                              for id_ponto, historico in DADOS_HISTORICOS_GLOBAIS.items() if len(historico) > 0]
+    if dfs_de_todos_os_pontos:
+        df_final = pd.concat(dfs_de_todos_os_pontos, ignore_index=True)
+    else:
+        df_final = pd.DataFrame(columns=COLUNAS_FINAIS)
+    por_ponto = {}
+    timestamps_ns = {}
+    atualizado_em = {}
+    inicio = 0
+    for df_ponto in dfs_de_todos_os_pontos:
+        id_ponto = df_ponto['id_ponto'].iat[0]
+        fim = inicio + len(df_ponto)
+        por_ponto[id_ponto] = df_final.iloc[inicio:fim]
+        timestamps_ns[id_ponto] = DADOS_HISTORICOS_GLOBAIS[id_ponto].timestamps_validos_ns().copy()
+        atualizado_em[id_ponto] = DADOS_HISTORICOS_GLOBAIS[id_ponto].atualizado_em
+        inicio = fim
+    if versao is None:
+        versao = _SNAPSHOT_ATUAL.versao + 1 if _SNAPSHOT_ATUAL is not None else 1
+    _SNAPSHOT_ATUAL = SnapshotDados(versao, df_final, por_ponto, timestamps_ns, atualizado_em)
+    _SNAPSHOTS_RECENTES[versao] = _SNAPSHOT_ATUAL
+    while len(_SNAPSHOTS_RECENTES) > MAX_SNAPSHOTS_RECENTES:
+        _SNAPSHOTS_RECENTES.popitem(last=False)
+    with _CONDICAO_SNAPSHOT:
+        _CONDICAO_SNAPSHOT.notify_all()
+    return _SNAPSHOT_ATUAL
+
+
+def _loop_motor_simulacao():
+    intervalo_passo_s = FREQUENCIA_SIMULACAO.total_seconds() / FATOR_ACELERACAO_SIMULACAO
+    inicio = time.monotonic()
+    passos_executados = 0
+    while True:
+        time.sleep(max(intervalo_passo_s, INTERVALO_MINIMO_MOTOR_S))
+        passos_devidos = int((time.monotonic() - inicio) / intervalo_passo_s)
+        n_passos = passos_devidos - passos_executados
+        if n_passos <= 0:
+            continue
+        if n_passos > MAX_PASSOS_POR_CICLO:
+            print(f"AVISO: Motor de simulação atrasado {n_passos} passos; descartando o excedente.")
+            n_passos = MAX_PASSOS_POR_CICLO
+        try:
+            with _LOCK_SIMULACAO:
+                _avancar_simulacao(n_passos)
+                versao = _persistir_novas_leituras(n_passos)
+                if _ARMAZENAMENTO is not None:
+                    _atualizar_status_do_armazenamento()
+                _publicar_snapshot(versao)
+        except Exception as e:
+            print(f"ERRO no motor de simulação: {e}")
+        passos_executados = passos_devidos
+
+
+def _loop_leitor():
+    """ Worker leitor: acompanha o banco e assume a simulação se o escritor sair. """
+    while True:
+        time.sleep(INTERVALO_MINIMO_MOTOR_S)
         try:
-            return get_dados_reais_zentra()
+            if _tentar_lideranca():
+                print(f"Processo {os.getpid()} assumiu a simulação (escritor anterior saiu).")
+                with _LOCK_SIMULACAO:
+                    loop_escritor = _preparar_escritor()
+                return loop_escritor()
+            with _LOCK_SIMULACAO:
+                _sincronizar_do_armazenamento()
         except Exception as e:
-            print(f"CRÍTICO: Falha API: {e}");
-            return get_dados_simulados()
+            print(f"ERRO ao sincronizar com o armazenamento: {e}")
+
+
+def _preparar_escritor():
+    """
+    Inicializa a fonte de dados do processo escritor (coleta ZENTRA se USA_API_REAL, senão
+    os simuladores), publica o primeiro snapshot e retorna o loop a executar na thread.
+    Chamar sob _LOCK_SIMULACAO.
+    """
+    if USA_API_REAL:
+        _inicializar_ingestao_real()
+        loop_escritor = _loop_coleta_zentra
     else:
-        return get_dados_simulados()
\ No newline at end of file
+        if not SIMULADORES_GLOBAIS:
+            _inicializar_simuladores()
+        loop_escritor = _loop_motor_simulacao
+    _publicar_snapshot(_ARMAZENAMENTO.versao_dados() if _ARMAZENAMENTO is not None else None)
+    return loop_escritor
+
+
+def iniciar_motor_simulacao():
+    """
+    Inicializa os simuladores (se preciso) e inicia a thread única que avança a simulação
+    pelo relógio de parede. Idempotente: chamadas repetidas não criam outra thread.
+    Com armazenamento e vários workers, só um processo (o escritor) simula; os demais
+    apenas leem o banco.
+    """
+    global _MOTOR_THREAD
+    with _LOCK_SIMULACAO:
+        if _MOTOR_THREAD is not None:
+            return
+        if _abrir_armazenamento() is not None and not _tentar_lideranca():
+            _sincronizar_do_armazenamento()
+            _MOTOR_THREAD = threading.Thread(target=_loop_leitor, name="leitor-armazenamento", daemon=True)
+            _MOTOR_THREAD.start()
+            print(f"Worker {os.getpid()} em modo leitor (outro processo simula).")
+            return
+        loop_escritor = _preparar_escritor()
+        _MOTOR_THREAD = threading.Thread(target=loop_escritor, name="motor-simulacao", daemon=True)
+        _MOTOR_THREAD.start()
+    if USA_API_REAL:
+        print(f"Coleta ZENTRA iniciada (a cada {INTERVALO_COLETA_ZENTRA_S:g}s).")
+    else:
+        print(f"Motor de simulação iniciado (fator {FATOR_ACELERACAO_SIMULACAO:g}x).")
+
+
+def carregar_snapshot_avulso():
+    """
+    Snapshot para scripts fora do servidor (ex.: gerar_relatorios.py), sem iniciar o motor
+    nem disputar a liderança: com leituras no banco, lê a janela de retenção uma vez; sem
+    banco (ou com ele vazio), gera o histórico simulado como na primeira inicialização.
+    """
+    with _LOCK_SIMULACAO:
+        banco = _abrir_armazenamento()
+        if banco is not None and banco.versao_dados():
+            _sincronizar_do_armazenamento()
+        else:
+            if not SIMULADORES_GLOBAIS:
+                _inicializar_simuladores()
+            _publicar_snapshot(banco.versao_dados() if banco is not None else None)
+        return _SNAPSHOT_ATUAL
+
+
+def get_snapshot(versao=None):
+    """
+    SnapshotDados já processado (apenas leitura; não avança a simulação).
+    Sem 'versao' (ou se ela já saiu do cache), retorna o mais recente.
+    """
+    if _MOTOR_THREAD is None:
+        iniciar_motor_simulacao()
+    if versao is not None:
+        snapshot = _SNAPSHOTS_RECENTES.get(versao)
+        if snapshot is not None:
+            return snapshot
+    return _SNAPSHOT_ATUAL
+
+
+def get_versao_dados():
+    """ Versão do snapshot atual: muda só quando há leituras novas (barata para consultar a cada tick). """
+    return get_snapshot().versao
+
+
+def identidade_dados():
+    """
+    Origem dos dados servidos: a identidade do banco (fixa desde a criação dele) ou, sem
+    banco, a deste processo. Dados iguais em origens diferentes não são os mesmos dados.
+    """
+    if _ARMAZENAMENTO is not None:
+        return f"banco-{_ARMAZENAMENTO.identidade}"
+    return f"processo-{_IDENTIDADE_PROCESSO}"
+
+
+def aguardar_snapshot(versao_conhecida, timeout_s):
+    """
+    Bloqueia até haver um snapshot com versão diferente de 'versao_conhecida' (ou até
+    'timeout_s') e retorna o snapshot atual, novo ou não.
+    """
+    get_snapshot()  # Garante o motor iniciado (e um snapshot publicado)
+    with _CONDICAO_SNAPSHOT:
+        _CONDICAO_SNAPSHOT.wait_for(lambda: _SNAPSHOT_ATUAL.versao != versao_conhecida, timeout_s)
+    return _SNAPSHOT_ATUAL
+
+
+def get_snapshot_da_sessao(dados_sessao):
+    """ Snapshot referenciado pelo 'store-dados-sessao' ({'versao': n}) de uma sessão. """
+    versao = dados_sessao.get('versao') if isinstance(dados_sessao, dict) else None
+    return get_snapshot(versao)
+
+
+def get_dados_simulados():
+    # Cópia rasa: quem chamar pode reatribuir colunas sem afetar o snapshot compartilhado
+    return get_snapshot().df.copy(deep=False)
+
+
+def get_dados_por_ponto():
+    """ Retorna {id_ponto: DataFrame} do snapshot atual, sem avançar a simulação. """
+    return dict(get_snapshot().por_ponto)
+
+
+def get_idades_dados():
+    """ {id_ponto: segundos desde a leitura mais nova} no snapshot atual. """
+    return get_snapshot().idades_s()
+
+
+def get_data():
+    """
+    Stale-while-revalidate: retorna na hora o último snapshot bom (leitura em memória,
+    sem esperar a API). Com a fonte real, pede uma coleta em segundo plano; se a API
+    falhar, os dados anteriores continuam valendo até LIMITE_DADOS_OBSOLETOS_S.
+    """
+    snapshot = get_snapshot()
+    if USA_API_REAL:
+        _solicitar_revalidacao()
+    return snapshot.df.copy(deep=False)
\ No newline at end of file
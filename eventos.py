@@ -0,0 +1,148 @@
+# eventos.py (Canal de eventos em tempo real via Server-Sent Events)
+
+import os
+import json
+import queue
+import threading
+from flask import Response
+
+from app import server
+from data_source import PONTOS_DE_ANALISE
+import data_source
+import processamento
+
+# --- Configuração (variáveis de ambiente) ---
+# Cada conexão SSE ocupa uma thread do worker (gunicorn gthread) enquanto estiver aberta;
+# acima do limite o navegador recebe 503 e continua só com o polling do dcc.Interval.
+# O limite sai do tamanho do pool (GUNICORN_THREADS, o mesmo lido em gunicorn.conf.py) menos
+# uma reserva que nunca vai para o SSE: são as threads que atendem os callbacks do Dash, o
+# download dos PDFs e os assets. Com o pool padrão (32), metade fica para cada lado.
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 32))
+EVENTOS_THREADS_RESERVADAS = int(os.environ.get('EVENTOS_THREADS_RESERVADAS', max(8, GUNICORN_THREADS // 2)))
+EVENTOS_MAX_CONEXOES = max(0, GUNICORN_THREADS - EVENTOS_THREADS_RESERVADAS)
+INTERVALO_KEEPALIVE_S = 15.0  # Comentário SSE periódico: mantém proxies abertos e detecta quem desconectou
+RETENTATIVA_CLIENTE_MS = 5000  # 'retry' do EventSource após queda da conexão
+TAMANHO_FILA_ASSINANTE = 64
+
+
+def _formatar_evento(nome, versao, dados):
+    return f"id: {versao}\nevent: {nome}\ndata: {json.dumps(dados, separators=(',', ':'))}\n\n"
+
+
+class CanalEventos:
+    """
+    Avisa, a todas as conexões SSE deste processo, o que muda a cada snapshot publicado:
+    - 'leituras': {'versao', 'pontos': [ids dos pontos com leituras novas]};
+    - 'status': {'versao', 'pontos': {id_ponto: {'anterior', 'novo'}}}, com o status geral
+      (o pior entre chuva e umidade, o dos cards) e o de alerta (chuva, o de index.py) de
+      cada ponto em que algum dos dois mudou.
+    Os eventos não trazem os valores das leituras: o navegador só usa 'versao' e o tipo do
+    evento para disparar o callback de atualização (que busca os dados e dispara os alertas);
+    'pontos' fica para depuração e para outros consumidores do stream.
+    Os eventos são montados uma única vez por versão (numa thread própria) e copiados para
+    a fila de cada assinante, então o custo por versão não cresce com o número de sessões.
+    """
+
+    def __init__(self, max_conexoes=EVENTOS_MAX_CONEXOES):
+        self.max_conexoes = max_conexoes
+        self._assinantes = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._versao = None
+        self._ultimas_leituras = {}  # id_ponto -> timestamp_ns da última leitura avisada
+        self._status = {}  # id_ponto -> {'geral', 'alerta'} do último aviso
+
+    def assinar(self):
+        """ Fila de eventos (texto SSE) de uma nova conexão, ou None se o limite foi atingido. """
+        with self._lock:
+            if len(self._assinantes) >= self.max_conexoes:
+                return None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="canal-eventos", daemon=True)
+                self._thread.start()
+            fila = queue.Queue(maxsize=TAMANHO_FILA_ASSINANTE)
+            if self._versao is not None:
+                # Quem chega (ou reconecta) fica sabendo da versão atual
+                fila.put_nowait(_formatar_evento('leituras', self._versao,
+                                                 {'versao': self._versao, 'pontos': list(self._ultimas_leituras)}))
+            self._assinantes.add(fila)
+            return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def conexoes(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    def _loop(self):
+        while True:
+            try:
+                snapshot = data_source.aguardar_snapshot(self._versao, INTERVALO_KEEPALIVE_S)
+                if snapshot.versao == self._versao:
+                    continue
+                eventos = self._eventos_do_snapshot(snapshot)
+                with self._lock:
+                    self._versao = snapshot.versao
+                    for fila in self._assinantes:
+                        for evento in eventos:
+                            try:
+                                fila.put_nowait(evento)
+                            except queue.Full:
+                                pass  # Cliente lento: o próximo evento (ou o polling) o alcança
+            except Exception as e:
+                print(f"ERRO no canal de eventos: {e}")
+                threading.Event().wait(INTERVALO_KEEPALIVE_S)
+
+    def _eventos_do_snapshot(self, snapshot):
+        """ Textos SSE com os pontos que têm leituras novas e as mudanças de status desta versão. """
+        metricas = processamento.obter_metricas(snapshot)
+        novas, mudancas = [], {}
+        for id_ponto in PONTOS_DE_ANALISE:
+            timestamps_ns = snapshot.timestamps_ns.get(id_ponto)
+            if timestamps_ns is not None and len(timestamps_ns):
+                ultimo_ns = int(timestamps_ns[-1])
+                if self._ultimas_leituras.get(id_ponto) != ultimo_ns:
+                    novas.append(id_ponto)
+                    self._ultimas_leituras[id_ponto] = ultimo_ns
+            metricas_ponto = metricas[id_ponto]
+            if metricas_ponto.tem_dados:
+                status = {'geral': metricas_ponto.status_geral[0], 'alerta': metricas_ponto.status_chuva[0]}
+            else:
+                status = {'geral': "SEM DADOS", 'alerta': "SEM DADOS"}
+            status_anterior = self._status.get(id_ponto)
+            if status_anterior is not None and status_anterior != status:
+                mudancas[id_ponto] = {'anterior': status_anterior, 'novo': status}
+            self._status[id_ponto] = status
+        eventos = []
+        if novas:
+            eventos.append(_formatar_evento('leituras', snapshot.versao, {'versao': snapshot.versao, 'pontos': novas}))
+        if mudancas:
+            eventos.append(_formatar_evento('status', snapshot.versao, {'versao': snapshot.versao, 'pontos': mudancas}))
+        return eventos
+
+
+CANAL_EVENTOS = CanalEventos()
+
+
+@server.route('/eventos')
+def stream_eventos():
+    """ Stream SSE consumido por assets/eventos.js. """
+    fila = CANAL_EVENTOS.assinar()
+    if fila is None:
+        return Response("Limite de conexões de eventos atingido.", status=503, mimetype='text/plain')
+
+    def gerar():
+        try:
+            yield f"retry: {RETENTATIVA_CLIENTE_MS}\n\n"
+            while True:
+                try:
+                    yield fila.get(timeout=INTERVALO_KEEPALIVE_S)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            CANAL_EVENTOS.cancelar(fila)
+
+    return Response(gerar(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
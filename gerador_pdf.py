@@ -1,9 +1,18 @@
 import io
+import os
 from fpdf import FPDF
 import plotly.io as pio
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+import graficos_pdf
+
+# Gráficos do relatório: 'nativo' desenha em vetor com o próprio FPDF (graficos_pdf); 'kaleido'
+# usa o PNG das figuras Plotly e, se o Kaleido não estiver disponível, volta para o nativo.
+RENDERIZADOR_GRAFICOS = os.environ.get('RENDERIZADOR_GRAFICOS_PDF', 'nativo').strip().lower()
+LARGURA_GRAFICO_MM, ALTURA_GRAFICO_MM = 180, 79  # Mesma caixa das imagens 800x350 do Kaleido
+
 
 class PDF(FPDF):
     """ Classe FPDF customizada com cabeçalho e rodapé """
@@ -21,26 +30,113 @@ class PDF(FPDF):
         self.cell(0, 10, f"Página {self.page_no()}", 0, 0, "C")
 
 
-def criar_relatorio_em_memoria(df_periodo, fig_chuva, fig_umidade, status_atual, cor_status):
+def _sem_progresso(percentual, mensagem):
+    pass
+
+
+# --- Tabela de dados (colunas formatadas de uma vez, desenhadas em blocos de uma página) ---
+CABECALHO_TABELA = ["Timestamp", "Chuva (mm)", "Umid. 1m", "Umid. 2m", "Umid. 3m"]
+COLUNAS_TABELA = [('chuva_mm', ''), ('umidade_1m_perc', '%'), ('umidade_2m_perc', '%'), ('umidade_3m_perc', '%')]
+ALTURA_LINHA_TABELA = 5
+MARGEM_INFERIOR_TABELA = 30  # Deixa 30mm de margem inferior (rodapé)
+
+
+def _formatar_valores(valores, sufixo):
+    valores = np.asarray(valores, dtype=float)
+    texto = np.char.add(np.char.mod('%.1f', np.round(valores, 1)), sufixo)
+    return np.where(np.isnan(valores), '--', texto)
+
+
+def formatar_tabela(df_periodo, agregacao_horaria=False):
+    """
+    Colunas da tabela já como texto (arrays na ordem de CABECALHO_TABELA), formatadas
+    de forma vetorizada. Na agregação horária a chuva é somada e as umidades viram médias.
+    """
+    df_tabela = df_periodo
+    formato_timestamp = '%d/%m %H:%M'
+    if agregacao_horaria and not df_periodo.empty:
+        regras = {coluna: ('sum' if coluna == 'chuva_mm' else 'mean')
+                  for coluna, _ in COLUNAS_TABELA if coluna in df_periodo.columns}
+        df_tabela = df_periodo.set_index('timestamp')[list(regras)].resample('1h')
+        df_tabela = pd.concat([df_tabela[coluna].sum(min_count=1) if regra == 'sum' else df_tabela[coluna].mean()
+                               for coluna, regra in regras.items()], axis=1)
+        df_tabela = df_tabela.dropna(how='all').reset_index()  # Horas sem nenhuma leitura não entram
+        formato_timestamp = '%d/%m %H:00'
+    n_linhas = len(df_tabela)
+    colunas = [df_tabela['timestamp'].dt.strftime(formato_timestamp).to_numpy(dtype=str)
+               if 'timestamp' in df_tabela.columns else np.full(n_linhas, '')]
+    for coluna, sufixo in COLUNAS_TABELA:
+        colunas.append(_formatar_valores(df_tabela[coluna], sufixo) if coluna in df_tabela.columns
+                       else np.full(n_linhas, ''))
+    return colunas
+
+
+def desenhar_tabela(pdf, colunas, progresso=_sem_progresso):
+    """
+    Desenha a tabela a partir da posição atual: o texto de cada página é escrito célula a
+    célula com pdf.text e a grade com uma linha por borda, sem o custo de pdf.cell por célula.
+    O cabeçalho se repete no topo de cada página.
+    """
+    largura_coluna = pdf.epw / 6.5  # Timestamp ocupa 1,5 coluna
+    larguras = [largura_coluna * 1.5] + [largura_coluna] * (len(colunas) - 1)
+    xs = pdf.l_margin + np.concatenate([[0.0], np.cumsum(larguras)])
+    deslocamento_texto = ALTURA_LINHA_TABELA / 2 + 0.3 * pdf.font_size  # Linha de base, como em pdf.cell
+    n_linhas = len(colunas[0])
+    inicio = 0
+    while True:
+        pdf.set_font("Arial", "", 8)
+        y_topo = pdf.get_y()
+        cabe = max(1, int((pdf.h - MARGEM_INFERIOR_TABELA - y_topo) // ALTURA_LINHA_TABELA))  # Inclui o cabeçalho
+        fim = min(n_linhas, inicio + cabe - 1)
+        linhas_bloco = [CABECALHO_TABELA] + [[coluna[i] for coluna in colunas] for i in range(inicio, fim)]
+
+        for n, linha in enumerate(linhas_bloco):
+            y_texto = y_topo + n * ALTURA_LINHA_TABELA + deslocamento_texto
+            for x, texto in zip(xs, linha):
+                pdf.text(x + pdf.c_margin, y_texto, texto)
+        y_base = y_topo + len(linhas_bloco) * ALTURA_LINHA_TABELA
+        for n in range(len(linhas_bloco) + 1):
+            y = y_topo + n * ALTURA_LINHA_TABELA
+            pdf.line(xs[0], y, xs[-1], y)
+        for x in xs:
+            pdf.line(x, y_topo, x, y_base)
+        pdf.set_y(y_base)
+
+        inicio = fim
+        if inicio >= n_linhas:
+            return
+        progresso(50 + 45 * inicio // n_linhas, f"Montando tabela de dados ({inicio}/{n_linhas} linhas)")
+        pdf.add_page()
+
+
+def criar_relatorio_em_memoria(df_periodo, fig_chuva, fig_umidade, status_atual, cor_status, progresso=None,
+                               agregacao_horaria=False, df_acumulado_72h=None):
     """
     Gera um relatório PDF completo e retorna como bytes.
     Recebe um DataFrame JÁ FILTRADO para o ponto e período.
+    'progresso(percentual, mensagem)', se informado, é chamado a cada etapa (de 30% a 95%).
+    Com 'agregacao_horaria' a tabela traz uma linha por hora em vez de cada leitura.
+    As figuras Plotly só são usadas pelo renderizador 'kaleido' (podem ser None no nativo);
+    'df_acumulado_72h' (timestamp, chuva_mm) alimenta a linha do acumulado no gráfico nativo.
     """
-
-    # 1. Converte gráficos Plotly para imagens em memória
-    try:
-        img_chuva_bytes = pio.to_image(fig_chuva, format="png", width=800, height=350)
-        img_umidade_bytes = pio.to_image(fig_umidade, format="png", width=800, height=350)
-    except Exception as e:
-        print(f"Erro ao converter gráficos para imagem: {e}")
-        pdf = PDF();
-        pdf.add_page();
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, "Erro ao gerar gráficos para o PDF.", 0, 1, "C")
-        pdf.cell(0, 10, "Verifique se 'kaleido' está instalado.", 0, 1, "C")
-        return pdf.output()
-
-        # 2. Inicia o PDF
+    progresso = progresso or _sem_progresso
+
+    # 1. Converte gráficos Plotly para imagens em memória (apenas no renderizador 'kaleido')
+    imagens = None
+    if RENDERIZADOR_GRAFICOS == 'kaleido' and fig_chuva is not None and fig_umidade is not None:
+        progresso(30, "Convertendo gráficos")
+        try:
+            imagens = (pio.to_image(fig_chuva, format="png", width=800, height=350),
+                       pio.to_image(fig_umidade, format="png", width=800, height=350))
+        except Exception as e:
+            print(f"AVISO: Erro ao converter gráficos para imagem ({e}). Usando os gráficos nativos.")
+    if imagens is None and df_acumulado_72h is None:
+        # Sem a série da tabela de métricas: acumula apenas a chuva de dentro do período
+        df_acumulado_72h = pd.DataFrame({
+            'timestamp': df_periodo['timestamp'].to_numpy(),
+            'chuva_mm': df_periodo.set_index('timestamp')['chuva_mm'].rolling('72h').sum().to_numpy()})
+
+    # 2. Inicia o PDF
     pdf = PDF()
     pdf.add_page()
 
@@ -59,72 +155,39 @@ def criar_relatorio_em_memoria(df_periodo, fig_chuva, fig_umidade, status_atual,
     pdf.ln(5)
 
     # 4. Adiciona Gráficos
+    progresso(40, "Desenhando gráficos")
     pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Gráfico de Chuva Acumulada (72h)", 0, 1, "L")
-    pdf.image(io.BytesIO(img_chuva_bytes), x=pdf.get_x() + 10, y=pdf.get_y(), w=180)
+    if imagens:
+        pdf.image(io.BytesIO(imagens[0]), x=pdf.get_x() + 10, y=pdf.get_y(), w=LARGURA_GRAFICO_MM)
+    else:
+        graficos_pdf.desenhar_grafico_chuva(pdf, pdf.get_x() + 10, pdf.get_y(), LARGURA_GRAFICO_MM, ALTURA_GRAFICO_MM,
+                                            df_periodo, df_acumulado_72h)
     pdf.ln(95)  # Pula o espaço da imagem
 
     # --- INÍCIO DA ALTERAÇÃO ---
+    pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Gráfico de Variação da Umidade Solo", 0, 1, "L")  # Alterado aqui
     # --- FIM DA ALTERAÇÃO ---
 
-    pdf.image(io.BytesIO(img_umidade_bytes), x=pdf.get_x() + 10, y=pdf.get_y(), w=180)
+    if imagens:
+        pdf.image(io.BytesIO(imagens[1]), x=pdf.get_x() + 10, y=pdf.get_y(), w=LARGURA_GRAFICO_MM)
+    else:
+        graficos_pdf.desenhar_grafico_umidade(pdf, pdf.get_x() + 10, pdf.get_y(), LARGURA_GRAFICO_MM,
+                                              ALTURA_GRAFICO_MM, df_periodo)
     pdf.ln(95)
 
     # 5. Adiciona Tabela de Dados (AGORA COM O PERÍODO COMPLETO)
+    progresso(50, "Montando tabela de dados")
     pdf.add_page()
     pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "Dados Brutos do Período Selecionado", 0, 1, "L")  # Título ajustado
+    if agregacao_horaria:
+        pdf.cell(0, 10, "Dados Horários do Período Selecionado (chuva somada, umidade média)", 0, 1, "L")
+    else:
+        pdf.cell(0, 10, "Dados Brutos do Período Selecionado", 0, 1, "L")  # Título ajustado
     pdf.ln(5)
-
-    pdf.set_font("Arial", "", 8)
-
-    # --- INÍCIO DA CORREÇÃO ---
-    # Removemos o .tail(24) daqui
-    df_tabela = df_periodo.copy()
-    # --- FIM DA CORREÇÃO ---
-
-    # Formata colunas (como antes)
-    if 'timestamp' in df_tabela.columns:
-        df_tabela['timestamp'] = df_tabela['timestamp'].dt.strftime('%d/%m %H:00')
-    if 'chuva_mm' in df_tabela.columns:
-        df_tabela['chuva_mm'] = df_tabela['chuva_mm'].round(1).astype(str)
-    if 'umidade_1m_perc' in df_tabela.columns:
-        df_tabela['umidade_1m_perc'] = df_tabela['umidade_1m_perc'].round(1).astype(str) + '%'
-    if 'umidade_2m_perc' in df_tabela.columns:
-        df_tabela['umidade_2m_perc'] = df_tabela['umidade_2m_perc'].round(1).astype(str) + '%'
-    if 'umidade_3m_perc' in df_tabela.columns:
-        df_tabela['umidade_3m_perc'] = df_tabela['umidade_3m_perc'].round(1).astype(str) + '%'
-
-    # Cabeçalho da Tabela (Mantido como "Umid." para preservar o layout)
-    col_width = pdf.w / 5.5
-    pdf.cell(col_width * 1.5, 5, "Timestamp", 1)
-    pdf.cell(col_width, 5, "Chuva (mm)", 1)
-    pdf.cell(col_width, 5, "Umid. 1m", 1)
-    pdf.cell(col_width, 5, "Umid. 2m", 1)
-    pdf.cell(col_width, 5, "Umid. 3m", 1)
-    pdf.ln()
-
-    # Dados da Tabela (Itera sobre todo o df_tabela)
-    for index, row in df_tabela.iterrows():
-        # Verifica se precisa adicionar uma nova página
-        if pdf.get_y() > (pdf.h - 30):  # Deixa 30mm de margem inferior
-            pdf.add_page()
-            # Redesenha o cabeçalho na nova página
-            pdf.set_font("Arial", "", 8)  # Reseta a fonte
-            pdf.cell(col_width * 1.5, 5, "Timestamp", 1)
-            pdf.cell(col_width, 5, "Chuva (mm)", 1)
-            pdf.cell(col_width, 5, "Umid. 1m", 1)
-            pdf.cell(col_width, 5, "Umid. 2m", 1)
-            pdf.cell(col_width, 5, "Umid. 3m", 1)
-            pdf.ln()
-
-        pdf.cell(col_width * 1.5, 5, str(row.get('timestamp', '')), 1)
-        pdf.cell(col_width, 5, str(row.get('chuva_mm', '')), 1)
-        pdf.cell(col_width, 5, str(row.get('umidade_1m_perc', '')), 1)
-        pdf.cell(col_width, 5, str(row.get('umidade_2m_perc', '')), 1)
-        pdf.cell(col_width, 5, str(row.get('umidade_3m_perc', '')), 1)
-        pdf.ln()
+    desenhar_tabela(pdf, formatar_tabela(df_periodo, agregacao_horaria), progresso)
 
     # 6. Gera o PDF em memória e retorna os bytes
+    progresso(95, "Finalizando PDF")
     return pdf.output()
\ No newline at end of file
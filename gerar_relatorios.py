@@ -0,0 +1,99 @@
+# gerar_relatorios.py (Geração em lote dos relatórios PDF de todas as estações)
+#
+# Uso:
+#   python gerar_relatorios.py --periodo diario semanal --saida relatorios_lote
+#   python gerar_relatorios.py --dias 3 --fim 2025-01-15 --pontos Ponto-A-KM67 --horaria
+# Os dados vêm do mesmo banco do servidor (CAMINHO_BANCO_DADOS), lido uma vez e sem iniciar o
+# motor; cada relatório é montado por specific_dash.gerar_relatorio_pdf, o mesmo caminho do
+# botão "Gerar e Baixar PDF", num pool de processos (um relatório por processo por vez).
+
+import os
+import sys
+import time
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_source import PONTOS_DE_ANALISE
+import data_source
+import processamento
+from pages import specific_dash
+
+PERIODOS_DIAS = {'diario': 1, 'semanal': 7}
+
+
+def _gerar_relatorio(tarefa):
+    """ Executa no processo do pool: (id_ponto, rótulo, caminho do PDF ou None, segundos, tamanho em bytes). """
+    id_ponto, metricas_ponto, rotulo, inicio, fim, diretorio, agregacao_horaria = tarefa
+    t0 = time.perf_counter()
+    pdf_bytes = specific_dash.gerar_relatorio_pdf(id_ponto, metricas_ponto, inicio, fim,
+                                                  agregacao_horaria=agregacao_horaria)
+    if pdf_bytes is None:
+        return id_ponto, rotulo, None, time.perf_counter() - t0, 0
+    caminho = os.path.join(diretorio, f"relatorio_{id_ponto}_{rotulo}_{fim.replace('-', '')}.pdf")
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(pdf_bytes)
+    return id_ponto, rotulo, caminho, time.perf_counter() - t0, len(pdf_bytes)
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(description="Gera os relatórios PDF das estações em lote.")
+    parser.add_argument('--periodo', nargs='+', choices=list(PERIODOS_DIAS), default=['diario'],
+                        help="Um ou mais períodos terminando em --fim (padrão: diario).")
+    parser.add_argument('--dias', type=int, help="Período de N dias terminando em --fim (substitui --periodo).")
+    parser.add_argument('--fim', help="Último dia (AAAA-MM-DD, UTC). Padrão: dia da leitura mais recente.")
+    parser.add_argument('--pontos', nargs='+', choices=list(PONTOS_DE_ANALISE), default=list(PONTOS_DE_ANALISE))
+    parser.add_argument('--saida', default='relatorios_lote', help="Diretório de saída.")
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--horaria', action='store_true', help="Tabela com agregação horária.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    os.makedirs(args.saida, exist_ok=True)
+
+    t0 = time.perf_counter()
+    snapshot = data_source.carregar_snapshot_avulso()
+    metricas = processamento.obter_metricas(snapshot)
+    if args.fim:
+        fim = datetime.date.fromisoformat(args.fim)
+    elif not snapshot.df.empty:
+        fim = snapshot.df['timestamp'].max().date()
+    else:
+        print("ERRO: Nenhum dado disponível para gerar relatórios.")
+        return 1
+    periodos = {f"{args.dias}d": args.dias} if args.dias else {rotulo: PERIODOS_DIAS[rotulo] for rotulo in args.periodo}
+    print(f"Dados carregados em {time.perf_counter() - t0:.2f}s (versão {snapshot.versao}).")
+
+    tarefas = [(id_ponto, metricas[id_ponto], rotulo, (fim - datetime.timedelta(days=dias - 1)).isoformat(),
+                fim.isoformat(), args.saida, args.horaria)
+               for id_ponto in args.pontos for rotulo, dias in periodos.items()]
+    print(f"Gerando {len(tarefas)} relatório(s) com {args.processos} processo(s)...")
+
+    t_lote = time.perf_counter()
+    soma_tempos = 0.0
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        futuros = [pool.submit(_gerar_relatorio, tarefa) for tarefa in tarefas]
+        for futuro in as_completed(futuros):
+            try:
+                id_ponto, rotulo, caminho, segundos, tamanho = futuro.result()
+            except Exception as e:
+                print(f"ERRO ao gerar relatório: {e}")
+                falhas += 1
+                continue
+            soma_tempos += segundos
+            if caminho is None:
+                print(f"  AVISO: {id_ponto} ({rotulo}): sem dados no período ({segundos:.2f}s).")
+                falhas += 1
+            else:
+                print(f"  {id_ponto} ({rotulo}): {segundos:.2f}s, {tamanho / 1024:.0f} KB -> {caminho}")
+    duracao = time.perf_counter() - t_lote
+    print(f"{len(tarefas) - falhas}/{len(tarefas)} relatório(s) em {duracao:.2f}s "
+          f"({len(tarefas) / duracao:.1f}/s; soma dos tempos individuais {soma_tempos:.2f}s).")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
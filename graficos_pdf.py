@@ -0,0 +1,209 @@
+# graficos_pdf.py (Gráficos do relatório desenhados direto no PDF, em vetor)
+#
+# Substitui a conversão das figuras Plotly em PNG (plotly.io.to_image -> Kaleido/Chromium)
+# para os dois gráficos do relatório: chuva (barras + acumulado 72h no eixo da direita) e
+# umidade 1m/2m/3m. Tudo sai de primitivas do FPDF (retângulos, polilinhas e texto) a partir
+# dos DataFrames, então não há navegador para iniciar e o gráfico escala sem perder nitidez.
+
+import math
+import numpy as np
+import pandas as pd
+
+from processamento import indices_lttb
+
+# --- Aparência (mesmas cores das figuras das páginas) ---
+COR_BARRAS_CHUVA = (44, 62, 80)  # '#2C3E50'
+COR_ACUMULADO = (0, 123, 255)  # '#007BFF'
+CORES_UMIDADE = {'1m': (0, 128, 0), '2m': (255, 215, 0), '3m': (220, 53, 69)}
+COR_GRADE = (225, 229, 234)
+COR_TEXTO_EIXOS = (90, 90, 90)
+COLUNAS_UMIDADE = {'umidade_1m_perc': '1m', 'umidade_2m_perc': '2m', 'umidade_3m_perc': '3m'}
+
+# Margens internas (mm) entre a caixa do gráfico e a área de plotagem
+MARGEM_ESQUERDA, MARGEM_DIREITA, MARGEM_TOPO, MARGEM_BASE = 16, 16, 9, 9
+LARGURA_MINIMA_BARRA_MM = 0.8  # Abaixo disso as leituras são somadas em baldes
+PONTOS_POR_MM = 2  # Resolução das linhas (LTTB)
+PASSOS_TEMPO_H = [1, 2, 3, 6, 12, 24, 48, 72, 168]
+MAX_MARCAS_TEMPO = 8
+
+
+def _marcas_valor(minimo, maximo, n_alvo=5):
+    """ Marcas "redondas" (1, 2 ou 5 x 10^k) que cobrem [minimo, maximo]. """
+    if not np.isfinite(minimo) or not np.isfinite(maximo):
+        minimo, maximo = 0.0, 1.0
+    if maximo - minimo < 1e-9:
+        minimo, maximo = minimo - 0.5, maximo + 0.5
+    bruto = (maximo - minimo) / n_alvo
+    potencia = 10 ** math.floor(math.log10(bruto))
+    passo = next(fator * potencia for fator in (1, 2, 5, 10) if fator * potencia >= bruto)
+    inicio = math.floor(minimo / passo + 1e-9) * passo
+    fim = math.ceil(maximo / passo - 1e-9) * passo
+    return np.arange(inicio, fim + passo / 2, passo)
+
+
+def _formatar_marca(valor, marcas):
+    passo = marcas[1] - marcas[0] if len(marcas) > 1 else 1
+    return f"{valor:.0f}" if passo >= 1 else f"{valor:.1f}"
+
+
+def _marcas_tempo(t_min, t_max):
+    """ (posições em segundos desde a época, rótulos) do eixo de tempo. """
+    duracao_h = max((t_max - t_min) / 3600.0, 1e-9)
+    passo_h = next((p for p in PASSOS_TEMPO_H if duracao_h / p <= MAX_MARCAS_TEMPO), PASSOS_TEMPO_H[-1])
+    passo_s = passo_h * 3600
+    posicoes = np.arange(math.ceil(t_min / passo_s) * passo_s, t_max + 1, passo_s)
+    formato = '%d/%m %Hh' if passo_h < 24 else '%d/%m'
+    rotulos = pd.to_datetime(posicoes, unit='s').strftime(formato)
+    return posicoes, list(rotulos)
+
+
+def _segundos(timestamps):
+    """ Série de timestamps -> segundos desde a época (float), como no eixo x do gráfico. """
+    return pd.Series(timestamps).to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+
+
+class _AreaGrafico:
+    """ Converte (tempo, valor) em coordenadas da página dentro da área de plotagem. """
+
+    def __init__(self, x, y, largura, altura, t_min, t_max):
+        self.x0, self.x1 = x + MARGEM_ESQUERDA, x + largura - MARGEM_DIREITA
+        self.y0, self.y1 = y + MARGEM_TOPO, y + altura - MARGEM_BASE
+        self.t_min, self.t_max = t_min, max(t_max, t_min + 1)
+
+    def px(self, t):
+        return self.x0 + (np.asarray(t, dtype=float) - self.t_min) / (self.t_max - self.t_min) * (self.x1 - self.x0)
+
+    def py(self, valores, marcas):
+        v_min, v_max = marcas[0], marcas[-1]
+        return self.y1 - (np.asarray(valores, dtype=float) - v_min) / (v_max - v_min) * (self.y1 - self.y0)
+
+
+def _desenhar_eixos(pdf, area, marcas_esquerda, titulo_esquerda, marcas_direita=None, titulo_direita=None):
+    pdf.set_font("Arial", "", 6.5)
+    pdf.set_text_color(*COR_TEXTO_EIXOS)
+    pdf.set_line_width(0.15)
+
+    # Grade horizontal e valores do eixo da esquerda
+    for valor, y in zip(marcas_esquerda, area.py(marcas_esquerda, marcas_esquerda)):
+        pdf.set_draw_color(*COR_GRADE)
+        pdf.line(area.x0, y, area.x1, y)
+        rotulo = _formatar_marca(valor, marcas_esquerda)
+        pdf.text(area.x0 - 1.5 - pdf.get_string_width(rotulo), y + 0.8, rotulo)
+    if marcas_direita is not None:
+        for valor, y in zip(marcas_direita, area.py(marcas_direita, marcas_direita)):
+            pdf.text(area.x1 + 1.5, y + 0.8, _formatar_marca(valor, marcas_direita))
+
+    # Eixo de tempo
+    posicoes, rotulos = _marcas_tempo(area.t_min, area.t_max)
+    for x, rotulo in zip(area.px(posicoes), rotulos):
+        pdf.set_draw_color(*COR_GRADE)
+        pdf.line(x, area.y0, x, area.y1)
+        pdf.text(x - pdf.get_string_width(rotulo) / 2, area.y1 + 3.5, rotulo)
+    pdf.set_draw_color(*COR_TEXTO_EIXOS)
+    pdf.line(area.x0, area.y1, area.x1, area.y1)
+
+    # Títulos dos eixos (rotacionados)
+    centro_y = (area.y0 + area.y1) / 2
+    with pdf.rotation(90, area.x0 - 11, centro_y):
+        pdf.text(area.x0 - 11 - pdf.get_string_width(titulo_esquerda) / 2, centro_y, titulo_esquerda)
+    if titulo_direita:
+        with pdf.rotation(270, area.x1 + 11, centro_y):
+            pdf.text(area.x1 + 11 - pdf.get_string_width(titulo_direita) / 2, centro_y, titulo_direita)
+
+
+def _desenhar_legenda(pdf, area, itens):
+    """ Itens (rótulo, cor, 'barra' | 'linha') centralizados acima da área de plotagem. """
+    pdf.set_font("Arial", "", 7)
+    pdf.set_text_color(60, 60, 60)
+    larguras = [6 + pdf.get_string_width(rotulo) + 4 for rotulo, _, _ in itens]
+    x = (area.x0 + area.x1 - sum(larguras)) / 2
+    y = area.y0 - 4
+    for (rotulo, cor, tipo), largura in zip(itens, larguras):
+        if tipo == 'barra':
+            pdf.set_fill_color(*cor)
+            pdf.rect(x, y - 1.2, 4, 2.4, style='F')
+        else:
+            pdf.set_draw_color(*cor)
+            pdf.set_line_width(0.6)
+            pdf.line(x, y, x + 4, y)
+        pdf.text(x + 5.5, y + 0.9, rotulo)
+        x += largura
+
+
+def _desenhar_linha(pdf, area, t, valores, marcas, cor, espessura):
+    """ Polilinha da série, interrompida onde há NaN; reduzida pelo LTTB à resolução do gráfico. """
+    t = np.asarray(t, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+    validos = ~np.isnan(valores)
+    n_max = max(3, int((area.x1 - area.x0) * PONTOS_POR_MM))
+    pdf.set_draw_color(*cor)
+    pdf.set_line_width(espessura)
+    quebras = np.flatnonzero(np.diff(validos.astype(np.int8))) + 1
+    for trecho in np.split(np.arange(len(valores)), quebras):
+        if len(trecho) == 0 or not validos[trecho[0]]:
+            continue
+        indices = trecho[indices_lttb(t[trecho], valores[trecho], n_max)]
+        xs, ys = area.px(t[indices]), area.py(valores[indices], marcas)
+        if len(indices) == 1:
+            pdf.line(xs[0], ys[0], xs[0] + 0.3, ys[0])
+        else:
+            pdf.polyline(list(zip(xs.tolist(), ys.tolist())))
+
+
+def _limites_tempo(*series_tempo):
+    validas = [s for s in series_tempo if len(s)]
+    if not validas:
+        return 0.0, 3600.0
+    return min(float(s[0]) for s in validas), max(float(s[-1]) for s in validas)
+
+
+def desenhar_grafico_chuva(pdf, x, y, largura, altura, df_chuva, df_acumulado):
+    """
+    Barras da chuva de cada leitura ('chuva_mm' de df_chuva, somada em baldes quando as
+    barras ficariam finas demais) e a linha do acumulado 72h (df_acumulado) no eixo da direita.
+    """
+    t_chuva = _segundos(df_chuva['timestamp'])
+    t_acumulado = _segundos(df_acumulado['timestamp'])
+    area = _AreaGrafico(x, y, largura, altura, *_limites_tempo(t_chuva, t_acumulado))
+    chuva = np.nan_to_num(df_chuva['chuva_mm'].to_numpy(dtype=float))
+    acumulado = df_acumulado['chuva_mm'].to_numpy(dtype=float)
+
+    with pdf.local_context():
+        # Baldes de leituras consecutivas (o total do período se mantém)
+        passo_s = float(np.median(np.diff(t_chuva))) if len(t_chuva) > 1 else 600.0
+        n_baldes = max(1, int((area.x1 - area.x0) / LARGURA_MINIMA_BARRA_MM))
+        por_balde = max(1, -(-len(chuva) // n_baldes))
+        inicios = np.arange(0, len(chuva), por_balde)
+        somas = np.add.reduceat(chuva, inicios) if len(chuva) else np.array([])
+        marcas_chuva = _marcas_valor(0.0, float(somas.max()) if len(somas) and somas.max() > 0 else 1.0)
+        marcas_acumulado = _marcas_valor(0.0, float(np.nanmax(acumulado)) if np.any(acumulado > 0) else 1.0,
+                                         len(marcas_chuva) - 1)
+
+        _desenhar_eixos(pdf, area, marcas_chuva, "Pluv. Horária (mm)", marcas_acumulado, "Acumulada (mm)")
+        pdf.set_fill_color(*COR_BARRAS_CHUVA)
+        largura_balde = (area.px(passo_s * por_balde) - area.px(0)) * 0.85
+        for inicio, soma in zip(t_chuva[inicios], somas):
+            if soma > 0:
+                y_topo = float(area.py(soma, marcas_chuva))
+                pdf.rect(float(area.px(inicio)), y_topo, largura_balde, area.y1 - y_topo, style='F')
+        _desenhar_linha(pdf, area, t_acumulado, acumulado, marcas_acumulado, COR_ACUMULADO, 0.5)
+        _desenhar_legenda(pdf, area, [("Pluv. Horária", COR_BARRAS_CHUVA, 'barra'),
+                                      ("Acumulada (72h)", COR_ACUMULADO, 'linha')])
+
+
+def desenhar_grafico_umidade(pdf, x, y, largura, altura, df_periodo):
+    """ Linhas de umidade dos sensores 1m, 2m e 3m de df_periodo. """
+    t = _segundos(df_periodo['timestamp'])
+    area = _AreaGrafico(x, y, largura, altura, *_limites_tempo(t))
+    colunas = [coluna for coluna in COLUNAS_UMIDADE if coluna in df_periodo.columns]
+    valores = {coluna: df_periodo[coluna].to_numpy(dtype=float) for coluna in colunas}
+    todos = np.concatenate(list(valores.values())) if valores else np.array([])
+    todos = todos[~np.isnan(todos)]
+    marcas = _marcas_valor(float(todos.min()), float(todos.max())) if len(todos) else _marcas_valor(0.0, 1.0)
+
+    with pdf.local_context():
+        _desenhar_eixos(pdf, area, marcas, "Umidade (%)")
+        for coluna in colunas:
+            _desenhar_linha(pdf, area, t, valores[coluna], marcas, CORES_UMIDADE[COLUNAS_UMIDADE[coluna]], 0.6)
+        _desenhar_legenda(pdf, area, [(COLUNAS_UMIDADE[coluna], CORES_UMIDADE[COLUNAS_UMIDADE[coluna]], 'linha')
+                                      for coluna in colunas])
@@ -0,0 +1,21 @@
+# gunicorn.conf.py (Configuração do servidor; usada pelo Procfile)
+
+import os
+
+import data_source
+
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))  # O SSE usa no máximo threads - EVENTOS_THREADS_RESERVADAS (eventos.py)
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+# Os workers só enxergam o mesmo estado pelo SQLite (um escritor simula, os outros leem).
+# Sem ele, cada worker simularia e dispararia alertas por conta própria: sobe um só.
+if workers > 1:
+    disponivel, motivo = data_source.verificar_armazenamento_compartilhado()
+    if not disponivel:
+        print("!" * 80)
+        print(f"AVISO: Sem armazenamento compartilhado entre workers ({motivo}).")
+        print(f"AVISO: Iniciando com 1 worker em vez de {workers} (WEB_CONCURRENCY), para que os "
+              f"dados e os alertas não divirjam entre processos.")
+        print("!" * 80)
+        workers = 1
@@ -4,8 +4,6 @@ import dash
 from dash import html, dcc
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
-import pandas as pd
-from io import StringIO
 import os
 import json
 
@@ -16,6 +14,7 @@ from data_source import PONTOS_DE_ANALISE, CONSTANTES_PADRAO
 import processamento
 import alertas
 import data_source  # Importa o data_source diretamente
+import eventos  # Registra a rota SSE /eventos no servidor Flask
 
 
 # --- Layout da Barra de Navegação (Mantido) ---
@@ -85,13 +84,18 @@ mapa_status_cor_geral = {0: ("LIVRE", "success"), 1: ("ATENÇÃO", "warning"), 2
 
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
-    dcc.Store(id='store-dados-sessao', storage_type='session'),
+    dcc.Store(id='store-dados-sessao', storage_type='session'),  # Apenas {'versao': n} do snapshot no servidor
     dcc.Store(id='store-ultimo-status', storage_type='session'),
+    dcc.Store(id='store-push-eventos'),  # Preenchido por assets/eventos.js quando o canal SSE avisa de uma versão nova
     dcc.Interval(id='intervalo-atualizacao', interval=2 * 1000, n_intervals=0),
     get_navbar(),
     html.Div(id='page-content')
 ])
 
+# --- Motor de Simulação ---
+# Uma única thread avança os simuladores pelo relógio de parede; os callbacks apenas leem o snapshot.
+data_source.iniciar_motor_simulacao()
+
 
 # --- Callbacks ---
 
@@ -112,50 +116,58 @@ def display_page(pathname):
     [Output('store-dados-sessao', 'data'),
      Output('store-ultimo-status', 'data')],
     Input('intervalo-atualizacao', 'n_intervals'),
+    Input('store-push-eventos', 'data'),
+    State('store-dados-sessao', 'data'),
 )
-def update_data_and_check_alerts(n_intervals):
+def update_data_and_check_alerts(n_intervals, evento_push, dados_sessao):
     """
     Este callback unificado lê o status DIRETAMENTE da variável
-    global 'data_source.STATUS_ATUAL_ALERTAS', garantindo que o estado
-    lido é 100% síncrono, já que 'use_reloader=False' garante
-    um único processo.
+    global 'data_source.STATUS_ATUAL_ALERTAS'. Com vários workers, cada
+    transição é registrada atomicamente no armazenamento compartilhado
+    (data_source.registrar_status_alerta), então só um processo dispara o alerta.
+    O store da sessão leva apenas a versão do snapshot; as páginas buscam os
+    DataFrames já separados por ponto no cache do servidor (data_source.get_snapshot).
+    Se a versão não mudou desde o último tick da sessão, nada é recalculado e os
+    stores não são tocados, então os callbacks das páginas nem chegam a rodar.
+    Com o canal SSE aberto (eventos.py) o disparo vem de 'store-push-eventos' quando
+    há dados novos (no máximo um a cada 2s; mudança de status na hora); o dcc.Interval
+    passa a ser só uma rede de segurança lenta.
     """
 
-    # --- 1. Buscar Novos Dados ---
-    print(f"Atualização (Intervalo {n_intervals}): Buscando dados...")
-    df_completo = data_source.get_data()
-    dados_json_output = df_completo.to_json(date_format='iso', orient='split')
+    # --- 0. Mesma versão que a sessão já tem: nenhum dado novo, nada a fazer ---
+    versao_atual = data_source.get_versao_dados()
+    if isinstance(dados_sessao, dict) and dados_sessao.get('versao') == versao_atual:
+        return dash.no_update, dash.no_update
+
+    # --- 1. Versão do Snapshot Atual (o motor de simulação avança os dados em segundo plano) ---
+    snapshot = data_source.get_snapshot(versao_atual)
+    dados_sessao_output = {'versao': snapshot.versao}
 
     # --- 2. Verificar Alertas ---
 
     # Lê o dicionário global do servidor (estado síncrono)
     status_antigos = data_source.STATUS_ATUAL_ALERTAS
 
-    try:
-        df_completo['timestamp'] = pd.to_datetime(df_completo['timestamp'])
-    except Exception as e:
-        print(f"Erro ao converter timestamp em callback unificado: {e}")
-        return dados_json_output, dash.no_update
+    # Métricas derivadas (calculadas uma única vez por versão dos dados)
+    metricas = processamento.obter_metricas(snapshot)
 
     # Loop para verificar status individual
+    transicoes_para_enviar = []
     for id_ponto, config in data_source.PONTOS_DE_ANALISE.items():
 
         status_geral_antigo_ponto = status_antigos.get(id_ponto, "INDEFINIDO")
-        df_ponto = df_completo[df_completo['id_ponto'] == id_ponto]
-        status_envio = "SEM DADOS"  # Padrão
-
-        if not df_ponto.empty:
-            try:
-                df_chuva_72h = processamento.calcular_acumulado_72h(df_ponto)
-                ultima_chuva_72h = df_chuva_72h.iloc[-1]['chuva_mm'] if not df_chuva_72h.empty and not pd.isna(
-                    df_chuva_72h.iloc[-1]['chuva_mm']) else None
-                status_envio, _ = processamento.definir_status_chuva(ultima_chuva_72h)
-            except Exception as e_calc:
-                print(f"Erro cálculo alerta para {id_ponto}: {e_calc}");
-                status_envio = "ERRO"
+        metricas_ponto = metricas[id_ponto]
+        status_envio = metricas_ponto.status_chuva[0] if metricas_ponto.tem_dados else "SEM DADOS"
 
         # Lógica de Alerta e Transição de Estado por Ponto
         if status_envio != status_geral_antigo_ponto:
+            # ATUALIZA O ESTADO GLOBAL IMEDIATAMENTE (e grava a transição em disco).
+            # Com vários workers a troca é atômica: se outro processo já a registrou, não reenvia.
+            timestamps_ponto = snapshot.timestamps_ns.get(id_ponto)
+            timestamp_dados_ns = int(timestamps_ponto[-1]) if timestamps_ponto is not None and len(timestamps_ponto) else None
+            if not data_source.registrar_status_alerta(id_ponto, status_geral_antigo_ponto, status_envio,
+                                                       timestamp_dados_ns):
+                continue
             print(f"ALERTA INDIVIDUAL (Chuva): Ponto {id_ponto} mudou de {status_geral_antigo_ponto} -> {status_envio}")
             deve_enviar = False
 
@@ -172,24 +184,26 @@ def update_data_and_check_alerts(n_intervals):
                     f">>> Transição de NORMALIZAÇÃO {id_ponto} ({status_geral_antigo_ponto}->{status_envio}) detectada. Disparando alarme.")
 
             if deve_enviar:
-                try:
-                    alertas.enviar_alerta(
-                        id_ponto,
-                        config.get('nome', id_ponto),
-                        status_envio,  # Novo Status
-                        status_geral_antigo_ponto  # Status Anterior
-                    )
-                except Exception as e:
-                    print(f"AVISO: Falha na notificação para {id_ponto}. Erro: {e}")
-
-            # ATUALIZA O ESTADO GLOBAL IMEDIATAMENTE
-            status_antigos[id_ponto] = status_envio
+                transicoes_para_enviar.append((
+                    id_ponto,
+                    config.get('nome', id_ponto),
+                    status_envio,  # Novo Status
+                    status_geral_antigo_ponto  # Status Anterior
+                ))
         else:
             pass  # O estado global já está correto
 
+    # Um único e-mail/SMS com todas as transições desta avaliação.
+    # Apenas enfileira: o envio (com retentativas) roda em segundo plano.
+    if transicoes_para_enviar:
+        try:
+            alertas.enfileirar_alertas(transicoes_para_enviar)
+        except Exception as e:
+            print(f"AVISO: Falha na notificação para {[t[0] for t in transicoes_para_enviar]}. Erro: {e}")
+
     status_json_output = json.dumps(status_antigos)
 
-    return dados_json_output, status_json_output
+    return dados_sessao_output, status_json_output
 
 
 # --- FIM DA CORREÇÃO ---
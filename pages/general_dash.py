@@ -1,18 +1,18 @@
 # pages/general_dash.py (CORRIGIDO - "Umidade" -> "Umidade Solo")
 
 import dash
-from dash import html, dcc, callback, Input, Output
+from dash import html, dcc, callback, Input, Output, State, ALL
 import dash_bootstrap_components as dbc
 import plotly.express as px
-import pandas as pd
-from io import StringIO
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 # Importa o app central e helpers
 from app import app, TEMPLATE_GRAFICO_MODERNO
 from data_source import PONTOS_DE_ANALISE, FREQUENCIA_SIMULACAO
+import data_source
 import processamento
+import cache_figuras
 
 # --- INÍCIO DA ALTERAÇÃO 1: Atualizar Mapa de Cores ---
 CORES_UMIDADE = {
@@ -24,6 +24,9 @@ CORES_UMIDADE = {
 
 # --- FIM DA ALTERAÇÃO 1 ---
 
+# Largura típica (px) de cada gráfico desta página (meia tela, lg=6): limita os pontos por série
+LARGURA_GRAFICO_PX = 700
+
 # --- Layout da Página Geral ---
 def get_layout():
     """Retorna o layout do dashboard geral."""
@@ -31,6 +34,9 @@ def get_layout():
         {'label': 'Todo o Histórico', 'value': 14 * 24}]
 
     return dbc.Container([
+        # Período e cursor de cada ponto já desenhados (atualização incremental dos gráficos)
+        dcc.Store(id='store-graficos-geral'),
+
         # Seletor de Período
         dbc.Row([
             dbc.Col(dbc.Label("Período (Gráficos):"), width="auto"),
@@ -51,83 +57,126 @@ def get_layout():
     ], fluid=True)
 
 
+# --- Figuras de um ponto (memoizadas em cache_figuras) ---
+def _criar_figuras_ponto(config, metricas_ponto, selected_hours):
+    """ (figura de chuva, figura de umidade, estado dos traços) do ponto, com as figuras já serializadas (dict). """
+    df_ponto = metricas_ponto.df_ponto
+
+    # Lógica de cálculo de pontos (baseada no selected_hours)
+    PONTOS_POR_HORA = int(60 / (FREQUENCIA_SIMULACAO.total_seconds() / 60))
+    n_pontos_desejados = selected_hours * PONTOS_POR_HORA
+    n_pontos_plot = min(n_pontos_desejados, len(df_ponto))
+    df_ponto_plot = df_ponto.tail(n_pontos_plot)
+    df_chuva_72h_plot = metricas_ponto.acumulado_72h.tail(n_pontos_plot)
+    n_horas_titulo = selected_hours
+
+    # Reduz as séries à largura do gráfico (LTTB nas linhas, soma por balde nas barras)
+    df_chuva_barras, df_chuva_72h_reduzido, df_umidade = processamento.reduzir_para_grafico(
+        df_ponto_plot, df_chuva_72h_plot, LARGURA_GRAFICO_PX, 'Umidade Solo (%)')
+
+    # Gráfico de Chuva (Mantido)
+    # ... (código mantido) ...
+    fig_chuva = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_chuva.add_trace(go.Bar(x=df_chuva_barras['timestamp'], y=df_chuva_barras['chuva_mm'], name='Pluv. Horária',
+                               marker_color='#2C3E50', opacity=0.8), secondary_y=False)
+    fig_chuva.add_trace(
+        go.Scatter(x=df_chuva_72h_reduzido['timestamp'], y=df_chuva_72h_reduzido['chuva_mm'], name='Acumulada (72h)',
+                   mode='lines', line=dict(color='#007BFF', width=2.5)), secondary_y=True)
+    fig_chuva.update_layout(title_text=f"Pluviometria - {config['nome']} ({n_horas_titulo}h)",
+                            template=TEMPLATE_GRAFICO_MODERNO,
+                            margin=dict(l=40, r=20, t=50, b=40),
+                            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor='center', x=0.5),
+                            yaxis_title="Pluv. Horária (mm)",
+                            yaxis2_title="Acumulada (mm)",
+                            hovermode="x unified", bargap=0.1)
+    fig_chuva.update_yaxes(title_text="Pluv. Horária (mm)", secondary_y=False);
+    fig_chuva.update_yaxes(title_text="Acumulada (mm)", secondary_y=True)
+
+    # --- INÍCIO DA ALTERAÇÃO 2: "Umidade" -> "Umidade Solo" ---
+    # Gráfico de Umidade (df_umidade já em formato longo, sensores '1m'/'2m'/'3m')
+    fig_umidade = px.line(df_umidade, x='timestamp', y='Umidade Solo (%)', color='Sensor',  # Alterado aqui
+                          title=f"Umidade Solo - {config['nome']} ({n_horas_titulo}h)",  # Alterado aqui
+                          color_discrete_map=CORES_UMIDADE)  # Usa novo mapa de cores
+    # --- FIM DA ALTERAÇÃO 2 ---
+
+    fig_umidade.update_traces(line=dict(width=3))
+    fig_umidade.update_layout(template=TEMPLATE_GRAFICO_MODERNO, margin=dict(l=40, r=20, t=40, b=50),
+                              legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5))
+    estado = processamento.estado_graficos(df_ponto_plot, df_chuva_72h_plot, n_pontos_desejados, LARGURA_GRAFICO_PX,
+                                           df_chuva_barras, df_chuva_72h_reduzido, df_umidade, fig_chuva, fig_umidade)
+    return processamento.figura_para_extender(fig_chuva), processamento.figura_para_extender(fig_umidade), estado
+
+
+# --- Atualização incremental (apenas as leituras novas de cada traço) ---
+def _extensoes_graficos(metricas, estado_graficos, ids_chuva, ids_umidade):
+    """
+    (novo estado, extendData dos gráficos de chuva, extendData dos de umidade) na ordem dos
+    ids, ou None se algum ponto precisa ter as figuras reconstruídas.
+    """
+    pontos_com_dados = {id_ponto for id_ponto, metricas_ponto in metricas.items() if not metricas_ponto.df_ponto.empty}
+    if pontos_com_dados != set(estado_graficos['pontos']):
+        return None
+    extensoes, novos_estados = {}, {}
+    for id_ponto, estado_ponto in estado_graficos['pontos'].items():
+        resultado = processamento.extensao_graficos(metricas[id_ponto], estado_ponto)
+        if resultado is None:
+            return None
+        extensao_chuva, extensao_umidade, novos_estados[id_ponto] = resultado
+        extensoes[id_ponto] = (extensao_chuva or dash.no_update, extensao_umidade or dash.no_update)
+    return ({**estado_graficos, 'pontos': novos_estados},
+            [extensoes[item['id']['ponto']][0] if item['id']['ponto'] in extensoes else dash.no_update
+             for item in ids_chuva],
+            [extensoes[item['id']['ponto']][1] if item['id']['ponto'] in extensoes else dash.no_update
+             for item in ids_umidade])
+
+
 # --- Callback da Página Geral ---
 @app.callback(
     Output('general-dash-content', 'children'),
+    Output('store-graficos-geral', 'data'),
+    Output({'tipo': 'grafico-chuva-geral', 'ponto': ALL}, 'extendData'),
+    Output({'tipo': 'grafico-umidade-geral', 'ponto': ALL}, 'extendData'),
     Input('store-dados-sessao', 'data'),
-    Input('general-graph-time-selector', 'value')
+    Input('general-graph-time-selector', 'value'),
+    State('store-graficos-geral', 'data')
 )
-def update_general_dashboard(dados_json, selected_hours):
-    if not dados_json or selected_hours is None:
-        return dbc.Spinner(size="lg", children="Carregando dados...")
-    try:
-        df_completo = pd.read_json(StringIO(dados_json), orient='split')
-        df_completo['timestamp'] = pd.to_datetime(df_completo['timestamp'])
-    except Exception as e:
-        return dbc.Alert(f"Erro ao ler dados: {e}", color="danger")
+def update_general_dashboard(dados_sessao, selected_hours, estado_graficos):
+    ids_chuva, ids_umidade = dash.ctx.outputs_list[2], dash.ctx.outputs_list[3]
+    sem_extensao_chuva, sem_extensao_umidade = [dash.no_update] * len(ids_chuva), [dash.no_update] * len(ids_umidade)
+    if not dados_sessao or selected_hours is None:
+        return dbc.Spinner(size="lg", children="Carregando dados..."), None, sem_extensao_chuva, sem_extensao_umidade
+    snapshot = data_source.get_snapshot_da_sessao(dados_sessao)
+    metricas = processamento.obter_metricas(snapshot)
+
+    # Mesmo período já desenhado: só acrescenta as leituras novas aos traços existentes
+    if estado_graficos and estado_graficos.get('horas') == selected_hours and ids_chuva:
+        resultado = _extensoes_graficos(metricas, estado_graficos, ids_chuva, ids_umidade)
+        if resultado is not None:
+            novo_estado, extensoes_chuva, extensoes_umidade = resultado
+            return dash.no_update, novo_estado, extensoes_chuva, extensoes_umidade
 
     layout_geral = []
+    estados_pontos = {}
     for id_ponto, config in PONTOS_DE_ANALISE.items():
-        df_ponto = df_completo[df_completo['id_ponto'] == id_ponto]
-        if df_ponto.empty: continue
-
-        # Lógica de cálculo de pontos (baseada no selected_hours)
-        PONTOS_POR_HORA = int(60 / (FREQUENCIA_SIMULACAO.total_seconds() / 60))
-        n_pontos_desejados = selected_hours * PONTOS_POR_HORA
-        n_pontos_plot = min(n_pontos_desejados, len(df_ponto))
-        df_ponto_plot = df_ponto.tail(n_pontos_plot)
-        df_chuva_72h_completo = processamento.calcular_acumulado_72h(df_ponto)
-        df_chuva_72h_plot = df_chuva_72h_completo.tail(n_pontos_plot)
-        n_horas_titulo = selected_hours
-
-        # Gráfico de Chuva (Mantido)
-        # ... (código mantido) ...
-        fig_chuva = make_subplots(specs=[[{"secondary_y": True}]])
-        fig_chuva.add_trace(go.Bar(x=df_ponto_plot['timestamp'], y=df_ponto_plot['chuva_mm'], name='Pluv. Horária',
-                                   marker_color='#2C3E50', opacity=0.8), secondary_y=False)
-        fig_chuva.add_trace(
-            go.Scatter(x=df_chuva_72h_plot['timestamp'], y=df_chuva_72h_plot['chuva_mm'], name='Acumulada (72h)',
-                       mode='lines', line=dict(color='#007BFF', width=2.5)), secondary_y=True)
-        fig_chuva.update_layout(title_text=f"Pluviometria - {config['nome']} ({n_horas_titulo}h)",
-                                template=TEMPLATE_GRAFICO_MODERNO,
-                                margin=dict(l=40, r=20, t=50, b=40),
-                                legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor='center', x=0.5),
-                                yaxis_title="Pluv. Horária (mm)",
-                                yaxis2_title="Acumulada (mm)",
-                                hovermode="x unified", bargap=0.1)
-        fig_chuva.update_yaxes(title_text="Pluv. Horária (mm)", secondary_y=False);
-        fig_chuva.update_yaxes(title_text="Acumulada (mm)", secondary_y=True)
-
-        # --- INÍCIO DA ALTERAÇÃO 2: "Umidade" -> "Umidade Solo" ---
-        # Gráfico de Umidade
-        df_umidade = df_ponto_plot.melt(id_vars=['timestamp'],
-                                        value_vars=['umidade_1m_perc', 'umidade_2m_perc', 'umidade_3m_perc'],
-                                        var_name='Sensor', value_name='Umidade Solo (%)')  # Alterado aqui
-
-        # --- INÍCIO DA ALTERAÇÃO: Renomear sensores ---
-        df_umidade['Sensor'] = df_umidade['Sensor'].replace({
-            'umidade_1m_perc': '1m',
-            'umidade_2m_perc': '2m',
-            'umidade_3m_perc': '3m'
-        })
-        # --- FIM DA ALTERAÇÃO ---
-
-        fig_umidade = px.line(df_umidade, x='timestamp', y='Umidade Solo (%)', color='Sensor',  # Alterado aqui
-                              title=f"Umidade Solo - {config['nome']} ({n_horas_titulo}h)",  # Alterado aqui
-                              color_discrete_map=CORES_UMIDADE)  # Usa novo mapa de cores
-        # --- FIM DA ALTERAÇÃO 2 ---
-
-        fig_umidade.update_traces(line=dict(width=3))
-        fig_umidade.update_layout(template=TEMPLATE_GRAFICO_MODERNO, margin=dict(l=40, r=20, t=40, b=50),
-                                  legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5))
+        metricas_ponto = metricas[id_ponto]
+        if metricas_ponto.df_ponto.empty: continue
+
+        # Figuras reaproveitadas entre sessões na mesma (ponto, período, versão dos dados)
+        fig_chuva, fig_umidade, estados_pontos[id_ponto] = cache_figuras.CACHE_FIGURAS.obter(
+            ('geral', id_ponto, selected_hours, snapshot.versao),
+            lambda: _criar_figuras_ponto(config, metricas_ponto, selected_hours))
 
         # Layout Lado a Lado
-        col_chuva = dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(figure=fig_chuva)), className="shadow-sm"), width=12, lg=6,
-                            className="mb-4")
-        col_umidade = dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(figure=fig_umidade)), className="shadow-sm"), width=12,
-                              lg=6, className="mb-4")
+        col_chuva = dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(id={'tipo': 'grafico-chuva-geral', 'ponto': id_ponto},
+                                                            figure=fig_chuva)), className="shadow-sm"),
+                            width=12, lg=6, className="mb-4")
+        col_umidade = dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(id={'tipo': 'grafico-umidade-geral', 'ponto': id_ponto},
+                                                              figure=fig_umidade)), className="shadow-sm"),
+                              width=12, lg=6, className="mb-4")
         linha_ponto = dbc.Row([col_chuva, col_umidade], className="mb-4")
         layout_geral.append(linha_ponto)
 
-    if not layout_geral: return dbc.Alert("Nenhum dado.", color="warning")
-    return layout_geral
\ No newline at end of file
+    if not layout_geral:
+        return dbc.Alert("Nenhum dado.", color="warning"), None, sem_extensao_chuva, sem_extensao_umidade
+    return (layout_geral, {'horas': selected_hours, 'pontos': estados_pontos},
+            sem_extensao_chuva, sem_extensao_umidade)
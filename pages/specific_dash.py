@@ -1,19 +1,21 @@
 import dash
-from dash import html, dcc, callback, Input, Output, State
+from dash import html, dcc, callback, Input, Output, State, ALL
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from datetime import datetime
-from io import StringIO
 import base64
 import plotly.express as px
 
 # Importa o app central e helpers
 from app import app, TEMPLATE_GRAFICO_MODERNO
 from data_source import PONTOS_DE_ANALISE, CONSTANTES_PADRAO, FREQUENCIA_SIMULACAO
+import data_source
 import processamento
 import gerador_pdf
+import cache_figuras
+import relatorios
 
 # --- Mapas de Cores e Riscos ---
 CORES_ALERTAS_CSS = {
@@ -29,6 +31,9 @@ CORES_UMIDADE = {
     '3m': CORES_ALERTAS_CSS["vermelho"]
 }
 
+# Largura típica (px) de cada gráfico desta página (tela inteira, width=12): limita os pontos por série
+LARGURA_GRAFICO_PX = 1400
+
 RISCO = {"LIVRE": 0, "ATENÇÃO": 1, "ALERTA": 2, "PARALIZAÇÃO": 3, "SEM DADOS": -1, "INDEFINIDO": -1}
 mapa_status_cor_geral = {
     0: ("LIVRE", "success"),
@@ -45,6 +50,7 @@ def get_layout():
         {'label': 'Todo o Histórico', 'value': 14 * 24}]
     return dbc.Container([
         dcc.Store(id='store-id-ponto-ativo'),
+        dcc.Store(id='store-graficos-especifico'),  # Ponto/período já desenhados (atualização incremental)
 
         # --- TÍTULO DA ESTAÇÃO (Centralizado) ---
         html.Div(id='specific-dash-title', className="my-3 text-center"),
@@ -60,15 +66,66 @@ def get_layout():
                     pd.Timestamp.now() - pd.Timedelta(days=7)).date(),
                                 end_date=pd.Timestamp.now().date(),
                                 display_format='DD/MM/YYYY', className="mb-3"),
+            dbc.Switch(id='pdf-tabela-horaria', label="Tabela com agregação horária", value=False,
+                       className="d-inline-block mb-3"),
             html.Br(),
-            dcc.Loading(id="loading-pdf", type="default", children=[
-                html.Div([dbc.Button("Gerar e Baixar PDF", id='btn-pdf-especifico', color="primary", size="lg"),
-                          dcc.Download(id='download-pdf-especifico')])])
+            html.Div([dbc.Button("Gerar e Baixar PDF", id='btn-pdf-especifico', color="primary", size="lg"),
+                      dcc.Download(id='download-pdf-especifico')]),
+            # Job do relatório em andamento ({'chave', 'ponto'}) e o polling do seu progresso
+            dcc.Store(id='store-job-pdf'),
+            dcc.Interval(id='intervalo-job-pdf', interval=700, disabled=True),
+            html.Div(id='progresso-pdf')
         ]), className="shadow-sm text-center"),
             className="mb-5")]),
     ], fluid=True)
 
 
+# --- Figuras do ponto (memoizadas em cache_figuras) ---
+def _criar_figuras_ponto(config, metricas_ponto, selected_hours):
+    """ (figura de chuva, figura de umidade, estado dos traços) do ponto, com as figuras já serializadas (dict). """
+    df_ponto = metricas_ponto.df_ponto
+
+    # Filtra dados para gráficos
+    PONTOS_POR_HORA = int(60 / (FREQUENCIA_SIMULACAO.total_seconds() / 60))
+    n_pontos_desejados = selected_hours * PONTOS_POR_HORA
+    n_pontos_plot = min(n_pontos_desejados, len(df_ponto))
+    df_ponto_plot = df_ponto.tail(n_pontos_plot);
+    df_chuva_72h_plot = metricas_ponto.acumulado_72h.tail(n_pontos_plot)
+    n_horas_titulo = selected_hours
+
+    # Reduz as séries à largura do gráfico (LTTB nas linhas, soma por balde nas barras)
+    df_chuva_barras, df_chuva_72h_reduzido, df_umidade = processamento.reduzir_para_grafico(
+        df_ponto_plot, df_chuva_72h_plot, LARGURA_GRAFICO_PX, 'Umidade (%)')
+
+    # Gráfico de Chuva (Mantido)
+    fig_chuva = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_chuva.add_trace(
+        go.Bar(x=df_chuva_barras['timestamp'], y=df_chuva_barras['chuva_mm'], name='Pluviometria Horária (mm)',
+               marker_color='#2C3E50', opacity=0.8), secondary_y=False)
+    fig_chuva.add_trace(go.Scatter(x=df_chuva_72h_reduzido['timestamp'], y=df_chuva_72h_reduzido['chuva_mm'],
+                                   name='Precipitação Acumulada (mm)', mode='lines',
+                                   line=dict(color='#007BFF', width=2.5)), secondary_y=True)
+    fig_chuva.update_layout(title_text=f"Pluviometria - {config['nome']} ({n_horas_titulo}h)",
+                            template=TEMPLATE_GRAFICO_MODERNO,
+                            margin=dict(l=40, r=20, t=50, b=40),
+                            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor='center', x=0.5),
+                            xaxis_title="Data e Hora", yaxis_title="Pluviometria Horária (mm)",
+                            yaxis2_title="Precipitação Acumulada (mm)", hovermode="x unified", bargap=0.1)
+    fig_chuva.update_yaxes(title_text="Pluviometria Horária (mm)", secondary_y=False);
+    fig_chuva.update_yaxes(title_text="Acumulada (mm)", secondary_y=True)
+
+    # Gráfico de Umidade (df_umidade já em formato longo, sensores '1m'/'2m'/'3m')
+    fig_umidade = px.line(df_umidade, x='timestamp', y='Umidade (%)', color='Sensor',
+                          title=f"Variação da Umidade - {config['nome']} ({n_horas_titulo}h)",
+                          color_discrete_map=CORES_UMIDADE)  # Usa mapa de cores
+    fig_umidade.update_traces(line=dict(width=3));
+    fig_umidade.update_layout(template=TEMPLATE_GRAFICO_MODERNO, margin=dict(l=40, r=20, t=40, b=50),
+                              legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5))
+    estado = processamento.estado_graficos(df_ponto_plot, df_chuva_72h_plot, n_pontos_desejados, LARGURA_GRAFICO_PX,
+                                           df_chuva_barras, df_chuva_72h_reduzido, df_umidade, fig_chuva, fig_umidade)
+    return processamento.figura_para_extender(fig_chuva), processamento.figura_para_extender(fig_umidade), estado
+
+
 # --- Callbacks da Página Específica ---
 
 # Callback para definir o TÍTULO (Estação KM)
@@ -101,68 +158,47 @@ def update_specific_title(pathname):
     [
         Output('specific-dash-cards', 'children'),
         Output('specific-dash-graphs', 'children'),
-        Output('store-id-ponto-ativo', 'data')
+        Output('store-id-ponto-ativo', 'data'),
+        Output('store-graficos-especifico', 'data'),
+        Output({'tipo': 'grafico-chuva-especifico', 'ponto': ALL}, 'extendData'),
+        Output({'tipo': 'grafico-umidade-especifico', 'ponto': ALL}, 'extendData')
     ],
     [
         Input('url', 'pathname'),
         Input('store-dados-sessao', 'data'),
         Input('graph-time-selector', 'value')
-    ]
+    ],
+    State('store-graficos-especifico', 'data')
 )
-def update_specific_dashboard(pathname, dados_json, selected_hours):
-    if not dados_json or not pathname.startswith('/ponto/') or selected_hours is None:
-        return dash.no_update, dash.no_update, dash.no_update
+def update_specific_dashboard(pathname, dados_sessao, selected_hours, estado_graficos):
+    sem_extensao_chuva = [dash.no_update] * len(dash.ctx.outputs_list[4])
+    sem_extensao_umidade = [dash.no_update] * len(dash.ctx.outputs_list[5])
+    if not dados_sessao or not pathname.startswith('/ponto/') or selected_hours is None:
+        return (dash.no_update, dash.no_update, dash.no_update, dash.no_update,
+                sem_extensao_chuva, sem_extensao_umidade)
     id_ponto = "";
     config = {}
     try:
         id_ponto = pathname.split('/')[-1];
         config = PONTOS_DE_ANALISE[id_ponto]
     except KeyError:
-        return "Ponto não encontrado", "Erro: Ponto inválido.", None
-    constantes_ponto = config.get('constantes', CONSTANTES_PADRAO)
-
-    # --- CORREÇÃO DO KEYERROR: Usando as chaves base e saturação individuais ---
-    base_1m = constantes_ponto.get('UMIDADE_BASE_1M', CONSTANTES_PADRAO['UMIDADE_BASE_1M'])
-    base_2m = constantes_ponto.get('UMIDADE_BASE_2M', CONSTANTES_PADRAO['UMIDADE_BASE_2M'])
-    base_3m = constantes_ponto.get('UMIDADE_BASE_3M', CONSTANTES_PADRAO['UMIDADE_BASE_3M'])
-
-    # Lendo saturações individuais (ou default, se não existirem no CONSTANTES_PADRAO - fallback)
-    saturacao_1m = constantes_ponto.get('UMIDADE_SATURACAO_1M', CONSTANTES_PADRAO.get('UMIDADE_SATURACAO_1M', 45.0))
-    saturacao_2m = constantes_ponto.get('UMIDADE_SATURACAO_2M', CONSTANTES_PADRAO.get('UMIDADE_SATURACAO_2M', 45.0))
-    saturacao_3m = constantes_ponto.get('UMIDADE_SATURACAO_3M', CONSTANTES_PADRAO.get('UMIDADE_SATURACAO_3M', 45.0))
-    # --- FIM DA CORREÇÃO ---
-
-    df_completo = pd.read_json(StringIO(dados_json), orient='split');
-    df_completo['timestamp'] = pd.to_datetime(df_completo['timestamp'])
-    df_ponto = df_completo[df_completo['id_ponto'] == id_ponto]
-    if df_ponto.empty: return "Sem dados.", "", id_ponto
-    df_chuva_72h = processamento.calcular_acumulado_72h(df_ponto)
-    if df_chuva_72h.empty: return "Calculando...", "", id_ponto
-    try:
-        ultimo_dado = df_ponto.iloc[-1]
-        ultima_chuva_72h = df_chuva_72h.iloc[-1]['chuva_mm'] if not df_chuva_72h.empty else None
-        umidade_1m_atual = ultimo_dado.get('umidade_1m_perc', None)
-        umidade_2m_atual = ultimo_dado.get('umidade_2m_perc', None)
-        umidade_3m_atual = ultimo_dado.get('umidade_3m_perc', None)
-        if pd.isna(ultima_chuva_72h): ultima_chuva_72h = 0.0
-        if pd.isna(umidade_1m_atual): umidade_1m_atual = base_1m
-        if pd.isna(umidade_2m_atual): umidade_2m_atual = base_2m
-        if pd.isna(umidade_3m_atual): umidade_3m_atual = base_3m
-    except IndexError:
-        return "Dados insuficientes.", "", id_ponto
-
-    # 1. Status Chuva
-    status_chuva_txt, status_chuva_col = processamento.definir_status_chuva(ultima_chuva_72h)
-    risco_chuva = RISCO.get(status_chuva_txt, -1)
-
-    # 2. Status GERAL Umidade (Fluxograma)
-    status_umid_txt, status_umid_col_bootstrap, _ = processamento.definir_status_umidade_hierarquico(
-        umidade_1m_atual, umidade_2m_atual, umidade_3m_atual, base_1m, base_2m, base_3m
-    )
-    risco_umidade = RISCO.get(status_umid_txt, -1)
-
-    # 3. Status GERAL (Max(Chuva, Umidade))
-    risco_geral = max(risco_chuva, risco_umidade)
+        return "Ponto não encontrado", "Erro: Ponto inválido.", None, None, sem_extensao_chuva, sem_extensao_umidade
+    # Métricas derivadas do ponto (calculadas uma única vez por versão dos dados)
+    snapshot = data_source.get_snapshot_da_sessao(dados_sessao)
+    metricas_ponto = processamento.obter_metricas(snapshot)[id_ponto]
+    df_ponto = metricas_ponto.df_ponto
+    if df_ponto.empty: return "Sem dados.", "", id_ponto, None, sem_extensao_chuva, sem_extensao_umidade
+    if metricas_ponto.acumulado_72h.empty:
+        return "Calculando...", "", id_ponto, None, sem_extensao_chuva, sem_extensao_umidade
+
+    # Últimos valores e bases (base dinâmica do último dado, igual ao mapa)
+    ultima_chuva_72h = metricas_ponto.ultima_chuva_72h if metricas_ponto.ultima_chuva_72h is not None else 0.0
+    umidade_1m_atual, umidade_2m_atual, umidade_3m_atual = (metricas_ponto.umidade_1m, metricas_ponto.umidade_2m,
+                                                            metricas_ponto.umidade_3m)
+    base_1m, base_2m, base_3m = metricas_ponto.base_1m, metricas_ponto.base_2m, metricas_ponto.base_3m
+
+    # 1-3. Status Chuva, Status GERAL Umidade (Fluxograma) e Status GERAL (Max(Chuva, Umidade))
+    risco_geral = metricas_ponto.risco_geral
 
     # 4. Texto e Cor do Status Geral
     status_geral_texto, status_geral_cor_bootstrap = mapa_status_cor_geral.get(risco_geral, ("INDEFINIDO", "secondary"))
@@ -231,123 +267,39 @@ def update_specific_dashboard(pathname, dados_json, selected_hours):
             className="shadow h-100 bg-white"), xs=12, md=4, className="mb-4"),
     ]
 
-    # Filtra dados para gráficos
-    PONTOS_POR_HORA = int(60 / (FREQUENCIA_SIMULACAO.total_seconds() / 60))
-    n_pontos_desejados = selected_hours * PONTOS_POR_HORA
-    n_pontos_plot = min(n_pontos_desejados, len(df_ponto))
-    df_ponto_plot = df_ponto.tail(n_pontos_plot);
-    df_chuva_72h_plot = processamento.calcular_acumulado_72h(df_ponto).tail(n_pontos_plot)
-    n_horas_titulo = selected_hours
-
-    # Gráfico de Chuva (Mantido)
-    fig_chuva = make_subplots(specs=[[{"secondary_y": True}]])
-    fig_chuva.add_trace(
-        go.Bar(x=df_ponto_plot['timestamp'], y=df_ponto_plot['chuva_mm'], name='Pluviometria Horária (mm)',
-               marker_color='#2C3E50', opacity=0.8), secondary_y=False)
-    fig_chuva.add_trace(go.Scatter(x=df_chuva_72h_plot['timestamp'], y=df_chuva_72h_plot['chuva_mm'],
-                                   name='Precipitação Acumulada (mm)', mode='lines',
-                                   line=dict(color='#007BFF', width=2.5)), secondary_y=True)
-    fig_chuva.update_layout(title_text=f"Pluviometria - {config['nome']} ({n_horas_titulo}h)",
-                            template=TEMPLATE_GRAFICO_MODERNO,
-                            margin=dict(l=40, r=20, t=50, b=40),
-                            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor='center', x=0.5),
-                            xaxis_title="Data e Hora", yaxis_title="Pluviometria Horária (mm)",
-                            yaxis2_title="Precipitação Acumulada (mm)", hovermode="x unified", bargap=0.1)
-    fig_chuva.update_yaxes(title_text="Pluviometria Horária (mm)", secondary_y=False);
-    fig_chuva.update_yaxes(title_text="Acumulada (mm)", secondary_y=True)
-
-    # Gráfico de Umidade
-    df_umidade = df_ponto_plot.melt(id_vars=['timestamp'],
-                                    value_vars=['umidade_1m_perc', 'umidade_2m_perc', 'umidade_3m_perc'],
-                                    var_name='Sensor', value_name='Umidade (%)')
-
-    df_umidade['Sensor'] = df_umidade['Sensor'].replace({
-        'umidade_1m_perc': '1m',
-        'umidade_2m_perc': '2m',
-        'umidade_3m_perc': '3m'
-    })
-
-    fig_umidade = px.line(df_umidade, x='timestamp', y='Umidade (%)', color='Sensor',
-                          title=f"Variação da Umidade - {config['nome']} ({n_horas_titulo}h)",
-                          color_discrete_map=CORES_UMIDADE)  # Usa mapa de cores
-    fig_umidade.update_traces(line=dict(width=3));
-    fig_umidade.update_layout(template=TEMPLATE_GRAFICO_MODERNO, margin=dict(l=40, r=20, t=40, b=50),
-                              legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5))
+    # Mesmo ponto e período já desenhados: só acrescenta as leituras novas aos traços existentes
+    # (as figuras são reconstruídas apenas ao trocar de ponto/período ou quando a janela exige)
+    if (estado_graficos and estado_graficos.get('ponto') == id_ponto and estado_graficos.get('horas') == selected_hours
+            and dash.ctx.outputs_list[4]):
+        resultado = processamento.extensao_graficos(metricas_ponto, estado_graficos['estado'])
+        if resultado is not None:
+            extensao_chuva, extensao_umidade, novo_estado = resultado
+            return (layout_cards, dash.no_update, id_ponto, {**estado_graficos, 'estado': novo_estado},
+                    [extensao_chuva or dash.no_update if item['id']['ponto'] == id_ponto else dash.no_update
+                     for item in dash.ctx.outputs_list[4]],
+                    [extensao_umidade or dash.no_update if item['id']['ponto'] == id_ponto else dash.no_update
+                     for item in dash.ctx.outputs_list[5]])
+
+    # Figuras reaproveitadas entre sessões na mesma (ponto, período, versão dos dados)
+    fig_chuva, fig_umidade, estado = cache_figuras.CACHE_FIGURAS.obter(
+        ('especifico', id_ponto, selected_hours, snapshot.versao),
+        lambda: _criar_figuras_ponto(config, metricas_ponto, selected_hours))
 
     layout_graficos = [
-        dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(figure=fig_chuva)), className="shadow-sm"), width=12, className="mb-4"),
-        dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(figure=fig_umidade)), className="shadow-sm"), width=12,
+        dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(id={'tipo': 'grafico-chuva-especifico', 'ponto': id_ponto},
+                                                figure=fig_chuva)), className="shadow-sm"),
+                width=12, className="mb-4"),
+        dbc.Col(dbc.Card(dbc.CardBody(dcc.Graph(id={'tipo': 'grafico-umidade-especifico', 'ponto': id_ponto},
+                                                figure=fig_umidade)), className="shadow-sm"), width=12,
                 className="mb-4"), ]
 
-    return layout_cards, layout_graficos, id_ponto
-
-
-# Callback 2: Gerar o PDF (Mantido)
-@app.callback(
-    Output('download-pdf-especifico', 'data'),
-    Input('btn-pdf-especifico', 'n_clicks'),
-    [State('pdf-date-picker', 'start_date'), State('pdf-date-picker', 'end_date'),
-     State('store-id-ponto-ativo', 'data'), State('store-dados-sessao', 'data')]
-)
-def gerar_download_pdf_especifico(n_clicks, start_date_str, end_date_str, id_ponto, dados_json):
-    if not n_clicks or not id_ponto or not dados_json: return dash.no_update
-
-    try:
-        config = PONTOS_DE_ANALISE[id_ponto]
-    except KeyError:
-        print("Erro PDF: id_ponto não encontrado");
-        return dash.no_update
-
-    # Lendo as chaves de base e saturação individuais (corrigido do KeyError anterior)
-    constantes_ponto = config.get('constantes', CONSTANTES_PADRAO)
-    base_1m = constantes_ponto.get('UMIDADE_BASE_1M', CONSTANTES_PADRAO['UMIDADE_BASE_1M'])
-    base_2m = constantes_ponto.get('UMIDADE_BASE_2M', CONSTANTES_PADRAO['UMIDADE_BASE_2M'])
-    base_3m = constantes_ponto.get('UMIDADE_BASE_3M', CONSTANTES_PADRAO['UMIDADE_BASE_3M'])
-    saturacao_1m = constantes_ponto.get('UMIDADE_SATURACAO_1M', CONSTANTES_PADRAO.get('UMIDADE_SATURACAO_1M', 45.0))
-    saturacao_2m = constantes_ponto.get('UMIDADE_SATURACAO_2M', CONSTANTES_PADRAO.get('UMIDADE_SATURACAO_2M', 45.0))
-    saturacao_3m = constantes_ponto.get('UMIDADE_SATURACAO_3M', CONSTANTES_PADRAO.get('UMIDADE_SATURACAO_3M', 45.0))
-
-    df_completo = pd.read_json(StringIO(dados_json), orient='split');
-    df_completo['timestamp'] = pd.to_datetime(df_completo['timestamp'])
-    df_ponto = df_completo[df_completo['id_ponto'] == id_ponto]
-    try:
-        start_date_dt = pd.to_datetime(start_date_str).tz_localize('UTC');
-        end_date_dt = (
-                pd.to_datetime(end_date_str) + pd.Timedelta(days=1)).tz_localize('UTC')
-    except Exception as e:
-        print(f"Erro datas PDF: {e}");
-        return dash.no_update
-    df_periodo = df_ponto[(df_ponto['timestamp'] >= start_date_dt) & (df_ponto['timestamp'] < end_date_dt)].copy()
-    if df_periodo.empty: print("Sem dados período PDF."); return dash.no_update
-    df_chuva_72h_pdf = processamento.calcular_acumulado_72h(df_periodo)
-    if df_chuva_72h_pdf.empty: print("Sem chuva período PDF."); return dash.no_update
-    try:
-        ultimo_dado_pdf = df_periodo.iloc[-1]
-        ultima_chuva_pdf = df_chuva_72h_pdf.iloc[-1]['chuva_mm'] if not df_chuva_72h_pdf.empty else None
-        umidade_1m_pdf = ultimo_dado_pdf.get('umidade_1m_perc', None)
-        umidade_2m_pdf = ultimo_dado_pdf.get('umidade_2m_perc', None)
-        umidade_3m_pdf = ultimo_dado_pdf.get('umidade_3m_perc', None)
-        if pd.isna(ultima_chuva_pdf): ultima_chuva_pdf = 0.0
-        if pd.isna(umidade_1m_pdf): umidade_1m_pdf = base_1m
-        if pd.isna(umidade_2m_pdf): umidade_2m_pdf = base_2m
-        if pd.isna(umidade_3m_pdf): umidade_3m_pdf = base_3m
-    except IndexError:
-        print("Erro PDF: Dados insuficientes para iloc[-1].");
-        return dash.no_update
+    return (layout_cards, layout_graficos, id_ponto, {'ponto': id_ponto, 'horas': selected_hours, 'estado': estado},
+            sem_extensao_chuva, sem_extensao_umidade)
 
-    status_chuva_txt_pdf, _ = processamento.definir_status_chuva(ultima_chuva_pdf)
-    status_umid_txt_pdf, _, _ = processamento.definir_status_umidade_hierarquico(
-        umidade_1m_pdf, umidade_2m_pdf, umidade_3m_pdf, base_1m, base_2m, base_3m
-    )
-    risco_umidade_pdf = RISCO.get(status_umid_txt_pdf, -1)
-    risco_chuva_pdf = RISCO.get(status_chuva_txt_pdf, -1)
-    risco_geral_pdf = max(risco_chuva_pdf, risco_umidade_pdf)
-    status_geral_pdf_texto, status_geral_pdf_cor = mapa_status_cor_geral.get(risco_geral_pdf,
-                                                                             ("INDEFINIDO", "secondary"))
-    if risco_umidade_pdf > 0 and risco_umidade_pdf >= risco_chuva_pdf:
-        status_geral_pdf_texto, status_geral_pdf_cor, _ = processamento.STATUS_MAP_HIERARQUICO[risco_umidade_pdf]
 
-    # Cria figuras para PDF
+# --- Relatório PDF do período (montado em segundo plano por relatorios.FILA_RELATORIOS) ---
+def criar_figuras_relatorio(df_periodo, df_chuva_72h_pdf):
+    """ Figuras Plotly (chuva, umidade) do período, para o PDF renderizado pelo Kaleido. """
     df_periodo_plot = df_periodo.copy();
     df_chuva_72h_plot = df_chuva_72h_pdf.copy()
     formato_data_pdf = '%d/%m/%y %Hh';
@@ -390,10 +342,122 @@ def gerar_download_pdf_especifico(n_clicks, start_date_str, end_date_str, id_pon
                                   xaxis_title=None, xaxis_tickangle=-45,
                                   margin=dict(b=80, t=80))
 
+    return fig_chuva_pdf, fig_umidade_pdf
+
+
+def recortar_periodo(metricas_ponto, start_date_str, end_date_str):
+    """ (leituras, acumulado 72h) do ponto em [start_date 00:00, end_date + 1 dia) UTC: tudo o que vai para o PDF. """
+    df_ponto = metricas_ponto.df_ponto
+    start_date_dt = pd.to_datetime(start_date_str).tz_localize('UTC');
+    end_date_dt = (
+            pd.to_datetime(end_date_str) + pd.Timedelta(days=1)).tz_localize('UTC')
+    df_periodo = df_ponto[(df_ponto['timestamp'] >= start_date_dt) & (df_ponto['timestamp'] < end_date_dt)].copy()
+    # Acumulado 72h da tabela de métricas (inclui a chuva anterior ao início do período)
+    acumulado_72h = metricas_ponto.acumulado_72h
+    df_chuva_72h_pdf = acumulado_72h[(acumulado_72h['timestamp'] >= start_date_dt) &
+                                     (acumulado_72h['timestamp'] < end_date_dt)].copy()
+    return df_periodo, df_chuva_72h_pdf
+
+
+def gerar_relatorio_pdf(id_ponto, metricas_ponto, start_date_str, end_date_str, progresso=None,
+                        agregacao_horaria=False):
+    """ Bytes do relatório PDF do ponto no período [start_date, end_date], ou None se não há dados. """
+    progresso = progresso or (lambda percentual, mensagem: None)
+    progresso(5, "Preparando dados")
+    config = PONTOS_DE_ANALISE[id_ponto]
+
+    df_periodo, df_chuva_72h_pdf = recortar_periodo(metricas_ponto, start_date_str, end_date_str)
+    if df_periodo.empty: print("Sem dados período PDF."); return None
+    if df_chuva_72h_pdf.empty: print("Sem chuva período PDF."); return None
+
+    # Status no último dado do período com as mesmas regras da MetricasPonto (base dinâmica da
+    # leitura): se o período chega à leitura mais recente, coincide com o que a página mostra
+    ultima_chuva_pdf = df_chuva_72h_pdf.iloc[-1]['chuva_mm']
+    if pd.isna(ultima_chuva_pdf): ultima_chuva_pdf = 0.0
+    umidades_pdf, bases_pdf = processamento.umidades_e_bases(df_periodo.iloc[-1],
+                                                             config.get('constantes', CONSTANTES_PADRAO))
+    status_chuva_txt_pdf, _ = processamento.definir_status_chuva(ultima_chuva_pdf)
+    status_umid_txt_pdf, _, _ = processamento.definir_status_umidade_hierarquico(*umidades_pdf, *bases_pdf)
+    risco_geral_pdf = max(RISCO.get(status_chuva_txt_pdf, -1), RISCO.get(status_umid_txt_pdf, -1))
+    status_geral_pdf_texto, status_geral_pdf_cor = mapa_status_cor_geral.get(risco_geral_pdf,
+                                                                             ("INDEFINIDO", "secondary"))
+
+    # Figuras Plotly só para o renderizador 'kaleido' (o nativo desenha direto dos DataFrames)
+    progresso(15, "Gerando gráficos")
+    fig_chuva_pdf, fig_umidade_pdf = None, None
+    if gerador_pdf.RENDERIZADOR_GRAFICOS == 'kaleido':
+        fig_chuva_pdf, fig_umidade_pdf = criar_figuras_relatorio(df_periodo, df_chuva_72h_pdf)
+
     # Geração do PDF
-    pdf_bytes = gerador_pdf.criar_relatorio_em_memoria(df_periodo, fig_chuva_pdf, fig_umidade_pdf,
-                                                       status_geral_pdf_texto, status_geral_pdf_cor)
+    return gerador_pdf.criar_relatorio_em_memoria(df_periodo, fig_chuva_pdf, fig_umidade_pdf,
+                                                  status_geral_pdf_texto, status_geral_pdf_cor, progresso=progresso,
+                                                  agregacao_horaria=agregacao_horaria,
+                                                  df_acumulado_72h=df_chuva_72h_pdf)
+
+
+def _barra_progresso_pdf(estado):
+    if estado['estado'] == 'erro':
+        return dbc.Alert(estado['mensagem'], color="danger", className="mt-3 mb-0 small")
+    return html.Div([
+        dbc.Progress(value=estado['progresso'], label=f"{estado['progresso']}%", striped=True, animated=True,
+                     className="mt-3"),
+        html.Div(estado['mensagem'], className="small text-muted mt-1")])
+
+
+def _download_pdf(chave, id_ponto):
+    pdf_bytes = relatorios.FILA_RELATORIOS.obter_pdf(chave)
+    if pdf_bytes is None: return dash.no_update
     pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
     nome_arquivo = f"relatorio_{id_ponto}_{datetime.now().strftime('%Y%m%d')}.pdf"
     return dict(content=pdf_base64, filename=nome_arquivo, type="application/pdf", base64=True)
 
+
+# Callback 2: Gerar o PDF (job em segundo plano + acompanhamento pelo intervalo-job-pdf)
+@app.callback(
+    Output('download-pdf-especifico', 'data'),
+    Output('store-job-pdf', 'data'),
+    Output('intervalo-job-pdf', 'disabled'),
+    Output('progresso-pdf', 'children'),
+    Input('btn-pdf-especifico', 'n_clicks'),
+    Input('intervalo-job-pdf', 'n_intervals'),
+    [State('pdf-date-picker', 'start_date'), State('pdf-date-picker', 'end_date'),
+     State('pdf-tabela-horaria', 'value'), State('store-id-ponto-ativo', 'data'), State('store-dados-sessao', 'data'),
+     State('store-job-pdf', 'data')]
+)
+def gerar_download_pdf_especifico(n_clicks, n_intervals, start_date_str, end_date_str, agregacao_horaria, id_ponto,
+                                  dados_sessao, job_pdf):
+    sem_mudanca = (dash.no_update, dash.no_update, dash.no_update, dash.no_update)
+
+    # Tick do acompanhamento: o job pode estar rodando em qualquer worker (estado em disco)
+    if dash.ctx.triggered_id == 'intervalo-job-pdf':
+        if not job_pdf: return dash.no_update, None, True, None
+        estado = relatorios.FILA_RELATORIOS.estado(job_pdf['chave'])
+        if estado['estado'] == 'concluido':
+            return _download_pdf(job_pdf['chave'], job_pdf['ponto']), None, True, None
+        if estado['estado'] == 'erro':
+            return dash.no_update, None, True, _barra_progresso_pdf(estado)
+        return dash.no_update, dash.no_update, dash.no_update, _barra_progresso_pdf(estado)
+
+    if not n_clicks or not id_ponto or not dados_sessao: return sem_mudanca
+    if id_ponto not in PONTOS_DE_ANALISE:
+        print("Erro PDF: id_ponto não encontrado");
+        return sem_mudanca
+    try:
+        pd.to_datetime(start_date_str), pd.to_datetime(end_date_str)
+    except Exception as e:
+        print(f"Erro datas PDF: {e}");
+        return sem_mudanca
+
+    # Mesmo ponto, período, tipo de tabela e mesmos dados no período: o PDF já montado é servido direto do cache
+    snapshot = data_source.get_snapshot_da_sessao(dados_sessao)
+    agregacao_horaria = bool(agregacao_horaria)
+    metricas_ponto = processamento.obter_metricas(snapshot)[id_ponto]
+    chave = relatorios.chave_relatorio(id_ponto, start_date_str, end_date_str,
+                                       *recortar_periodo(metricas_ponto, start_date_str, end_date_str),
+                                       data_source.identidade_dados(), agregacao_horaria)
+    estado = relatorios.FILA_RELATORIOS.submeter(
+        chave, lambda progresso: gerar_relatorio_pdf(id_ponto, metricas_ponto, start_date_str, end_date_str,
+                                                     progresso, agregacao_horaria))
+    if estado['estado'] == 'concluido':
+        return _download_pdf(chave, id_ponto), None, True, None
+    return dash.no_update, {'chave': chave, 'ponto': id_ponto}, False, _barra_progresso_pdf(estado)
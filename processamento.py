@@ -1,7 +1,13 @@
 # processamento.py (CORRIGIDO - Delta de umidade para 3%)
 
 import pandas as pd
+import numpy as np
+import base64
 import datetime
+import threading
+from collections import OrderedDict
+
+from data_source import PONTOS_DE_ANALISE, CONSTANTES_PADRAO, COLUNAS_FINAIS
 
 # --- Constantes para a Chuva (Mantidas) ---
 CHUVA_LIMITE_VERDE = 50.0
@@ -134,4 +140,456 @@ def definir_status_umidade_individual(umidade_atual, umidade_base, risco_nivel):
             return "green"  # Verde/Livre
 
     except Exception:
-        return "grey"
\ No newline at end of file
+        return "grey"
+
+
+# ==============================================================================
+# --- VERSÕES VETORIZADAS DOS STATUS (SÉRIES INTEIRAS, SEM LOOP PYTHON) ---
+# ==============================================================================
+# Mesmas regras e limiares das funções escalares acima; NaN/None -> "SEM DADOS" / "grey".
+_TEXTOS_STATUS_CHUVA = np.array(["SEM DADOS", "LIVRE", "ATENÇÃO", "ALERTA", "PARALIZAÇÃO"], dtype=object)
+_CORES_STATUS_CHUVA = np.array(["secondary", "success", "warning", "orange", "danger"], dtype=object)
+
+
+def calcular_risco_chuva_vetorizado(chuva_mm):
+    """ Nível de risco da chuva 72h (-1 a 3) para cada posição do array. """
+    chuva = np.asarray(chuva_mm, dtype=float)
+    return np.select(
+        [np.isnan(chuva), chuva > CHUVA_LIMITE_LARANJA, chuva > CHUVA_LIMITE_AMARELO, chuva > CHUVA_LIMITE_VERDE],
+        [-1, 3, 2, 1],
+        default=0
+    )
+
+
+def definir_status_chuva_vetorizado(chuva_mm):
+    """
+    Array -> (textos, cores_badge) com a mesma classificação de definir_status_chuva.
+    """
+    indices = calcular_risco_chuva_vetorizado(chuva_mm) + 1
+    return _TEXTOS_STATUS_CHUVA[indices], _CORES_STATUS_CHUVA[indices]
+
+
+# Linhas de STATUS_MAP_HIERARQUICO ordenadas por risco (-1, 0, 1, 2, 3): índice = risco + 1
+_TABELA_STATUS_HIERARQUICO = np.array([STATUS_MAP_HIERARQUICO[r] for r in (-1, 0, 1, 2, 3)], dtype=object)
+
+
+def calcular_risco_umidade_vetorizado(umidade_1m, umidade_2m, umidade_3m, base_1m, base_2m, base_3m):
+    """
+    Nível de risco do fluxograma (-1 a 3) para cada posição dos arrays
+    (as bases podem ser escalares ou séries, ex.: base dinâmica).
+    """
+    u1, u2, u3, b1, b2, b3 = (np.asarray(v, dtype=float)
+                              for v in (umidade_1m, umidade_2m, umidade_3m, base_1m, base_2m, base_3m))
+    sem_dados = np.isnan(u1) | np.isnan(u2) | np.isnan(u3) | np.isnan(b1) | np.isnan(b2) | np.isnan(b3)
+    s1 = (u1 - b1) >= DELTA_TRIGGER_UMIDADE
+    s2 = (u2 - b2) >= DELTA_TRIGGER_UMIDADE
+    s3 = (u3 - b3) >= DELTA_TRIGGER_UMIDADE
+    return np.select(
+        [sem_dados,
+         s1 & s2 & s3,
+         (s1 & s2 & ~s3) | (~s1 & s2 & s3),
+         (s1 & ~s2 & ~s3) | (~s1 & ~s2 & s3)],
+        [-1, 3, 2, 1],
+        default=0
+    )
+
+
+def definir_status_umidade_hierarquico_vetorizado(umidade_1m, umidade_2m, umidade_3m, base_1m, base_2m, base_3m):
+    """
+    Arrays -> (textos, cores_badge, cores_barra_css), equivalente a definir_status_umidade_hierarquico.
+    """
+    riscos = calcular_risco_umidade_vetorizado(umidade_1m, umidade_2m, umidade_3m, base_1m, base_2m, base_3m)
+    linhas = _TABELA_STATUS_HIERARQUICO[riscos + 1]
+    return linhas[..., 0], linhas[..., 1], linhas[..., 2]
+
+
+def definir_status_umidade_individual_vetorizado(umidade_atual, umidade_base, risco_nivel):
+    """
+    Arrays -> cores CSS por sensor, equivalente a definir_status_umidade_individual
+    ('risco_nivel' pode ser escalar ou array).
+    """
+    umidade = np.asarray(umidade_atual, dtype=float)
+    base = np.asarray(umidade_base, dtype=float)
+    risco = np.asarray(risco_nivel)
+    ativo = (umidade - base) >= DELTA_TRIGGER_UMIDADE
+    cores_ativo = np.select([risco == 2, risco == 3], ["#fd7e14", "#dc3545"], default="#FFD700")
+    return np.select(
+        [np.isnan(umidade) | np.isnan(base), ativo],
+        ["grey", cores_ativo],
+        default="green"
+    ).astype(object)
+
+
+def calcular_linha_do_tempo_status(df_ponto, acumulado_72h):
+    """
+    Linha do tempo de status de um ponto (uma linha por leitura), para gráficos,
+    backtests e relatórios: acumulado 72h, status de chuva, status de umidade e risco geral.
+    """
+    colunas = ['timestamp', 'chuva_72h_mm', 'status_chuva', 'status_umidade', 'risco_geral']
+    if df_ponto.empty or acumulado_72h.empty:
+        return pd.DataFrame(columns=colunas)
+    chuva_72h = acumulado_72h['chuva_mm'].to_numpy(dtype=float)
+    riscos_chuva = calcular_risco_chuva_vetorizado(chuva_72h)
+    status_chuva, _ = definir_status_chuva_vetorizado(chuva_72h)
+    riscos_umidade = calcular_risco_umidade_vetorizado(
+        df_ponto['umidade_1m_perc'], df_ponto['umidade_2m_perc'], df_ponto['umidade_3m_perc'],
+        df_ponto['base_1m'], df_ponto['base_2m'], df_ponto['base_3m'])
+    status_umidade = _TABELA_STATUS_HIERARQUICO[riscos_umidade + 1, 0]
+    return pd.DataFrame({
+        'timestamp': acumulado_72h['timestamp'].to_numpy(),
+        'chuva_72h_mm': chuva_72h,
+        'status_chuva': status_chuva,
+        'status_umidade': status_umidade,
+        'risco_geral': np.maximum(riscos_chuva, riscos_umidade),
+    }, columns=colunas)
+
+
+# ==============================================================================
+# --- MÉTRICAS DERIVADAS (CALCULADAS UMA VEZ POR VERSÃO DOS DADOS) ---
+# ==============================================================================
+class MetricasPonto:
+    """
+    Tabela de métricas derivadas de um ponto para uma versão dos dados:
+    série do acumulado 72h, últimos valores, status de chuva, status hierárquico
+    de umidade e risco geral. Os callbacks apenas leem estes valores.
+    """
+
+    def __init__(self, id_ponto, df_ponto, acumulado_72h, ultima_chuva_72h,
+                 umidades, bases, status_chuva, status_umidade):
+        self.id_ponto = id_ponto
+        self.df_ponto = df_ponto
+        self.tem_dados = not df_ponto.empty
+        self.acumulado_72h = acumulado_72h  # DataFrame ['timestamp', 'chuva_mm']
+        self.ultima_chuva_72h = ultima_chuva_72h  # None se indisponível
+        self.umidade_1m, self.umidade_2m, self.umidade_3m = umidades
+        self.base_1m, self.base_2m, self.base_3m = bases
+        self.status_chuva = status_chuva  # (texto, cor_badge)
+        self.status_umidade = status_umidade  # (texto, cor_badge, cor_barra_css)
+        self.risco_chuva = RISCO_MAP.get(status_chuva[0], -1)
+        self.risco_umidade = RISCO_MAP.get(status_umidade[0], -1)
+        self.risco_geral = max(self.risco_chuva, self.risco_umidade)
+        self.status_geral = STATUS_MAP_HIERARQUICO[self.risco_geral][:2]  # (texto, cor_badge)
+
+
+def _bases_estaticas(constantes):
+    return [constantes.get(chave, CONSTANTES_PADRAO[chave])
+            for chave in ('UMIDADE_BASE_1M', 'UMIDADE_BASE_2M', 'UMIDADE_BASE_3M')]
+
+
+def umidades_e_bases(dado, constantes=None):
+    """
+    ([umidade 1m/2m/3m], [base 1m/2m/3m]) de uma leitura: a base é a dinâmica da própria
+    leitura ('base_*') ou, sem ela, a estática do ponto; umidade ausente vale a base.
+    """
+    bases = _bases_estaticas(constantes or CONSTANTES_PADRAO)
+    umidades = list(bases)
+    for i, sufixo in enumerate(('1m', '2m', '3m')):
+        base = dado.get(f'base_{sufixo}', bases[i])
+        if not pd.isna(base):
+            bases[i] = float(base)
+        umidade = dado.get(f'umidade_{sufixo}_perc', bases[i])
+        umidades[i] = bases[i] if pd.isna(umidade) else float(umidade)
+    return umidades, bases
+
+
+def calcular_metricas_ponto(id_ponto, df_ponto, constantes=None):
+    """ Calcula a MetricasPonto de um ponto (umidade avaliada sobre a base dinâmica do último dado). """
+    constantes = constantes or CONSTANTES_PADRAO
+    bases = _bases_estaticas(constantes)
+    umidades = list(bases)
+    acumulado_72h = pd.DataFrame(columns=['timestamp', 'chuva_mm'])
+    ultima_chuva_72h = None
+    status_chuva = ("SEM DADOS", "secondary")
+    status_umidade = STATUS_MAP_HIERARQUICO[-1]
+
+    if df_ponto.empty:
+        return MetricasPonto(id_ponto, df_ponto, acumulado_72h, ultima_chuva_72h, umidades, bases,
+                             status_chuva, status_umidade)
+    try:
+        acumulado_72h = calcular_acumulado_72h(df_ponto)
+        if not acumulado_72h.empty and not pd.isna(acumulado_72h.iloc[-1]['chuva_mm']):
+            ultima_chuva_72h = float(acumulado_72h.iloc[-1]['chuva_mm'])
+            status_chuva = definir_status_chuva(ultima_chuva_72h)
+
+        # Base dinâmica do último dado (se a fonte não tiver 'base_*', fica a base estática)
+        umidades, bases = umidades_e_bases(df_ponto.iloc[-1], constantes)
+        status_umidade = definir_status_umidade_hierarquico(*umidades, *bases)
+    except Exception as e:
+        print(f"ERRO ao calcular métricas para {id_ponto}: {e}")
+        status_chuva = ("ERRO", "danger")
+        status_umidade = ("ERRO", "danger", "bg-danger")
+    return MetricasPonto(id_ponto, df_ponto, acumulado_72h, ultima_chuva_72h, umidades, bases,
+                         status_chuva, status_umidade)
+
+
+_CACHE_METRICAS = OrderedDict()
+_LOCK_METRICAS = threading.Lock()
+MAX_VERSOES_METRICAS = 8
+_METRICAS_SEM_DADOS = {}
+
+
+def obter_metricas(snapshot):
+    """
+    Retorna {id_ponto: MetricasPonto} para o snapshot, calculando apenas na primeira
+    chamada de cada versão (as demais sessões/callbacks reutilizam o resultado).
+    Pontos cujo último dado passou do limite de obsolescência (snapshot.pontos_obsoletos)
+    saem como "SEM DADOS"; até lá, valem os últimos dados recebidos.
+    """
+    with _LOCK_METRICAS:
+        metricas = _CACHE_METRICAS.get(snapshot.versao)
+        if metricas is None:
+            metricas = {id_ponto: calcular_metricas_ponto(id_ponto, snapshot.df_ponto(id_ponto),
+                                                          config.get('constantes', CONSTANTES_PADRAO))
+                        for id_ponto, config in PONTOS_DE_ANALISE.items()}
+            _CACHE_METRICAS[snapshot.versao] = metricas
+            while len(_CACHE_METRICAS) > MAX_VERSOES_METRICAS:
+                _CACHE_METRICAS.popitem(last=False)
+    obsoletos = snapshot.pontos_obsoletos()
+    if obsoletos:
+        metricas = dict(metricas)
+        for id_ponto in obsoletos & metricas.keys():
+            metricas[id_ponto] = _metricas_sem_dados(id_ponto)
+    return metricas
+
+
+def _metricas_sem_dados(id_ponto):
+    """ MetricasPonto vazia ("SEM DADOS") de um ponto, reaproveitada entre chamadas. """
+    metricas_ponto = _METRICAS_SEM_DADOS.get(id_ponto)
+    if metricas_ponto is None:
+        constantes = PONTOS_DE_ANALISE.get(id_ponto, {}).get('constantes', CONSTANTES_PADRAO)
+        metricas_ponto = calcular_metricas_ponto(id_ponto, pd.DataFrame(columns=COLUNAS_FINAIS), constantes)
+        _METRICAS_SEM_DADOS[id_ponto] = metricas_ponto
+    return metricas_ponto
+
+
+# ==============================================================================
+# --- REDUÇÃO DE PONTOS PARA OS GRÁFICOS (ANTES DE MONTAR AS FIGURAS) ---
+# ==============================================================================
+# Um gráfico não mostra mais pontos do que tem de pixels na horizontal: com 14 dias
+# de leituras (2016 por série) o excedente só pesa no JSON e no navegador.
+# - Linhas (umidade e acumulado 72h): LTTB, que mantém os picos e vales da série
+#   (os valores escolhidos são leituras reais, então nenhum cruzamento de limite some);
+# - Barras de chuva: soma por balde de leituras consecutivas, preservando o total.
+PIXELS_POR_BARRA = 2
+COLUNAS_UMIDADE_GRAFICO = {'umidade_1m_perc': '1m', 'umidade_2m_perc': '2m', 'umidade_3m_perc': '3m'}
+
+
+def indices_lttb(x, y, n_max):
+    """
+    Índices (em ordem crescente) dos até 'n_max' pontos escolhidos pelo
+    Largest-Triangle-Three-Buckets. O primeiro e o último ponto são sempre mantidos.
+    """
+    n = len(y)
+    if n <= n_max or n_max < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    limites = np.linspace(1, n - 1, n_max - 1).astype(np.int64)  # n_max-2 baldes entre o 1º e o último ponto
+    indices = np.empty(n_max, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_max - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        fim_seguinte = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fim:fim_seguinte].mean()
+        media_y = y[fim:fim_seguinte].mean()
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reduzir_linha(df, coluna, n_max):
+    """ Linhas de 'df' (colunas 'timestamp' e 'coluna') escolhidas pelo LTTB; NaN são descartados. """
+    df = df[df[coluna].notna()]
+    if len(df) <= n_max:
+        return df
+    x = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    return df.iloc[indices_lttb(x, df[coluna].to_numpy(dtype=np.float64), n_max)]
+
+
+def somar_em_baldes(df, coluna, n_max):
+    """
+    Agrupa as linhas consecutivas de 'df' em no máximo 'n_max' baldes, somando 'coluna'
+    (o total do período não muda). O timestamp de cada balde é o da sua primeira leitura.
+    """
+    n = len(df)
+    if n <= n_max or n_max < 1:
+        return df[['timestamp', coluna]]
+    inicios = np.arange(0, n, -(-n // n_max))
+    somas = np.add.reduceat(np.nan_to_num(df[coluna].to_numpy(dtype=np.float64)), inicios)
+    return pd.DataFrame({'timestamp': df['timestamp'].to_numpy()[inicios], coluna: somas})
+
+
+def reduzir_para_grafico(df_ponto_plot, df_acumulado_plot, largura_px, nome_valor_umidade):
+    """
+    Séries prontas para as figuras de um ponto, limitadas à largura do gráfico:
+    (barras de chuva, acumulado 72h, umidade em formato longo com 'Sensor' e 'nome_valor_umidade').
+    """
+    df_barras = somar_em_baldes(df_ponto_plot, 'chuva_mm', max(1, largura_px // PIXELS_POR_BARRA))
+    df_acumulado = reduzir_linha(df_acumulado_plot, 'chuva_mm', largura_px)
+    partes_umidade = []
+    for coluna, sensor in COLUNAS_UMIDADE_GRAFICO.items():
+        df_sensor = reduzir_linha(df_ponto_plot[['timestamp', coluna]], coluna, largura_px)
+        partes_umidade.append(pd.DataFrame({'timestamp': df_sensor['timestamp'].to_numpy(), 'Sensor': sensor,
+                                            nome_valor_umidade: df_sensor[coluna].to_numpy()}))
+    return df_barras, df_acumulado, pd.concat(partes_umidade, ignore_index=True)
+
+
+# --- Atualização incremental dos gráficos (extendData) ---
+# Entre uma reconstrução e outra o navegador só recebe o que há de novo em cada traço
+# ('extendData' do dcc.Graph, com 'maxPoints' descartando o que saiu da janela).
+# Traços reduzidos recebem as leituras novas agrupadas como na redução (soma do balde
+# nas barras, leitura mais extrema do grupo nas linhas); o resto que não fecha um grupo
+# espera o próximo ciclo (cursor por traço). Quando o grupo não cobre exatamente as
+# leituras de um ponto antigo (LTTB), a janela deriva aos poucos: passando de
+# DERIVA_MAXIMA_JANELA do período, a figura é reconstruída.
+DERIVA_MAXIMA_JANELA = 0.02
+
+
+def _valores_json(valores):
+    """ Lista de floats (None no lugar de NaN) para o JSON das figuras. """
+    return [None if np.isnan(v) else v for v in valores.tolist()]
+
+
+def figura_para_extender(figura):
+    """
+    figura.to_dict() com x/y de cada traço em listas comuns: o plotly.js não estende
+    os arrays tipados (base64) em que o Plotly serializa os arrays numpy.
+    """
+    figura_dict = figura.to_dict()
+    for traco in figura_dict['data']:
+        for eixo in ('x', 'y'):
+            valores = traco.get(eixo)
+            if isinstance(valores, dict) and 'bdata' in valores:
+                valores = np.frombuffer(base64.b64decode(valores['bdata']), dtype=valores['dtype'])
+            if not isinstance(valores, np.ndarray):
+                continue
+            if valores.dtype.kind == 'M':
+                traco[eixo] = np.datetime_as_string(valores).tolist()
+            elif valores.dtype.kind == 'f':
+                traco[eixo] = _valores_json(valores)
+            else:
+                traco[eixo] = valores.tolist()
+    return figura_dict
+
+
+def _timestamps_ms(serie_timestamp):
+    return serie_timestamp.to_numpy(dtype='datetime64[ns]').astype(np.int64) // 1_000_000
+
+
+def _indices_tracos(fig_chuva, fig_umidade):
+    """
+    Índice de cada série (barras, acumulado, umidade 1m/2m/3m) entre os traços da sua figura,
+    ou None se ela não virou traço (o px.line omite o sensor sem nenhum valor na janela).
+    """
+    tipos_chuva = [traco.type for traco in fig_chuva.data]
+    nomes_umidade = [traco.name for traco in fig_umidade.data]
+    return [tipos_chuva.index('bar') if 'bar' in tipos_chuva else None,
+            tipos_chuva.index('scatter') if 'scatter' in tipos_chuva else None] + \
+           [nomes_umidade.index(sensor) if sensor in nomes_umidade else None
+            for sensor in COLUNAS_UMIDADE_GRAFICO.values()]
+
+
+def estado_graficos(df_ponto_plot, df_acumulado_plot, n_pontos_desejados, largura_px,
+                    df_barras, df_acumulado, df_umidade, fig_chuva, fig_umidade):
+    """
+    Estado (JSON) das figuras recém-montadas de um ponto, guardado no store da página.
+    Recebe as séries da janela antes e depois de reduzir_para_grafico e as figuras montadas
+    com elas, e guarda, por série (barras, acumulado, umidade 1m/2m/3m), o índice do traço na
+    figura, o cursor (epoch ms da última leitura incorporada), os pontos desenhados, o
+    maxPoints, o limite de pontos e quantas leituras entram por ponto.
+    """
+    n_janela = len(df_ponto_plot)
+    cursor_ms = int(_timestamps_ms(df_ponto_plot['timestamp'])[-1]) if n_janela else None
+    limite_barras = max(1, largura_px // PIXELS_POR_BARRA)
+    series = [(n_janela, len(df_barras), limite_barras, True),
+              (int(df_acumulado_plot['chuva_mm'].notna().sum()), len(df_acumulado), largura_px, False)] + \
+             [(int(df_ponto_plot[coluna].notna().sum()), int((df_umidade['Sensor'] == sensor).sum()), largura_px, False)
+              for coluna, sensor in COLUNAS_UMIDADE_GRAFICO.items()]
+    tracos = []
+    for (n_leituras, comprimento, limite, barras), indice in zip(series, _indices_tracos(fig_chuva, fig_umidade)):
+        if comprimento < n_leituras:
+            # Reduzido: o número de pontos fica fixo e as leituras novas entram agrupadas
+            por_ponto = -(-n_leituras // limite) if barras else max(1, round(n_leituras / comprimento))
+            max_pontos, fator = comprimento, n_leituras / comprimento
+        else:
+            por_ponto, max_pontos, fator = 1, n_pontos_desejados, 1.0
+        tracos.append({'indice': indice, 'cursor_ms': cursor_ms, 'pontos': comprimento, 'max_pontos': max_pontos,
+                       'limite': limite, 'por_ponto': por_ponto, 'fator': fator, 'deriva': 0.0})
+    return {'n_desejados': n_pontos_desejados, 'tracos': tracos}
+
+
+def _extensao_traco(serie, coluna, traco, soma, deriva_maxima):
+    """
+    (x, y, novo traço) com as leituras de 'serie' posteriores ao cursor do traço, já
+    agrupadas; (None, None, traço) se nada novo; None se o traço precisa ser reconstruído.
+    """
+    timestamps_ms = _timestamps_ms(serie['timestamp'])
+    cursor_ms, por_ponto = traco['cursor_ms'], traco['por_ponto']
+    if cursor_ms is None or not len(timestamps_ms) or cursor_ms < timestamps_ms[0] or cursor_ms > timestamps_ms[-1]:
+        return None
+    inicio = int(np.searchsorted(timestamps_ms, cursor_ms, side='right'))
+    n_grupos = (len(serie) - inicio) // por_ponto
+    if n_grupos == 0:
+        return None, None, traco
+    pontos = min(traco['pontos'] + n_grupos, traco['max_pontos'])
+    if pontos > traco['limite']:
+        return None  # A janela crua passou do limite de pontos: reconstrói já reduzida
+    # Cada ponto novo cobre 'por_ponto' leituras e empurra para fora um que cobria 'fator'
+    deriva = traco['deriva'] + n_grupos * (traco['fator'] - por_ponto)
+    if abs(deriva) > deriva_maxima:
+        return None
+    fim = inicio + n_grupos * por_ponto
+    grupos = serie[coluna].to_numpy()[inicio:fim].reshape(n_grupos, por_ponto)
+    if soma:
+        posicoes = np.arange(inicio, fim, por_ponto)
+        valores = grupos[:, 0] if por_ponto == 1 else np.nan_to_num(grupos).sum(axis=1)
+    else:
+        # Linhas: a leitura mais distante da média do grupo (mantém picos e vales)
+        deslocamentos = np.argmax(np.abs(grupos - grupos.mean(axis=1, keepdims=True)), axis=1)
+        posicoes = np.arange(inicio, fim, por_ponto) + deslocamentos
+        valores = grupos[np.arange(n_grupos), deslocamentos]
+    x = np.datetime_as_string(serie['timestamp'].to_numpy(dtype='datetime64[ns]')[posicoes]).tolist()
+    return x, _valores_json(valores), {**traco, 'cursor_ms': int(timestamps_ms[fim - 1]), 'pontos': pontos,
+                                       'deriva': deriva}
+
+
+def extensao_graficos(metricas_ponto, estado):
+    """
+    O que há de novo no ponto desde o 'estado', no formato do 'extendData':
+    (extensao_chuva, extensao_umidade, novo_estado), com None nas extensões sem nada novo.
+    Retorna None quando as figuras precisam ser reconstruídas (lacuna, reinício do
+    servidor, janela que passou do limite de pontos ou deriva excessiva).
+    """
+    df_ponto = metricas_ponto.df_ponto
+    if not estado or df_ponto.empty:
+        return None
+    acumulado = metricas_ponto.acumulado_72h
+    series = [(df_ponto, 'chuva_mm', True), (acumulado[acumulado['chuva_mm'].notna()], 'chuva_mm', False)] + \
+             [(df_ponto[df_ponto[coluna].notna()], coluna, False) for coluna in COLUNAS_UMIDADE_GRAFICO]
+    resultados = []
+    for (serie, coluna, soma), traco in zip(series, estado['tracos']):
+        if traco.get('indice') is None:
+            # Série sem traço na figura: enquanto seguir vazia não há o que estender
+            if not serie.empty:
+                return None
+            resultados.append((None, None, traco))
+            continue
+        resultado = _extensao_traco(serie, coluna, traco, soma, DERIVA_MAXIMA_JANELA * estado['n_desejados'])
+        if resultado is None:
+            return None
+        resultados.append(resultado)
+
+    def _extensao(indices):
+        indices = [i for i in indices if resultados[i][0] is not None]
+        if not indices:
+            return None
+        tracos = [estado['tracos'][i] for i in indices]
+        max_pontos = [traco['max_pontos'] for traco in tracos]
+        return [{'x': [resultados[i][0] for i in indices], 'y': [resultados[i][1] for i in indices]},
+                [traco['indice'] for traco in tracos], {'x': max_pontos, 'y': max_pontos}]
+
+    novo_estado = {**estado, 'tracos': [resultado[2] for resultado in resultados]}
+    return _extensao([0, 1]), _extensao([2, 3, 4]), novo_estado
@@ -0,0 +1,211 @@
+# relatorios.py (Geração de relatórios PDF em segundo plano, com cache em disco)
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+import data_source
+import gerador_pdf
+
+# --- Configuração (variáveis de ambiente) ---
+# O cache fica em disco, ao lado do banco, para que todos os workers do gunicorn enxerguem
+# os mesmos PDFs e o mesmo andamento dos jobs (o polling pode cair em outro worker).
+DIRETORIO_RELATORIOS = os.environ.get('DIRETORIO_RELATORIOS',
+                                      os.path.join(os.path.dirname(data_source.CAMINHO_BANCO_DADOS), 'relatorios'))
+MAX_RELATORIOS_CACHE = int(os.environ.get('MAX_RELATORIOS_CACHE', 64))
+RELATORIOS_PARALELOS = int(os.environ.get('RELATORIOS_PARALELOS', 2))  # Jobs simultâneos por worker
+TEMPO_MAXIMO_SEM_PROGRESSO_S = float(os.environ.get('TEMPO_MAXIMO_SEM_PROGRESSO_S', 300.0))  # Job órfão (worker morto)
+
+
+COLUNAS_RELATORIO = ['timestamp', 'chuva_mm', 'umidade_1m_perc', 'umidade_2m_perc', 'umidade_3m_perc']
+
+
+def chave_relatorio(id_ponto, inicio, fim, df_periodo, df_acumulado_72h, identidade, agregacao_horaria=False):
+    """
+    Endereço do relatório no cache: hash de tudo o que entra no PDF. Além de ponto, período e
+    tipo de tabela, entram os dados em si (leituras do período e o acumulado de 72h recortado,
+    que depende da chuva anterior ao início), a origem deles ('identidade', de
+    data_source.identidade_dados) e o renderizador dos gráficos. Leituras novas fora do período
+    não mudam a chave, então o PDF de um período fechado continua no cache.
+    """
+    resumo = hashlib.sha256(f"{id_ponto}|{inicio}|{fim}|{identidade}|{gerador_pdf.RENDERIZADOR_GRAFICOS}|"
+                            f"{'horaria' if agregacao_horaria else 'completa'}".encode('utf-8'))
+    for df, colunas in ((df_periodo, COLUNAS_RELATORIO), (df_acumulado_72h, ['timestamp', 'chuva_mm'])):
+        resumo.update(f"|{len(df)}|".encode('utf-8'))
+        resumo.update(pd.util.hash_pandas_object(df[colunas], index=False).to_numpy().tobytes())
+    return resumo.hexdigest()[:32]
+
+
+def _gravar_atomico(caminho, conteudo):
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+class FilaRelatorios:
+    """
+    Executa a montagem dos PDFs num pool de threads, fora do ciclo de requisição, e guarda
+    o resultado em '<chave>.pdf'. Enquanto o job roda, '<chave>.json' guarda o andamento
+    ({'estado', 'progresso', 'mensagem'}); a criação exclusiva desse arquivo garante que
+    pedidos iguais em workers diferentes não montem o mesmo relatório duas vezes. Uma falha
+    fica em '<chave>.erro' e libera o '.json': a nova tentativa passa pela mesma reserva.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_RELATORIOS, max_paralelos=RELATORIOS_PARALELOS,
+                 max_itens=MAX_RELATORIOS_CACHE):
+        self.diretorio = diretorio
+        self.max_itens = max_itens
+        self._executor = ThreadPoolExecutor(max_workers=max_paralelos, thread_name_prefix="relatorio")
+
+    def _caminho(self, chave, extensao):
+        return os.path.join(self.diretorio, f"{chave}.{extensao}")
+
+    def obter_pdf(self, chave):
+        """ Bytes do relatório pronto, ou None. """
+        caminho = self._caminho(chave, 'pdf')
+        try:
+            with open(caminho, 'rb') as arquivo:
+                pdf_bytes = arquivo.read()
+            os.utime(caminho)  # Marca como usado recentemente (ordem da poda)
+            return pdf_bytes
+        except FileNotFoundError:
+            return None
+
+    def estado(self, chave):
+        """ {'estado': 'concluido' | 'executando' | 'erro' | 'ausente', 'progresso', 'mensagem'} """
+        if os.path.exists(self._caminho(chave, 'pdf')):
+            return {'estado': 'concluido', 'progresso': 100, 'mensagem': "Relatório pronto"}
+        caminho_estado = self._caminho(chave, 'json')
+        try:
+            with open(caminho_estado, 'r', encoding='utf-8') as arquivo:
+                estado = json.load(arquivo)
+        except FileNotFoundError:
+            estado = None
+        except ValueError:
+            # Reservado neste instante por outro processo (arquivo ainda vazio)
+            try:
+                estado = {'estado': 'executando', 'progresso': 0, 'mensagem': "Na fila",
+                          'atualizado_em': os.path.getmtime(caminho_estado)}
+            except FileNotFoundError:
+                estado = None
+        if estado is not None:
+            if time.time() - estado.get('atualizado_em', 0) <= TEMPO_MAXIMO_SEM_PROGRESSO_S:
+                return estado
+            # Sem progresso há muito tempo: o worker do job morreu ('orfao' identifica este estado)
+            return {'estado': 'erro', 'progresso': estado.get('progresso', 0),
+                    'mensagem': "A geração do relatório foi interrompida.", 'orfao': estado.get('atualizado_em', 0)}
+        try:
+            with open(self._caminho(chave, 'erro'), 'r', encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return {'estado': 'ausente', 'progresso': 0, 'mensagem': ""}
+
+    def _registrar(self, chave, estado, progresso, mensagem, extensao='json'):
+        conteudo = {'estado': estado, 'progresso': int(progresso), 'mensagem': mensagem, 'atualizado_em': time.time()}
+        _gravar_atomico(self._caminho(chave, extensao), json.dumps(conteudo).encode('utf-8'))
+
+    def _remover(self, chave, extensao):
+        try:
+            os.remove(self._caminho(chave, extensao))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _reservar(caminho):
+        """ Criação exclusiva de 'caminho': True só para o primeiro processo (ou thread) que tentar. """
+        try:
+            os.close(os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def submeter(self, chave, construtor):
+        """
+        Agenda 'construtor(progresso)' (que retorna os bytes do PDF, ou None se não há dados)
+        para a chave, a menos que o PDF já exista ou um job dela já esteja em andamento.
+        Retorna o estado da chave logo após o agendamento.
+        """
+        estado = self.estado(chave)
+        if estado['estado'] in ('concluido', 'executando'):
+            return estado
+        os.makedirs(self.diretorio, exist_ok=True)  # Só no primeiro pedido: importar a página não cria o diretório
+        if 'orfao' in estado:
+            # O '.json' do job morto só é descartado por quem reservar a retomada deste estado
+            if not self._reservar(self._caminho(chave, f"orfao-{int(estado['orfao'] * 1e6)}")):
+                return self.estado(chave)
+            self._remover(chave, 'json')
+        if not self._reservar(self._caminho(chave, 'json')):
+            return self.estado(chave)  # Outro worker acabou de assumir o job
+        if os.path.exists(self._caminho(chave, 'pdf')):
+            self._remover(chave, 'json')  # Concluído por outro worker entre a consulta e a reserva
+            return self.estado(chave)
+        self._remover(chave, 'erro')  # Nova tentativa: a falha anterior deixa de valer
+        self._registrar(chave, 'executando', 0, "Na fila")
+        self._executor.submit(self._executar, chave, construtor)
+        return self.estado(chave)
+
+    def _executar(self, chave, construtor):
+        inicio = time.perf_counter()
+        try:
+            pdf_bytes = construtor(lambda progresso, mensagem: self._registrar(chave, 'executando', progresso, mensagem))
+            if pdf_bytes is None:
+                self._falhar(chave, "Sem dados para o período selecionado.")
+                return
+            _gravar_atomico(self._caminho(chave, 'pdf'), bytes(pdf_bytes))
+            self._remover(chave, 'json')
+            print(f"Relatório {chave} gerado em {time.perf_counter() - inicio:.2f}s ({len(pdf_bytes) / 1024:.0f} KB).")
+            self._podar()
+        except Exception as e:
+            print(f"ERRO ao gerar o relatório {chave}: {e}")
+            self._falhar(chave, "Erro ao gerar o relatório.")
+
+    def _falhar(self, chave, mensagem):
+        """ Grava a falha em '<chave>.erro' e libera a reserva: o próximo pedido tenta de novo. """
+        self._registrar(chave, 'erro', 0, mensagem, extensao='erro')
+        self._remover(chave, 'json')
+        self._podar()
+
+    def _podar(self):
+        """
+        Mantém apenas os 'max_itens' PDFs usados mais recentemente e as 'max_itens' falhas
+        ('.erro') mais recentes. Reservas de retomada ('orfao-*'), '.json' de jobs mortos e
+        temporários esquecidos saem depois de TEMPO_MAXIMO_SEM_PROGRESSO_S sem alteração.
+        """
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError as e:
+            print(f"AVISO: Falha ao podar o cache de relatórios: {e}")
+            return
+        limite_abandonados = time.time() - TEMPO_MAXIMO_SEM_PROGRESSO_S
+        por_extensao = {'pdf': [], 'erro': []}
+        abandonados = []
+        for nome in nomes:
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                modificado_em = os.path.getmtime(caminho)
+            except FileNotFoundError:
+                continue  # Removido por outro worker
+            extensao = nome.rsplit('.', 1)[-1]
+            if extensao in por_extensao:
+                por_extensao[extensao].append((modificado_em, caminho))
+            elif modificado_em < limite_abandonados and \
+                    (extensao in ('json', 'tmp') or extensao.startswith('orfao-')):
+                abandonados.append(caminho)
+        for arquivos in por_extensao.values():
+            arquivos.sort()
+            abandonados.extend(caminho for _, caminho in arquivos[:-self.max_itens])
+        for caminho in abandonados:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"AVISO: Falha ao podar o cache de relatórios: {e}")
+
+
+FILA_RELATORIOS = FilaRelatorios()
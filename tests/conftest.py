@@ -0,0 +1,5 @@
+# tests/conftest.py
+import os
+
+# Os testes nunca tocam o banco do servidor: tudo em memória, antes de importar data_source
+os.environ.setdefault('ARMAZENAMENTO_PERSISTENTE', '0')
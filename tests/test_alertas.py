@@ -0,0 +1,97 @@
+# tests/test_alertas.py (Retentativas e despacho agrupado dos alertas, com httpx.MockTransport)
+
+import json
+import time
+import types
+import httpx
+import pytest
+
+import alertas
+
+URL_EMAIL = "http://smtp2go.teste/v3/email/send"
+URL_SMS = "http://comtele.teste/api/v2/send"
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    """ Respostas das APIs de e-mail e SMS: 'falhas_sms' respostas 500 antes de aceitar. """
+    estado = {'pedidos': [], 'falhas_sms': 0}
+
+    def responder(pedido):
+        corpo = json.loads(pedido.content)
+        estado['pedidos'].append((str(pedido.url), dict(pedido.headers), corpo))
+        if str(pedido.url) == URL_EMAIL:
+            return httpx.Response(200, json={'data': {'failures': 0}})
+        if estado['falhas_sms'] > 0:
+            estado['falhas_sms'] -= 1
+            return httpx.Response(500, json={'Success': False})
+        return httpx.Response(200, json={'Success': True})
+
+    monkeypatch.setattr(alertas, '_CLIENTE_HTTP', httpx.Client(transport=httpx.MockTransport(responder)))
+    monkeypatch.setattr(alertas, 'SMTP2GO_API_URL', URL_EMAIL)
+    monkeypatch.setattr(alertas, 'COMTELE_API_URL', URL_SMS)
+    monkeypatch.setattr(alertas, 'SMTP2GO_API_KEY', 'chave-email')
+    monkeypatch.setattr(alertas, 'SMTP2GO_SENDER_EMAIL', 'alertas@exemplo.com')
+    monkeypatch.setattr(alertas, 'DESTINATARIOS_EMAIL_STR', 'a@exemplo.com, b@exemplo.com')
+    monkeypatch.setattr(alertas, 'COMTELE_API_KEY', 'chave-sms')
+    monkeypatch.setattr(alertas, 'SMS_DESTINATARIOS_STR', '11999990000')
+    return estado
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """ Registra os sleeps do backoff em vez de dormir. """
+    registradas = []
+    monkeypatch.setattr(alertas, 'time', types.SimpleNamespace(sleep=registradas.append, monotonic=time.monotonic))
+    monkeypatch.setattr(alertas, 'MAX_TENTATIVAS_ENVIO', 3)
+    monkeypatch.setattr(alertas, 'BACKOFF_INICIAL_S', 0.5)
+    return registradas
+
+
+def _pedidos(servidor, url):
+    return [corpo for url_pedido, _, corpo in servidor['pedidos'] if url_pedido == url]
+
+
+def test_retentativas_com_backoff_exponencial(servidor, esperas):
+    servidor['falhas_sms'] = 2
+    assert alertas._com_retentativas("SMS", alertas._enviar_sms_comtele, 'chave-sms', ['11999990000'], "msg")
+    assert esperas == [0.5, 1.0]
+    assert len(_pedidos(servidor, URL_SMS)) == 3
+    _, cabecalhos, corpo = servidor['pedidos'][-1]
+    assert cabecalhos['auth-key'] == 'chave-sms'
+    assert corpo == {'Content': "msg", 'Receivers': '11999990000'}
+
+
+def test_retentativas_esgotadas(servidor, esperas):
+    servidor['falhas_sms'] = 10
+    assert not alertas._com_retentativas("SMS", alertas._enviar_sms_comtele, 'chave-sms', ['11999990000'], "msg")
+    assert esperas == [0.5, 1.0]
+    assert len(_pedidos(servidor, URL_SMS)) == 3
+
+
+def test_despacho_agrupa_transicoes_da_janela(servidor, esperas, monkeypatch):
+    monkeypatch.setattr(alertas, 'JANELA_AGRUPAMENTO_ALERTAS_S', 0.3)
+    servidor['falhas_sms'] = 1  # O SMS agrupado também passa pelas retentativas
+    inicio = time.perf_counter()
+    alertas.enfileirar_alertas([('Ponto-A', 'KM 67', 'PARALIZAÇÃO', 'ALERTA')])
+    alertas.enfileirar_alertas([('Ponto-B', 'KM 72', 'LIVRE', 'ATENÇÃO'),
+                                ('Ponto-C', 'KM 74', 'ALERTA', 'ATENÇÃO')])  # Não gera alerta
+    assert time.perf_counter() - inicio < 0.1  # Enfileirar não espera o envio
+    alertas.aguardar_envios()
+
+    emails = _pedidos(servidor, URL_EMAIL)
+    assert len(emails) == 1
+    assert emails[0]['to'] == ['a@exemplo.com', 'b@exemplo.com']
+    assert 'KM 67' in emails[0]['subject'] and 'KM 72' in emails[0]['subject']
+    assert 'KM 74' not in emails[0]['subject']
+    assert emails[0]['subject'].startswith("ALERTA CRÍTICO: PARALIZAÇÃO")
+    sms = _pedidos(servidor, URL_SMS)
+    assert len(sms) == 2 and sms[0] == sms[1]
+    assert 'KM 67' in sms[-1]['Content'] and 'KM 72' in sms[-1]['Content']
+    assert esperas == [0.5]
+
+
+def test_transicao_sem_alerta_nao_envia(servidor, esperas):
+    alertas.enfileirar_alerta('Ponto-A', 'KM 67', 'ATENÇÃO', 'LIVRE')
+    alertas.aguardar_envios()
+    assert servidor['pedidos'] == []
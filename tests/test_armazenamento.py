@@ -0,0 +1,60 @@
+# tests/test_armazenamento.py (Leitura consistente com um escritor concorrente; troca de status)
+
+import threading
+import numpy as np
+
+import armazenamento
+import data_source
+
+COLUNAS = ['chuva_mm', 'umidade_1m_perc']
+PONTOS = ['Ponto-A', 'Ponto-B', 'Ponto-C']
+LOTES = 300
+
+
+def _lote(k):
+    return {id_ponto: (np.array([k], dtype=np.int64), {nome: np.array([float(k)]) for nome in COLUNAS})
+            for id_ponto in PONTOS}
+
+
+def test_carregar_desde_retorna_as_linhas_da_versao(tmp_path):
+    caminho = str(tmp_path / 'dados.sqlite3')
+    escritor = armazenamento.ArmazenamentoSQLite(caminho, COLUNAS)
+    leitor = armazenamento.ArmazenamentoSQLite(caminho, COLUNAS)
+    terminou = threading.Event()
+
+    def escrever():
+        # Cada lote acrescenta uma leitura por ponto: na versão v, todo ponto tem v leituras
+        for k in range(1, LOTES + 1):
+            escritor.gravar_lote(_lote(k))
+        terminou.set()
+
+    thread = threading.Thread(target=escrever)
+    thread.start()
+    leituras_vistas = 0
+    while not terminou.is_set() or leituras_vistas == 0:
+        versao, leituras = leitor.carregar_desde({id_ponto: None for id_ponto in PONTOS}, 10 * LOTES)
+        for id_ponto, (timestamps_ns, colunas) in leituras.items():
+            assert len(timestamps_ns) == versao, id_ponto
+            assert list(timestamps_ns) == list(range(1, versao + 1))
+        leituras_vistas += 1
+    thread.join()
+
+    versao, leituras = leitor.carregar_desde({'Ponto-A': LOTES - 2, 'Ponto-B': None}, 10 * LOTES)
+    assert versao == LOTES == leitor.versao_dados()
+    assert list(leituras['Ponto-A'][0]) == [LOTES - 1, LOTES]
+    np.testing.assert_array_equal(leituras['Ponto-A'][1]['chuva_mm'], [LOTES - 1, LOTES])
+    assert len(leituras['Ponto-B'][0]) == LOTES
+    escritor.fechar()
+    leitor.fechar()
+
+
+def test_falha_do_banco_nao_assume_a_transicao(tmp_path, monkeypatch):
+    banco = armazenamento.ArmazenamentoSQLite(str(tmp_path / 'dados.sqlite3'), COLUNAS)
+    monkeypatch.setattr(data_source, '_ARMAZENAMENTO', banco)
+    monkeypatch.setattr(data_source, 'STATUS_ATUAL_ALERTAS', {})
+    assert data_source.registrar_status_alerta('Ponto-A', "INDEFINIDO", "PARALIZAÇÃO")
+    assert not data_source.registrar_status_alerta('Ponto-A', "INDEFINIDO", "PARALIZAÇÃO")  # Já registrada
+
+    banco.fechar()  # Toda operação passa a falhar: nenhum worker pode achar que é o dono da transição
+    assert not data_source.registrar_status_alerta('Ponto-A', "PARALIZAÇÃO", "ALERTA")
+    assert data_source.STATUS_ATUAL_ALERTAS['Ponto-A'] == "PARALIZAÇÃO"
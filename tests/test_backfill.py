@@ -0,0 +1,58 @@
+# tests/test_backfill.py (Inicialização com backfill dentro do orçamento de boot; restauração que falha)
+
+import time
+import numpy as np
+
+import armazenamento
+import data_source
+from data_source import MAX_HISTORY_POINTS, FREQUENCIA_SIMULACAO
+
+
+def test_boot_com_backfill_dentro_do_orcamento(monkeypatch):
+    monkeypatch.setattr(data_source, 'ARMAZENAMENTO_PERSISTENTE', False)
+    monkeypatch.setattr(data_source, '_ARMAZENAMENTO', None)
+    monkeypatch.setattr(data_source, 'SIMULACAO_BACKFILL', True)
+
+    inicio = time.perf_counter()
+    data_source._inicializar_simuladores()
+    duracao = time.perf_counter() - inicio
+
+    assert duracao <= data_source.ORCAMENTO_BACKFILL_S
+    passo_ns = int(FREQUENCIA_SIMULACAO.total_seconds() * 1e9)
+    assert set(data_source.DADOS_HISTORICOS_GLOBAIS) == set(data_source.PONTOS_DE_ANALISE)
+    for id_ponto, historico in data_source.DADOS_HISTORICOS_GLOBAIS.items():
+        assert len(historico) == MAX_HISTORY_POINTS, id_ponto
+        assert np.all(np.diff(historico.timestamps_validos_ns()) == passo_ns)
+        # O simulador segue do último instante do histórico
+        assert data_source._para_epoch_ns(data_source.SIMULADORES_GLOBAIS[id_ponto].ultimo_timestamp) == \
+            historico.ultimo_timestamp_ns()
+
+
+def test_falha_no_meio_da_restauracao_volta_ao_backfill(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_source, 'ARMAZENAMENTO_PERSISTENTE', True)
+    monkeypatch.setattr(data_source, 'CAMINHO_BANCO_DADOS', str(tmp_path / 'dados.sqlite3'))
+    monkeypatch.setattr(data_source, '_ARMAZENAMENTO', None)
+    monkeypatch.setattr(data_source, 'SIMULACAO_BACKFILL', True)
+    data_source._inicializar_simuladores()  # Grava simuladores e histórico no banco
+    assert data_source._ARMAZENAMENTO.versao_dados() > 0
+
+    # A leitura do segundo ponto falha: o primeiro já foi restaurado quando o erro acontece
+    carregar_leituras = armazenamento.ArmazenamentoSQLite.carregar_leituras
+    chamadas = []
+
+    def carregar_com_falha(self, *args, **kwargs):
+        chamadas.append(1)
+        if len(chamadas) == 2:
+            raise OSError("disco indisponível")
+        return carregar_leituras(self, *args, **kwargs)
+
+    monkeypatch.setattr(armazenamento.ArmazenamentoSQLite, 'carregar_leituras', carregar_com_falha)
+    data_source._inicializar_simuladores()
+
+    ultimos = {simulador.ultimo_timestamp for simulador in data_source.SIMULADORES_GLOBAIS.values()}
+    assert len(ultimos) == 1
+    for id_ponto, historico in data_source.DADOS_HISTORICOS_GLOBAIS.items():
+        assert len(historico) == MAX_HISTORY_POINTS, id_ponto
+        assert data_source._para_epoch_ns(data_source.SIMULADORES_GLOBAIS[id_ponto].ultimo_timestamp) == \
+            historico.ultimo_timestamp_ns()
+    data_source._ARMAZENAMENTO.fechar()
@@ -0,0 +1,44 @@
+# tests/test_eventos.py (Eventos SSE montados a cada snapshot)
+
+import json
+from types import SimpleNamespace
+import numpy as np
+
+import eventos
+import processamento
+from data_source import PONTOS_DE_ANALISE
+
+
+def _metricas(status_chuva="LIVRE", status_geral="LIVRE"):
+    return SimpleNamespace(tem_dados=True, status_chuva=(status_chuva, "success"), status_geral=(status_geral, "success"))
+
+
+def _eventos(canal, monkeypatch, versao, status_por_ponto, ultimo_ns=0):
+    monkeypatch.setattr(processamento, 'obter_metricas', lambda snapshot: status_por_ponto)
+    snapshot = SimpleNamespace(versao=versao, timestamps_ns={id_ponto: np.array([ultimo_ns], dtype=np.int64)
+                                                             for id_ponto in PONTOS_DE_ANALISE})
+    textos = canal._eventos_do_snapshot(snapshot)
+    return {linha.split(': ', 1)[1]: json.loads(texto.split('data: ', 1)[1])
+            for texto in textos for linha in texto.splitlines() if linha.startswith('event: ')}
+
+
+def test_mudanca_so_da_umidade_gera_evento_de_status(monkeypatch):
+    canal = eventos.CanalEventos()
+    id_ponto = next(iter(PONTOS_DE_ANALISE))
+    livres = {ponto: _metricas() for ponto in PONTOS_DE_ANALISE}
+    assert set(_eventos(canal, monkeypatch, 1, livres)) == {'leituras'}
+
+    # Chuva continua LIVRE; a umidade leva o status geral a ALERTA
+    com_alerta = dict(livres, **{id_ponto: _metricas(status_geral="ALERTA")})
+    recebidos = _eventos(canal, monkeypatch, 2, com_alerta)
+    assert 'leituras' not in recebidos  # Mesma última leitura
+    assert recebidos['status'] == {'versao': 2, 'pontos': {id_ponto: {
+        'anterior': {'geral': "LIVRE", 'alerta': "LIVRE"}, 'novo': {'geral': "ALERTA", 'alerta': "LIVRE"}}}}
+
+
+def test_eventos_de_leituras_trazem_so_os_pontos(monkeypatch):
+    canal = eventos.CanalEventos()
+    livres = {ponto: _metricas() for ponto in PONTOS_DE_ANALISE}
+    _eventos(canal, monkeypatch, 1, livres, ultimo_ns=10)
+    recebidos = _eventos(canal, monkeypatch, 2, livres, ultimo_ns=20)
+    assert recebidos == {'leituras': {'versao': 2, 'pontos': list(PONTOS_DE_ANALISE)}}
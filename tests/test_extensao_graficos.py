@@ -0,0 +1,58 @@
+# tests/test_extensao_graficos.py (extendData aponta para os traços reais das figuras)
+
+import numpy as np
+import pandas as pd
+
+import processamento
+from data_source import COLUNAS_FINAIS, PONTOS_DE_ANALISE
+from pages import general_dash
+
+ID_PONTO = 'Ponto-A-KM67'
+HORAS = 6
+
+
+def _df_ponto(n, umidade_1m=np.nan):
+    timestamps = pd.date_range('2025-01-01', periods=n, freq='10min', tz='UTC')
+    indices = np.arange(n, dtype=float)
+    return pd.DataFrame({'id_ponto': ID_PONTO, 'timestamp': timestamps, 'chuva_mm': 0.5,
+                         'precipitacao_acumulada_mm': 0.5 * (indices + 1),
+                         'umidade_1m_perc': umidade_1m, 'umidade_2m_perc': 36.0 + indices / 100,
+                         'umidade_3m_perc': 39.0 + indices / 100,
+                         'base_1m': 30.0, 'base_2m': 36.0, 'base_3m': 39.0}, columns=COLUNAS_FINAIS)
+
+
+def _figuras(df):
+    metricas_ponto = processamento.calcular_metricas_ponto(ID_PONTO, df)
+    return general_dash._criar_figuras_ponto(PONTOS_DE_ANALISE[ID_PONTO], metricas_ponto, HORAS)
+
+
+def test_sensor_sem_valores_nao_desloca_os_indices():
+    df = _df_ponto(20)
+    fig_chuva, fig_umidade, estado = _figuras(df)
+    nomes = [traco['name'] for traco in fig_umidade['data']]
+    assert nomes == ['2m', '3m']  # O px.line omite o 1m, todo NaN na janela
+
+    df_novo = _df_ponto(21)
+    resultado = processamento.extensao_graficos(processamento.calcular_metricas_ponto(ID_PONTO, df_novo), estado)
+    assert resultado is not None
+    extensao_chuva, extensao_umidade, _ = resultado
+    dados, indices, _ = extensao_umidade
+    assert indices == [nomes.index('2m'), nomes.index('3m')]
+    assert dados['y'] == [[df_novo['umidade_2m_perc'].iat[-1]], [df_novo['umidade_3m_perc'].iat[-1]]]
+    assert extensao_chuva[1] == [0, 1]
+
+
+def test_primeira_leitura_do_sensor_reconstroi_a_figura():
+    _, _, estado = _figuras(_df_ponto(20))
+    df_novo = _df_ponto(21)
+    df_novo.loc[20, 'umidade_1m_perc'] = 31.0
+    assert processamento.extensao_graficos(processamento.calcular_metricas_ponto(ID_PONTO, df_novo), estado) is None
+
+
+def test_indices_com_todos_os_sensores():
+    df = _df_ponto(20, umidade_1m=30.5)
+    _, fig_umidade, estado = _figuras(df)
+    nomes = [traco['name'] for traco in fig_umidade['data']]
+    _, extensao_umidade, _ = processamento.extensao_graficos(
+        processamento.calcular_metricas_ponto(ID_PONTO, _df_ponto(21, umidade_1m=30.5)), estado)
+    assert extensao_umidade[1] == [nomes.index(sensor) for sensor in ('1m', '2m', '3m')]
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+import relatorios
+
+
+def _dados(inicio, fim, semente=0):
+    """ (df_periodo, df_acumulado_72h) sintéticos como os de specific_dash.recortar_periodo. """
+    timestamps = pd.date_range(inicio, fim, freq='10min', tz='UTC')
+    gerador = np.random.default_rng(semente)
+    df = pd.DataFrame({'timestamp': timestamps, 'chuva_mm': gerador.gamma(1.0, 1.0, len(timestamps)).round(2)})
+    for coluna in ['umidade_1m_perc', 'umidade_2m_perc', 'umidade_3m_perc']:
+        df[coluna] = 35 + gerador.normal(0, 0.5, len(timestamps)).round(2)
+    return df, pd.DataFrame({'timestamp': timestamps, 'chuva_mm': df['chuva_mm'].cumsum()})
+
+
+def _chave(df_periodo, df_72h, identidade='banco-1', agregacao_horaria=False):
+    return relatorios.chave_relatorio('Ponto-A-KM67', '2025-01-14', '2025-01-15', df_periodo, df_72h,
+                                      identidade, agregacao_horaria)
+
+
+def test_mesmos_dados_mesma_chave():
+    assert _chave(*_dados('2025-01-14', '2025-01-15 23:50')) == _chave(*_dados('2025-01-14', '2025-01-15 23:50'))
+
+
+def test_mesmos_timestamps_com_valores_diferentes_mudam_a_chave():
+    df_periodo, df_72h = _dados('2025-01-14', '2025-01-15 23:50', semente=0)
+    outro_periodo, outro_72h = _dados('2025-01-14', '2025-01-15 23:50', semente=1)
+    assert _chave(df_periodo, df_72h) != _chave(outro_periodo, outro_72h)
+    # Só o acumulado de 72h difere (chuva anterior ao início do período)
+    assert _chave(df_periodo, df_72h) != _chave(df_periodo, df_72h.assign(chuva_mm=df_72h['chuva_mm'] + 1.0))
+
+
+def test_origem_tabela_e_renderizador_mudam_a_chave(monkeypatch):
+    dados = _dados('2025-01-14', '2025-01-15 23:50')
+    chave = _chave(*dados)
+    assert _chave(*dados, identidade='banco-2') != chave
+    assert _chave(*dados, agregacao_horaria=True) != chave
+    monkeypatch.setattr(relatorios.gerador_pdf, 'RENDERIZADOR_GRAFICOS',
+                        'kaleido' if relatorios.gerador_pdf.RENDERIZADOR_GRAFICOS != 'kaleido' else 'nativo')
+    assert _chave(*dados) != chave
+
+
+def test_diretorio_criado_so_no_primeiro_pedido(tmp_path):
+    diretorio = tmp_path / 'relatorios'
+    fila = relatorios.FilaRelatorios(diretorio=str(diretorio), max_paralelos=1)
+    assert not diretorio.exists()
+    assert fila.estado('abc')['estado'] == 'ausente' and fila.obter_pdf('abc') is None
+    assert not diretorio.exists()
+    fila.submeter('abc', lambda progresso: b'%PDF-teste')
+    fila._executor.shutdown(wait=True)
+    assert fila.obter_pdf('abc') == b'%PDF-teste'
+
+
+def _submeter_em_paralelo(filas, chave, construtor, vezes=8):
+    barreira = threading.Barrier(len(filas) * vezes)
+
+    def pedir(fila):
+        barreira.wait()
+        fila.submeter(chave, construtor)
+
+    threads = [threading.Thread(target=pedir, args=(fila,)) for fila in filas for _ in range(vezes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for fila in filas:
+        fila._executor.shutdown(wait=True)
+
+
+def _construtor_contado():
+    chamadas = []
+
+    def construtor(progresso):
+        chamadas.append(1)
+        time.sleep(0.05)
+        return b'%PDF-teste'
+    return construtor, chamadas
+
+
+def test_nova_tentativa_apos_erro_monta_o_relatorio_uma_vez(tmp_path):
+    fila = relatorios.FilaRelatorios(diretorio=str(tmp_path), max_paralelos=1)
+    fila.submeter('abc', lambda progresso: None)
+    fila._executor.shutdown(wait=True)
+    assert fila.estado('abc')['estado'] == 'erro'
+
+    # Dois "workers" (filas no mesmo diretório) repetindo o pedido ao mesmo tempo
+    filas = [relatorios.FilaRelatorios(diretorio=str(tmp_path), max_paralelos=4) for _ in range(2)]
+    construtor, chamadas = _construtor_contado()
+    _submeter_em_paralelo(filas, 'abc', construtor)
+    assert len(chamadas) == 1
+    assert filas[0].obter_pdf('abc') == b'%PDF-teste'
+    assert not os.path.exists(tmp_path / 'abc.erro') and not os.path.exists(tmp_path / 'abc.json')
+
+
+def test_job_orfao_e_retomado_uma_vez(tmp_path):
+    atualizado_em = time.time() - relatorios.TEMPO_MAXIMO_SEM_PROGRESSO_S - 60
+    (tmp_path / 'abc.json').write_text(json.dumps({'estado': 'executando', 'progresso': 40, 'mensagem': "Tabela",
+                                                   'atualizado_em': atualizado_em}))
+    filas = [relatorios.FilaRelatorios(diretorio=str(tmp_path), max_paralelos=4) for _ in range(2)]
+    assert filas[0].estado('abc')['estado'] == 'erro'
+    construtor, chamadas = _construtor_contado()
+    _submeter_em_paralelo(filas, 'abc', construtor)
+    assert len(chamadas) == 1
+    assert filas[0].estado('abc')['estado'] == 'concluido'
+
+
+def test_poda_limita_falhas_e_remove_abandonados(tmp_path):
+    fila = relatorios.FilaRelatorios(diretorio=str(tmp_path), max_paralelos=1, max_itens=3)
+    for i in range(6):
+        fila.submeter(f"falha{i}", lambda progresso: None)
+        fila._executor.shutdown(wait=True)
+        fila._executor = relatorios.ThreadPoolExecutor(max_workers=1)
+        os.utime(tmp_path / f"falha{i}.erro", (time.time() - 100 + i,) * 2)  # Ordem de modificação explícita
+    antigo = time.time() - relatorios.TEMPO_MAXIMO_SEM_PROGRESSO_S - 60
+    for nome in ['morto.json', 'morto.orfao-123', 'x.pdf.1.2.tmp', 'vivo.json']:
+        (tmp_path / nome).write_text("{}")
+        if nome != 'vivo.json':
+            os.utime(tmp_path / nome, (antigo, antigo))
+    fila._podar()
+    assert sorted(os.listdir(tmp_path)) == ['falha3.erro', 'falha4.erro', 'falha5.erro', 'vivo.json']
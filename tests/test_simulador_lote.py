@@ -0,0 +1,72 @@
+# tests/test_simulador_lote.py (SimuladorLote x SensorSimulator passo a passo)
+
+import datetime
+import numpy as np
+import pytest
+
+import data_source
+from data_source import COLUNAS_HISTORICO, FREQUENCIA_SIMULACAO
+
+INICIO = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+N_PONTOS = 3
+# Mais de um ciclo do script de chuva (144h = 864 passos): passa pelo gatilho da base,
+# subida, descida e reancoragem das bases
+PASSOS_LOTE = 1500
+PASSOS_DEPOIS = 300
+
+
+def _simuladores(semente):
+    sementes = np.random.SeedSequence(semente).spawn(N_PONTOS)
+    return [data_source.criar_simulador(data_source.CONSTANTES_PADRAO.copy(), s) for s in sementes]
+
+
+def _passo_a_passo(simuladores, timestamp_inicial, n_passos):
+    """ {coluna: array [K, N]} gerado por SensorSimulator.gerar_novo_dado. """
+    colunas = {nome: np.empty((n_passos, len(simuladores))) for nome in COLUNAS_HISTORICO}
+    for i, simulador in enumerate(simuladores):
+        timestamp = timestamp_inicial
+        for k in range(n_passos):
+            leitura = simulador.gerar_novo_dado(timestamp)
+            for nome, (_, chave) in COLUNAS_HISTORICO.items():
+                colunas[nome][k, i] = leitura[chave]
+            timestamp += FREQUENCIA_SIMULACAO
+    return colunas
+
+
+@pytest.mark.parametrize('semente', [0, 2024])
+def test_lote_igual_ao_passo_a_passo(semente):
+    referencia = _simuladores(semente)
+    esperado = _passo_a_passo(referencia, INICIO, PASSOS_LOTE)
+
+    simuladores = _simuladores(semente)
+    lote = data_source.SimuladorLote(simuladores, timestamp_inicial=INICIO)
+    timestamps_ns, colunas = lote.avancar(PASSOS_LOTE)
+
+    passo_ns = int(FREQUENCIA_SIMULACAO.total_seconds() * 1e9)
+    assert timestamps_ns[0] == data_source._para_epoch_ns(INICIO)
+    assert np.all(np.diff(timestamps_ns) == passo_ns)
+    for nome in COLUNAS_HISTORICO:
+        np.testing.assert_array_equal(colunas[nome], esperado[nome], err_msg=nome)
+
+    # Devolvido o estado, os simuladores seguem passo a passo exatamente como a referência
+    lote.para_simuladores()
+    proximo = INICIO + FREQUENCIA_SIMULACAO * PASSOS_LOTE
+    for simulador, simulador_referencia in zip(simuladores, referencia):
+        assert simulador.exportar_estado() == simulador_referencia.exportar_estado()
+    depois = _passo_a_passo(simuladores, proximo, PASSOS_DEPOIS)
+    depois_referencia = _passo_a_passo(referencia, proximo, PASSOS_DEPOIS)
+    for nome in COLUNAS_HISTORICO:
+        np.testing.assert_array_equal(depois[nome], depois_referencia[nome], err_msg=nome)
+
+
+def _linhas_base(saida):
+    return sorted(linha for linha in saida.splitlines() if 'ALERTA BASE' in linha)
+
+
+def test_lote_registra_as_mesmas_mudancas_de_base(capsys):
+    _passo_a_passo(_simuladores(0), INICIO, PASSOS_LOTE)
+    esperado = _linhas_base(capsys.readouterr().out)
+    data_source.SimuladorLote(_simuladores(0), timestamp_inicial=INICIO).avancar(PASSOS_LOTE)
+    registrado = _linhas_base(capsys.readouterr().out)
+    assert any('Gatilho' in linha for linha in esperado) and any('baixou da base' in linha for linha in esperado)
+    assert registrado == esperado
@@ -0,0 +1,64 @@
+# tests/test_status_vetorizado.py (versões vetorizadas x funções escalares de status)
+
+import itertools
+import numpy as np
+import pytest
+
+import processamento
+from processamento import (CHUVA_LIMITE_VERDE, CHUVA_LIMITE_AMARELO, CHUVA_LIMITE_LARANJA,
+                           DELTA_TRIGGER_UMIDADE)
+
+EPS = 1e-6
+NAN = float('nan')
+BASE = 30.0
+
+VALORES_CHUVA = [NAN, 0.0, -EPS] + [limite + delta for limite in (CHUVA_LIMITE_VERDE, CHUVA_LIMITE_AMARELO,
+                                                                  CHUVA_LIMITE_LARANJA)
+                                    for delta in (-EPS, 0.0, EPS)]
+# Umidade em torno do gatilho (base + delta ± ε) e sem dados
+VALORES_UMIDADE = [BASE, BASE + DELTA_TRIGGER_UMIDADE - EPS, BASE + DELTA_TRIGGER_UMIDADE,
+                   BASE + DELTA_TRIGGER_UMIDADE + EPS, NAN]
+
+
+@pytest.mark.parametrize('chuva', VALORES_CHUVA)
+def test_status_chuva(chuva):
+    textos, cores = processamento.definir_status_chuva_vetorizado([chuva])
+    assert (textos[0], cores[0]) == processamento.definir_status_chuva(chuva)
+    risco = processamento.calcular_risco_chuva_vetorizado([chuva])[0]
+    assert risco == processamento.RISCO_MAP[processamento.definir_status_chuva(chuva)[0]]
+
+
+@pytest.mark.parametrize('u1, u2, u3', list(itertools.product(VALORES_UMIDADE, repeat=3)))
+def test_status_umidade_hierarquico(u1, u2, u3):
+    textos, badges, barras = processamento.definir_status_umidade_hierarquico_vetorizado(
+        [u1], [u2], [u3], BASE, BASE, BASE)
+    assert (textos[0], badges[0], barras[0]) == processamento.definir_status_umidade_hierarquico(
+        u1, u2, u3, BASE, BASE, BASE)
+
+
+@pytest.mark.parametrize('base_nan', range(3))
+def test_status_umidade_hierarquico_base_nan(base_nan):
+    bases = [BASE, BASE, BASE]
+    bases[base_nan] = NAN
+    umidades = [BASE + DELTA_TRIGGER_UMIDADE] * 3
+    textos, _, _ = processamento.definir_status_umidade_hierarquico_vetorizado(*umidades, *bases)
+    assert textos == "SEM DADOS"
+    assert processamento.definir_status_umidade_hierarquico(*umidades, *bases)[0] == "SEM DADOS"
+
+
+@pytest.mark.parametrize('umidade, base, risco', list(itertools.product(VALORES_UMIDADE, [BASE, NAN], range(-1, 4))))
+def test_status_umidade_individual(umidade, base, risco):
+    cores = processamento.definir_status_umidade_individual_vetorizado([umidade], [base], risco)
+    assert cores[0] == processamento.definir_status_umidade_individual(umidade, base, risco)
+
+
+def test_series_inteiras():
+    """ Mesma classificação posição a posição numa série com todos os casos de fronteira. """
+    combinacoes = np.array(list(itertools.product(VALORES_UMIDADE, repeat=3)))
+    bases = np.full(len(combinacoes), BASE)
+    textos, badges, barras = processamento.definir_status_umidade_hierarquico_vetorizado(
+        combinacoes[:, 0], combinacoes[:, 1], combinacoes[:, 2], bases, bases, bases)
+    esperado = [processamento.definir_status_umidade_hierarquico(*linha, BASE, BASE, BASE) for linha in combinacoes]
+    assert list(zip(textos, badges, barras)) == esperado
+    textos_chuva, cores_chuva = processamento.definir_status_chuva_vetorizado(np.array(VALORES_CHUVA))
+    assert list(zip(textos_chuva, cores_chuva)) == [processamento.definir_status_chuva(v) for v in VALORES_CHUVA]
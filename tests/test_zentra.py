@@ -0,0 +1,127 @@
+# tests/test_zentra.py (ClienteZentra contra uma API simulada com httpx.MockTransport)
+
+import asyncio
+import datetime
+import time
+import numpy as np
+import httpx
+import pytest
+
+import zentra
+
+URL = "http://zentra.teste/api/v4/get_readings/"
+PASSO_S = 600
+LEITURAS_POR_PAGINA = 5
+
+
+def _epoch(texto):
+    data = datetime.datetime.strptime(texto, '%Y-%m-%d %H:%M').replace(tzinfo=datetime.timezone.utc)
+    return int(data.timestamp())
+
+
+class ApiZentraFalsa:
+    """
+    get_readings com paginação por 'next_url': leituras a cada 10 min de start_date (ou
+    'inicio_s', na primeira coleta) até end_date; 'lentos' demoram 'atraso_s' para responder.
+    """
+
+    def __init__(self, inicio_s, lentos=(), atraso_s=0.0):
+        self.inicio_s = inicio_s
+        self.lentos = set(lentos)
+        self.atraso_s = atraso_s
+        self.pedidos = []
+
+    async def __call__(self, pedido):
+        parametros = dict(pedido.url.params)
+        self.pedidos.append(parametros)
+        assert pedido.headers['Authorization'] == 'Token segredo'
+        if parametros['device_sn'] in self.lentos:
+            await asyncio.sleep(self.atraso_s)
+        inicio = _epoch(parametros['start_date']) if 'start_date' in parametros else self.inicio_s
+        instantes = list(range(-(-inicio // PASSO_S) * PASSO_S, _epoch(parametros['end_date']) + 1, PASSO_S))
+        pagina = int(parametros['page_num'])
+        selecionados = instantes[(pagina - 1) * LEITURAS_POR_PAGINA:pagina * LEITURAS_POR_PAGINA]
+        proxima = None
+        if pagina * LEITURAS_POR_PAGINA < len(instantes):
+            proxima = str(pedido.url.copy_merge_params({'page_num': pagina + 1}))
+        leituras = lambda valor: [{'timestamp_utc': t, 'value': valor} for t in selecionados]
+        return httpx.Response(200, json={
+            'data': {'Precipitation': [{'metadata': {'port_number': 4}, 'readings': leituras(0.2)}],
+                     'Water Content': [{'metadata': {'port_number': porta}, 'readings': leituras(0.3 + porta / 100)}
+                                       for porta in (1, 2, 3)]},
+            'pagination': {'next_url': proxima}})
+
+
+@pytest.fixture
+def criar_cliente():
+    clientes = []
+
+    def criar(api, dispositivos, timeout_s=5.0):
+        cliente = zentra.ClienteZentra(dispositivos, url=URL, token='segredo', timeout_s=timeout_s,
+                                       transporte=httpx.MockTransport(api))
+        clientes.append(cliente)
+        return cliente
+
+    yield criar
+    for cliente in clientes:
+        cliente.fechar()
+
+
+def _agora_s():
+    return int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+
+
+def test_paginacao_pelo_next_url(criar_cliente):
+    api = ApiZentraFalsa(inicio_s=_agora_s() - 2 * 3600)
+    cliente = criar_cliente(api, {'Ponto-A': 'z6-a'})
+    novas, falhas = cliente.coletar()
+
+    assert falhas == {}
+    timestamps_ns, colunas = novas['Ponto-A']
+    assert len(timestamps_ns) >= 12  # 2h a cada 10 min, em várias páginas
+    assert np.all(np.diff(timestamps_ns) == PASSO_S * 1_000_000_000)
+    assert len(api.pedidos) == -(-len(timestamps_ns) // LEITURAS_POR_PAGINA)
+    assert [int(p['page_num']) for p in api.pedidos] == list(range(1, len(api.pedidos) + 1))
+    np.testing.assert_allclose(colunas['chuva_mm'], 0.2)
+    np.testing.assert_allclose(colunas['umidade_1m_perc'], 31.0)
+    np.testing.assert_allclose(colunas['umidade_3m_perc'], 33.0)
+
+
+def test_cursor_por_estacao(criar_cliente):
+    api = ApiZentraFalsa(inicio_s=_agora_s() - 3600)
+    cliente = criar_cliente(api, {'Ponto-A': 'z6-a', 'Ponto-B': 'z6-b'})
+    cliente.cursores_ns['Ponto-B'] = (_agora_s() - 1800) * 1_000_000_000
+    novas, _ = cliente.coletar()
+
+    for id_ponto in ('Ponto-A', 'Ponto-B'):
+        assert cliente.cursores_ns[id_ponto] == int(novas[id_ponto][0][-1])
+    primeiro_b = int(novas['Ponto-B'][0][0])
+    assert primeiro_b > (_agora_s() - 1800 - PASSO_S) * 1_000_000_000
+    assert len(novas['Ponto-B'][0]) < len(novas['Ponto-A'][0])
+
+    # Nova coleta: cada estação pede a partir do próprio cursor e nada é repetido
+    cursores = dict(cliente.cursores_ns)
+    api.pedidos.clear()
+    novas, falhas = cliente.coletar()
+    assert falhas == {}
+    primeiras_paginas = {p['device_sn']: p for p in api.pedidos if p['page_num'] == '1'}
+    for id_ponto, numero_serie in (('Ponto-A', 'z6-a'), ('Ponto-B', 'z6-b')):
+        assert primeiras_paginas[numero_serie]['start_date'] == zentra._formatar_data_zentra(cursores[id_ponto])
+        assert np.all(novas[id_ponto][0] > cursores[id_ponto])
+
+
+def test_timeout_de_uma_estacao_nao_afeta_as_outras(criar_cliente):
+    api = ApiZentraFalsa(inicio_s=_agora_s() - 3600, lentos={'z6-lento'}, atraso_s=2.0)
+    cliente = criar_cliente(api, {'Ponto-A': 'z6-a', 'Ponto-C': 'z6-lento'}, timeout_s=0.3)
+    cursor_lento = 123 * 1_000_000_000
+    cliente.cursores_ns['Ponto-C'] = cursor_lento
+
+    inicio = time.perf_counter()
+    novas, falhas = cliente.coletar()
+    assert time.perf_counter() - inicio < 1.5  # Não espera a estação lenta
+
+    assert set(falhas) == {'Ponto-C'}
+    assert isinstance(falhas['Ponto-C'], asyncio.TimeoutError)
+    assert 'Ponto-C' not in novas
+    assert cliente.cursores_ns['Ponto-C'] == cursor_lento  # Cursor não avança na falha
+    assert len(novas['Ponto-A'][0]) > 0
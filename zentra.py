@@ -0,0 +1,137 @@
+# zentra.py (Coleta das leituras reais na API ZENTRA Cloud)
+
+import asyncio
+import datetime
+import os
+import threading
+import httpx
+import numpy as np
+
+# --- Configuração (variáveis de ambiente) ---
+ZENTRA_API_URL = os.environ.get('ZENTRA_API_URL', "https://zentracloud.com/api/v4/get_readings/")
+ZENTRA_API_TOKEN = os.environ.get('ZENTRA_API_TOKEN')
+ZENTRA_TIMEOUT_S = float(os.environ.get('ZENTRA_TIMEOUT_S', 20.0))  # Limite por estação (inclui paginação)
+ZENTRA_MAX_CONEXOES = int(os.environ.get('ZENTRA_MAX_CONEXOES', 8))
+ZENTRA_LEITURAS_POR_PAGINA = 1000
+
+# --- Mapeamento das medições do ZENTRA para as colunas do histórico ---
+# 'Precipitation' (mm) -> chuva; 'Water Content' (m³/m³) por porta do logger -> umidade (%)
+MEDICAO_CHUVA = 'Precipitation'
+MEDICAO_UMIDADE = 'Water Content'
+PORTAS_UMIDADE = {1: 'umidade_1m_perc', 2: 'umidade_2m_perc', 3: 'umidade_3m_perc'}
+COLUNAS_COLETADAS = ['chuva_mm'] + list(PORTAS_UMIDADE.values())
+
+
+def _formatar_data_zentra(timestamp_ns):
+    """ Formato de data aceito pelos parâmetros start_date/end_date da API (UTC, minutos). """
+    data = datetime.datetime.fromtimestamp(timestamp_ns / 1e9, tz=datetime.timezone.utc)
+    return data.strftime('%Y-%m-%d %H:%M')
+
+
+def _extrair_leituras(corpo_json):
+    """
+    Converte a resposta de get_readings em {timestamp_ns: {coluna: valor}}.
+    Formato esperado: {"data": {"<medição>": [{"metadata": {"port_number": n, ...},
+    "readings": [{"timestamp_utc": s, "value": v}, ...]}, ...]}, "pagination": {...}}
+    """
+    leituras = {}
+    for nome_medicao, series in (corpo_json.get('data') or {}).items():
+        for serie in series:
+            porta = (serie.get('metadata') or {}).get('port_number')
+            if nome_medicao == MEDICAO_CHUVA:
+                coluna, fator = 'chuva_mm', 1.0
+            elif nome_medicao == MEDICAO_UMIDADE and porta in PORTAS_UMIDADE:
+                coluna, fator = PORTAS_UMIDADE[porta], 100.0
+            else:
+                continue
+            for leitura in serie.get('readings') or []:
+                valor = leitura.get('value')
+                if valor is None or leitura.get('timestamp_utc') is None:
+                    continue
+                timestamp_ns = int(leitura['timestamp_utc']) * 1_000_000_000
+                leituras.setdefault(timestamp_ns, {})[coluna] = float(valor) * fator
+    return leituras
+
+
+class ClienteZentra:
+    """
+    Cliente assíncrono do ZENTRA Cloud para várias estações.
+
+    - Um único httpx.AsyncClient (pool de conexões) num event loop próprio, em thread
+      dedicada, reaproveitado a cada coleta;
+    - Cursor por estação ('cursores_ns'): cada coleta pede só o que veio depois da última
+      leitura recebida, então o histórico nunca é baixado de novo;
+    - Estações consultadas em paralelo, cada uma com timeout próprio; a falha de uma não
+      afeta as outras (o cursor dela simplesmente não avança).
+    """
+
+    def __init__(self, dispositivos, url=None, token=None, timeout_s=None, max_conexoes=None, transporte=None):
+        self.dispositivos = dict(dispositivos)  # {id_ponto: número de série do logger}
+        self.url = url or ZENTRA_API_URL
+        self.token = token if token is not None else ZENTRA_API_TOKEN
+        self.timeout_s = timeout_s or ZENTRA_TIMEOUT_S
+        self.max_conexoes = max_conexoes or ZENTRA_MAX_CONEXOES
+        self.cursores_ns = {}
+        self._transporte = transporte  # httpx transport alternativo (ex.: httpx.MockTransport nos testes)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="cliente-zentra", daemon=True)
+        self._thread.start()
+        self._cliente = asyncio.run_coroutine_threadsafe(self._criar_cliente(), self._loop).result()
+
+    async def _criar_cliente(self):
+        cabecalhos = {'Authorization': f'Token {self.token}'} if self.token else {}
+        return httpx.AsyncClient(headers=cabecalhos, timeout=self.timeout_s, transport=self._transporte,
+                                 limits=httpx.Limits(max_connections=self.max_conexoes,
+                                                     max_keepalive_connections=self.max_conexoes))
+
+    async def _buscar_estacao(self, id_ponto, agora_ns):
+        """ Baixa (seguindo a paginação) as leituras da estação posteriores ao cursor. """
+        cursor_ns = self.cursores_ns.get(id_ponto)
+        parametros = {'device_sn': self.dispositivos[id_ponto], 'output_format': 'json', 'sort_by': 'ascending',
+                      'per_page': ZENTRA_LEITURAS_POR_PAGINA, 'end_date': _formatar_data_zentra(agora_ns)}
+        if cursor_ns is not None:
+            parametros['start_date'] = _formatar_data_zentra(cursor_ns)
+        leituras = {}
+        url, pagina = self.url, 1
+        while url:
+            resposta = await self._cliente.get(url, params={**parametros, 'page_num': pagina} if pagina else None)
+            resposta.raise_for_status()
+            corpo_json = resposta.json()
+            leituras.update({ts: {**leituras.get(ts, {}), **valores}
+                             for ts, valores in _extrair_leituras(corpo_json).items()})
+            proxima = (corpo_json.get('pagination') or {}).get('next_url')
+            url, pagina = (proxima, None) if proxima else (None, None)
+        # start_date tem resolução de minutos: descarta o que o cursor já cobre
+        return {ts: valores for ts, valores in leituras.items() if cursor_ns is None or ts > cursor_ns}
+
+    async def _coletar(self, agora_ns):
+        ids_pontos = list(self.dispositivos)
+        tarefas = [asyncio.wait_for(self._buscar_estacao(id_ponto, agora_ns), self.timeout_s) for id_ponto in ids_pontos]
+        return dict(zip(ids_pontos, await asyncio.gather(*tarefas, return_exceptions=True)))
+
+    def coletar(self):
+        """
+        Coleta as leituras novas de todas as estações (bloqueia até a mais lenta responder
+        ou estourar o timeout). Retorna (novas, falhas):
+        - novas: {id_ponto: (timestamps_ns int64 [K], {coluna: array [K]})}, em ordem
+          cronológica, com as colunas de COLUNAS_COLETADAS (NaN onde a medição faltou);
+        - falhas: {id_ponto: exceção} das estações que não responderam.
+        """
+        agora_ns = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1e9)
+        resultados = asyncio.run_coroutine_threadsafe(self._coletar(agora_ns), self._loop).result()
+        novas, falhas = {}, {}
+        for id_ponto, resultado in resultados.items():
+            if isinstance(resultado, BaseException):
+                falhas[id_ponto] = resultado
+                continue
+            timestamps_ns = np.array(sorted(resultado), dtype=np.int64)
+            colunas = {coluna: np.array([resultado[ts].get(coluna, np.nan) for ts in timestamps_ns], dtype=np.float64)
+                       for coluna in COLUNAS_COLETADAS}
+            if len(timestamps_ns):
+                self.cursores_ns[id_ponto] = int(timestamps_ns[-1])
+            novas[id_ponto] = (timestamps_ns, colunas)
+        return novas, falhas
+
+    def fechar(self):
+        asyncio.run_coroutine_threadsafe(self._cliente.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)